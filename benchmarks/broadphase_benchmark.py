@@ -0,0 +1,103 @@
+"""Compares all-pairs collision checks with the sweep and prune broad phase
+for growing numbers of robots on the field.
+    To run (from the root directory): python3 -m benchmarks.broadphase_benchmark
+"""
+import time
+import numpy as np
+from gamestate import GameState  # pylint: disable=import-error
+from gamestate.broadphase import SweepAndPrune  # pylint: disable=import-error
+
+BODY_COUNTS = [12, 25, 50, 100, 200]
+TICKS = 20
+QUERIES = 200
+
+
+def make_gamestate(num_bodies, rng):
+    gs = GameState()
+    for i in range(num_bodies):
+        team = 'blue' if i % 2 else 'yellow'
+        pos = np.array([rng.uniform(gs.FIELD_MIN_X, gs.FIELD_MAX_X),
+                        rng.uniform(gs.FIELD_MIN_Y, gs.FIELD_MAX_Y),
+                        0])
+        gs.update_robot_position(team, i // 2, pos)
+    return gs
+
+
+def jitter(gs, rng):
+    "move every robot a little, like a tick of real play"
+    for (team, robot_id), pos in gs.get_all_robot_positions():
+        gs.update_robot_position(team, robot_id,
+                                 pos + np.append(rng.normal(0, 20, 2), 0))
+
+
+def all_pairs_overlaps(gs):
+    overlaps = 0
+    positions = gs.get_all_robot_positions()
+    for i, (key, pos) in enumerate(positions):
+        for key2, pos2 in positions[i + 1:]:
+            if gs.robot_overlap(pos, pos2).any():
+                overlaps += 1
+    return overlaps
+
+
+def sweep_and_prune_overlaps(gs):
+    overlaps = 0
+    for key, key2 in gs.get_broadphase().candidate_pairs(gs.ROBOT_RADIUS * 2):
+        pos = gs.get_robot_position(*key)
+        pos2 = gs.get_robot_position(*key2)
+        if gs.robot_overlap(pos, pos2).any():
+            overlaps += 1
+    return overlaps
+
+
+def all_pairs_is_position_open(gs, pos):
+    "the old is_position_open, checking against every robot"
+    for key, robot_pos in gs.get_all_robot_positions():
+        if gs.robot_overlap(pos, robot_pos).any():
+            return False
+    return True
+
+
+def time_ticks(gs, rng, check):
+    total = 0
+    for _ in range(TICKS):
+        jitter(gs, rng)
+        start = time.perf_counter()
+        check(gs)
+        total += time.perf_counter() - start
+    return total / TICKS
+
+
+def time_queries(gs, query_positions, is_open):
+    start = time.perf_counter()
+    for pos in query_positions:
+        is_open(pos)
+    return (time.perf_counter() - start) / len(query_positions)
+
+
+def main():
+    print("bodies | pairs all / sap (ms) | is_position_open all / sap (us)")
+    for num_bodies in BODY_COUNTS:
+        rng = np.random.default_rng(num_bodies)
+        gs = make_gamestate(num_bodies, rng)
+        gs.use_broadphase(SweepAndPrune())
+        assert all_pairs_overlaps(gs) == sweep_and_prune_overlaps(gs)
+        pairs_all = time_ticks(gs, rng, all_pairs_overlaps)
+        pairs_sap = time_ticks(gs, rng, sweep_and_prune_overlaps)
+        query_positions = [np.array([
+            rng.uniform(gs.FIELD_MIN_X, gs.FIELD_MAX_X),
+            rng.uniform(gs.FIELD_MIN_Y, gs.FIELD_MAX_Y), 0])
+            for _ in range(QUERIES)]
+        open_all = time_queries(
+            gs, query_positions,
+            lambda pos: all_pairs_is_position_open(gs, pos))
+        open_sap = time_queries(
+            gs, query_positions,
+            lambda pos: gs.is_position_open(pos, None, None))
+        print("{:6d} | {:8.3f} / {:8.3f} | {:10.1f} / {:8.1f}".format(
+            num_bodies, pairs_all * 1e3, pairs_sap * 1e3,
+            open_all * 1e6, open_sap * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Compares full team command frames with delta frames (comms.frame_codec)
+at the xbee's 9600 baud. Each tick every robot's command changes with some
+probability; for each probability: mean bytes per frame, and how many
+frames a second fit on the link (FakeXBeeDevice.airtime, which counts the
+xbee api frame around the data).
+    To run (from the root directory): python3 -m benchmarks.frame_benchmark
+"""
+import random
+# pylint: disable=import-error
+from comms.robot_commands import RobotCommands
+from comms.frame_codec import DeltaFrameEncoder
+from comms.fake_radio import FakeXBeeDevice
+
+ROBOT_IDS = range(1, 7)
+CHANGE_PROBABILITIES = [0, .1, .25, .5, 1]
+NUM_TICKS = 10000
+
+
+def random_robot_commands(rng):
+    robot_commands = RobotCommands()
+    robot_commands.set_speeds(rng.uniform(-999, 999),
+                              rng.uniform(-999, 999),
+                              rng.uniform(-6.28, 6.28))
+    robot_commands.is_dribbling = rng.random() < .5
+    return robot_commands
+
+
+def frame_sizes(change_probability):
+    """mean bytes of a full frame and of a delta frame"""
+    rng = random.Random(0)
+    encoder = DeltaFrameEncoder()
+    team = {robot_id: random_robot_commands(rng) for robot_id in ROBOT_IDS}
+    full_bytes = delta_bytes = 0
+    for _ in range(NUM_TICKS):
+        for robot_id in ROBOT_IDS:
+            if rng.random() < change_probability:
+                team[robot_id] = random_robot_commands(rng)
+        full_bytes += len(RobotCommands.get_serialized_team_command(team))
+        delta_bytes += len(encoder.encode(
+            {robot_id: robot_commands.get_serialized_command(robot_id)
+             for robot_id, robot_commands in team.items()}))
+    return full_bytes / NUM_TICKS, delta_bytes / NUM_TICKS
+
+
+def main():
+    device = FakeXBeeDevice()
+    print("{} robots at {} baud".format(len(ROBOT_IDS), device.baud_rate))
+    print("change p | full (bytes, frames/s) | delta (bytes, frames/s)")
+    for change_probability in CHANGE_PROBABILITIES:
+        full_size, delta_size = frame_sizes(change_probability)
+        full_rate = 1 / device.airtime(bytes(round(full_size)))
+        delta_rate = 1 / device.airtime(bytes(round(delta_size)))
+        print("{:8.2f} | {:5.1f} / {:6.1f}         | "
+              "{:5.1f} / {:6.1f}".format(change_probability, full_size,
+                                         full_rate, delta_size, delta_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compares broadcast with per-robot unicast radio sends, on a fake xbee
+(comms.fake_radio) that models frame airtime and the xbee's small buffer.
+For each team size: how many team commands per second each mode gets out
+when sending flat out, and the command rate + age Comms gets through the
+adaptive RadioSender when strategy produces 100 commands a second.
+    To run (from the root directory): python3 -m benchmarks.radio_benchmark
+"""
+import time
+# pylint: disable=import-error
+from comms.radio import Radio, SEND_BROADCAST, SEND_UNICAST
+from comms.radio_sender import RadioSender
+from comms.fake_radio import FakeXBeeDevice
+from comms.robot_commands import RobotCommands
+
+ROBOT_COUNTS = [1, 3, 6]
+# seconds of flat out sending / of sending through RadioSender
+RAW_TIME = 1
+SENDER_TIME = 2
+COMMANDS_PER_SECOND = 100
+
+
+def team_message(num_robots):
+    return RobotCommands.get_serialized_team_command(
+        {robot_id: RobotCommands() for robot_id in range(num_robots)})
+
+
+def make_radio(num_robots, send_mode):
+    return Radio(send_mode=send_mode,
+                 device=FakeXBeeDevice(robot_ids=range(num_robots)),
+                 discovery_time=0)
+
+
+def raw_rate(num_robots, send_mode):
+    """team commands sent per second, host seconds per team command"""
+    radio = make_radio(num_robots, send_mode)
+    message = team_message(num_robots)
+    num_sends = 0
+    start = time.time()
+    while time.time() - start < RAW_TIME:
+        radio.send(message)
+        num_sends += 1
+    elapsed = time.time() - start
+    return num_sends / elapsed, elapsed / num_sends
+
+
+def sender_rate(num_robots, send_mode):
+    """team commands sent per second through RadioSender, mean age"""
+    radio = make_radio(num_robots, send_mode)
+    sender = RadioSender(radio)
+    message = team_message(num_robots)
+    sender.start()
+    start = time.time()
+    while time.time() - start < SENDER_TIME:
+        sender.submit(message)
+        time.sleep(1 / COMMANDS_PER_SECOND)
+    sender.stop()
+    stats = sender.get_stats()
+    return (stats['sent'] / SENDER_TIME, stats['command_age']['mean'],
+            stats['rate_control']['interval'])
+
+
+def main():
+    print("robots | mode      | flat out (cmds/s, ms/cmd) | "
+          "RadioSender (cmds/s, age ms, interval ms)")
+    for num_robots in ROBOT_COUNTS:
+        for send_mode in [SEND_UNICAST, SEND_BROADCAST]:
+            rate, send_time = raw_rate(num_robots, send_mode)
+            sender_cmds, age, interval = sender_rate(num_robots, send_mode)
+            print("{:6d} | {:9s} | {:8.1f} / {:8.2f}       | "
+                  "{:6.1f} / {:6.1f} / {:6.1f}".format(
+                      num_robots, send_mode, rate, send_time * 1e3,
+                      sender_cmds, age * 1e3, interval * 1e3))
+
+
+if __name__ == '__main__':
+    main()
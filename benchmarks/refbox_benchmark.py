@@ -0,0 +1,95 @@
+"""Load test of the refbox path: a local RefboxEmitter multicasts commands on
+loopback at growing message rates while the receiving side runs like the
+providers do (RefboxClient -> gamestate referee events -> Coach dispatch).
+Reports how old messages are when handled, how many were skipped by
+draining to the newest, and how long a new command takes to be dispatched.
+    To run (from the root directory): python3 -m benchmarks.refbox_benchmark
+"""
+import time
+import socket
+import logging
+import threading
+import numpy as np
+# pylint: disable=import-error
+from refbox import SSL_Referee
+from refbox.refbox import RefboxClient
+from refbox.emitter import RefboxEmitter, TimelineStep
+from strategy import Strategy
+
+GROUP = '224.5.23.1'
+PORT = 10913
+# send + receive over loopback only
+INTERFACE = '127.0.0.1'
+RATES = [10, 100, 1000, 10000]
+# seconds each command holds, and that each rate is run for
+COMMAND_DURATION = .1
+RUN_TIME = 2
+
+
+def timeline():
+    steps = []
+    for _ in range(int(RUN_TIME / COMMAND_DURATION / 2)):
+        steps.append(TimelineStep(COMMAND_DURATION, SSL_Referee.STOP, []))
+        steps.append(
+            TimelineStep(COMMAND_DURATION, SSL_Referee.FORCE_START, []))
+    return steps
+
+
+def run(rate):
+    client = RefboxClient(GROUP, PORT, interface=INTERFACE)
+    client.connect()
+    strategy = Strategy('blue', 'full_game')
+    strategy.logger = logging.getLogger('benchmark')
+    strategy.logger.setLevel(logging.WARNING)
+    strategy.full_game()
+    coach = strategy._coach
+    dispatch_latencies = []
+
+    def timed(handler):
+        def dispatch():
+            command_time = \
+                strategy.gs.get_latest_refbox_message().command_timestamp
+            dispatch_latencies.append(time.time() - command_time / 1e6)
+            handler()
+        return dispatch
+    coach._command_dict = {command: timed(handler)
+                           for command, handler in coach._command_dict.items()}
+
+    emitter = RefboxEmitter(GROUP, PORT, rate, interface=INTERFACE)
+    emitter_thread = threading.Thread(
+        target=emitter.play, args=(timeline(),))
+    emitter_thread.start()
+    message_ages = []
+    while emitter_thread.is_alive():
+        try:
+            message = client.receive()
+        except socket.timeout:
+            continue
+        message_ages.append(time.time() - message.packet_timestamp / 1e6)
+        strategy.gs.update_latest_refbox_message(message.SerializeToString())
+        strategy.full_game()
+    emitter_thread.join()
+    emitter.close()
+    stats = client.receiver.get_stats()
+    client.disconnect()
+    return emitter.num_sent, stats, message_ages, dispatch_latencies
+
+
+def main():
+    print("rate (/s) | sent | handled | skipped | message age p50 / p99 (ms)"
+          " | dispatch latency p50 / p99 (ms) | commands")
+    for rate in RATES:
+        sent, stats, ages, latencies = run(rate)
+        ages = np.array(ages) * 1e3
+        latencies = np.array(latencies) * 1e3
+        print("{:9d} | {:5d} | {:7d} | {:7d} | {:8.3f} / {:8.3f} | "
+              "{:8.3f} / {:8.3f} | {}".format(
+                  rate, sent, stats['received'] - stats['dropped'],
+                  stats['dropped'],
+                  np.percentile(ages, 50), np.percentile(ages, 99),
+                  np.percentile(latencies, 50), np.percentile(latencies, 99),
+                  len(latencies)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Named simulator setups shared by the benchmarks.
+Each scenario is one of the Simulator's initial setups, loaded into a
+gamestate that a Strategy can be pointed at directly (no coordinator).
+"""
+import logging
+# pylint: disable=import-error
+from simulator import Simulator
+from strategy import Strategy
+
+# the original pre_run setups, followed by the stress cases
+SCENARIOS = [
+    'full_teams',
+    'moving_ball',
+    'entry_video',
+    'clear_field_test',
+    'clear_field_kickoff_test',
+    'surrounded_by_opponents_test',
+    'dense_traffic',
+    'penalty_box_crowd',
+    'fast_ball',
+]
+
+logger = logging.getLogger('benchmark')
+logger.setLevel(logging.WARNING)
+
+
+def load_scenario(name, team='blue', strategy_name='attacker_test', seed=0):
+    """returns (simulator, strategy) sharing the scenario's gamestate"""
+    assert name in SCENARIOS, "unknown scenario: {}".format(name)
+    simulator = Simulator(name, seed)
+    simulator.logger = logger
+    simulator.pre_run()
+    strategy = Strategy(team, strategy_name, seed)
+    strategy.logger = logger
+    strategy.gs = simulator.gs
+    strategy.pre_run()
+    return simulator, strategy
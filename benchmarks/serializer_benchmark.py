@@ -0,0 +1,85 @@
+"""Times building team command messages one robot at a time (the way
+get_serialized_team_command used to, by bytes concatenation) against
+comms.robot_commands.TeamCommandSerializer, from RobotCommands objects and
+straight from arrays, plus decoding a log of messages one command at a time
+against the vectorized deserialize.
+    To run (from the root directory):
+        python3 -m benchmarks.serializer_benchmark
+"""
+import time
+import random
+import numpy as np
+# pylint: disable=import-error
+from comms.robot_commands import (RobotCommands, TeamCommandSerializer,
+                                  START_KEY, END_KEY, EMPTY_COMMAND,
+                                  SINGLE_ROBOT_COMMAND_LENGTH)
+
+TEAM_SIZES = [6, 11]
+NUM_MESSAGES = 10000
+
+
+def random_team(rng, team_size):
+    team = dict()
+    for robot_id in range(team_size):
+        robot_commands = RobotCommands()
+        robot_commands.set_speeds(rng.uniform(-999, 999),
+                                  rng.uniform(-999, 999),
+                                  rng.uniform(-6.28, 6.28))
+        robot_commands.is_dribbling = rng.random() < .5
+        team[robot_id] = robot_commands
+    return team
+
+
+def concatenated_team_command(team_commands, team_size):
+    message = b""
+    for i in range(team_size - len(team_commands)):
+        message += EMPTY_COMMAND
+    for robot_id, commands in team_commands.items():
+        message += commands.get_serialized_command(robot_id)
+    return START_KEY + message + END_KEY
+
+
+def time_per_call(function, *args):
+    """microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(NUM_MESSAGES):
+        function(*args)
+    return (time.perf_counter() - start) / NUM_MESSAGES * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    print("robots | concat | serialize | arrays | "
+          "decode 1 by 1 | deserialize (us per message)")
+    for team_size in TEAM_SIZES:
+        team = random_team(rng, team_size)
+        serializer = TeamCommandSerializer(team_size)
+        speeds = np.array([commands.get_speeds()
+                           for commands in team.values()])
+        dribbling = np.array([commands.is_dribbling
+                              for commands in team.values()])
+        concat = time_per_call(concatenated_team_command, team, team_size)
+        serialize = time_per_call(serializer.serialize, team)
+        arrays = time_per_call(
+            serializer.serialize_arrays, list(team), speeds[:, 0],
+            speeds[:, 1], speeds[:, 2], dribbling)
+        log = serializer.serialize(team) * NUM_MESSAGES
+
+        start = time.perf_counter()
+        decoder = RobotCommands()
+        for i in range(0, len(log), serializer.message_length):
+            message = log[i:i + serializer.message_length]
+            for j in range(1, len(message) - 1,
+                           SINGLE_ROBOT_COMMAND_LENGTH):
+                decoder.deserialize_command(
+                    message[j:j + SINGLE_ROBOT_COMMAND_LENGTH])
+        one_by_one = (time.perf_counter() - start) / NUM_MESSAGES * 1e6
+        start = time.perf_counter()
+        serializer.deserialize(log)
+        vectorized = (time.perf_counter() - start) / NUM_MESSAGES * 1e6
+        print("{:6d} | {:6.1f} | {:9.1f} | {:6.1f} | {:13.1f} | {:.2f}".format(
+            team_size, concat, serialize, arrays, one_by_one, vectorized))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Times the strategy hot paths on every benchmark scenario.
+Results are written as JSON (to logs/, outside the source tree) and compared
+against a saved baseline, and any case whose median time grew by more than
+the tolerance is flagged.
+    To run (from the root directory):
+        python3 -m benchmarks.strategy_benchmark
+    To save the current results as the new baseline:
+        python3 -m benchmarks.strategy_benchmark --save_baseline
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+
+try:
+    from scenarios import SCENARIOS, load_scenario
+except (SystemError, ImportError):
+    from .scenarios import SCENARIOS, load_scenario
+
+DEFAULT_OUTPUT = 'logs/strategy_benchmark.json'
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+
+
+def robot_pos(strategy, robot_id):
+    return strategy.gs.get_robot_position(strategy._team, robot_id)
+
+
+def far_goal(strategy, robot_id):
+    "the mirrored position across the center, so paths cross traffic"
+    x, y, _ = robot_pos(strategy, robot_id)
+    return np.array([-x, -y, 0.])
+
+
+def attack_goal_center(strategy):
+    goal = strategy.gs.get_attack_goal(strategy._team)
+    return (goal[0] + goal[1]) / 2
+
+
+# case name : function(strategy, robot_id)
+CASES = {
+    'RRT_path_find': lambda s, r: s.RRT_path_find(
+        robot_pos(s, r), far_goal(s, r), r),
+    'greedy_path_find': lambda s, r: s.greedy_path_find(
+        robot_pos(s, r), far_goal(s, r), r),
+    'find_legal_pos': lambda s, r: s.find_legal_pos(
+        r, s.gs.get_ball_position()),
+    'attacker_get_open': lambda s, r: s.attacker_get_open(r),
+    'intercept_range': lambda s, r: s.intercept_range(r),
+    'is_straight_path_open': lambda s, r: s.is_straight_path_open(
+        robot_pos(s, r)[:2], attack_goal_center(s)),
+    'Strategy.run': lambda s, r: s.run(),
+}
+# attacker_test mode plays an on-ball and an off-ball attacker
+CASE_MIN_ROBOTS = {'Strategy.run': 2}
+
+
+def time_case(scenario, case, repeat, seed):
+    """returns timing stats in ms, or the error if the case can't run"""
+    _, strategy = load_scenario(scenario, seed=seed)
+    robot_ids = strategy.gs.get_robot_ids(strategy._team)
+    if len(robot_ids) < CASE_MIN_ROBOTS.get(case, 1):
+        return {'skipped': 'not enough robots on team {}'.format(
+            strategy._team)}
+    times = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            CASES[case](strategy, robot_ids[0])
+            times.append(time.perf_counter() - start)
+    except Exception as e:
+        return {'error': repr(e)}
+    return {
+        'median_ms': float(np.median(times)) * 1e3,
+        'min_ms': float(np.min(times)) * 1e3,
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(scenarios, cases, repeat, seed):
+    results = {}
+    for scenario in scenarios:
+        results[scenario] = {}
+        for case in cases:
+            results[scenario][case] = time_case(scenario, case, repeat, seed)
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.node(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def find_regressions(report, baseline, tolerance):
+    """returns a list of (scenario, case, baseline_ms, current_ms)"""
+    regressions = []
+    for scenario, cases in report['results'].items():
+        for case, result in cases.items():
+            base = baseline['results'].get(scenario, {}).get(case, {})
+            if 'median_ms' not in result or 'median_ms' not in base:
+                continue
+            if result['median_ms'] > base['median_ms'] * (1 + tolerance):
+                regressions.append((scenario, case,
+                                    base['median_ms'], result['median_ms']))
+    return regressions
+
+
+def print_report(report):
+    for scenario, cases in report['results'].items():
+        print(scenario)
+        for case, result in cases.items():
+            if 'skipped' in result:
+                print('    {:24s} skipped ({})'.format(
+                    case, result['skipped']))
+            elif 'error' in result:
+                print('    {:24s} ERROR {}'.format(case, result['error']))
+            else:
+                print('    {:24s} {:10.3f} ms (min {:.3f})'.format(
+                    case, result['median_ms'], result['min_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks strategy hot paths on simulator scenarios')
+    parser.add_argument('-sc', '--scenarios', nargs='+', default=SCENARIOS,
+                        choices=SCENARIOS, help='Scenarios to run.')
+    parser.add_argument('-c', '--cases', nargs='+', default=list(CASES),
+                        choices=list(CASES), help='Functions to time.')
+    parser.add_argument('-r', '--repeat', type=int, default=10,
+                        help='Number of timed calls per case.')
+    parser.add_argument('-sd', '--seed', type=int, default=0,
+                        help='Seed for the strategy + simulator generators.')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help='Where to write the JSON results.')
+    parser.add_argument('-b', '--baseline', default=DEFAULT_BASELINE,
+                        help='Baseline JSON to compare against.')
+    parser.add_argument('-t', '--tolerance', type=float, default=.25,
+                        help='Allowed slowdown before flagging (.25 = 25%%).')
+    parser.add_argument('--save_baseline', action='store_true',
+                        help='Overwrite the baseline with these results.')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.scenarios, args.cases, args.repeat,
+                            args.seed)
+    print_report(report)
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Results written to {}'.format(args.output))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print('Saved as baseline: {}'.format(args.baseline))
+        return 0
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print('No baseline at {} (use --save_baseline)'.format(args.baseline))
+        return 0
+    regressions = find_regressions(report, baseline, args.tolerance)
+    for scenario, case, base_ms, current_ms in regressions:
+        print('REGRESSION {} / {}: {:.3f} ms -> {:.3f} ms'.format(
+            scenario, case, base_ms, current_ms))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""Times TelemetryWriter.record on the simulator's full_teams setup, over
+enough ticks to write several chunks to disk - recording runs on the
+coordinator loop, so it should take well under a millisecond per tick.
+    To run (from the root directory):
+        python3 -m benchmarks.telemetry_benchmark
+"""
+import time
+import tempfile
+# pylint: disable=import-error
+from simulator import Simulator
+from recording.telemetry import TelemetryWriter, CHUNK_SIZE
+
+TICKS = 5 * CHUNK_SIZE
+
+
+def main():
+    simulator = Simulator('full_teams')
+    simulator.pre_run()
+    with tempfile.TemporaryDirectory() as directory:
+        writer = TelemetryWriter(directory)
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            writer.record(simulator.gs)
+        per_tick = (time.perf_counter() - start) / TICKS
+        writer.close()
+    print("{} ticks, {:.1f} us per tick".format(TICKS, per_tick * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,37 +3,95 @@ from coordinator import Provider
 
 try:
     from radio import Radio
-    from robot_commands import RobotCommands
+    from radio_sender import RadioSender
+    from radio_receiver import RadioReceiver
+    from frame_codec import DeltaFrameEncoder
+    from robot_commands import TeamCommandSerializer, TEAM_SIZE
 except (SystemError, ImportError):
     from .radio import Radio
-    from .robot_commands import RobotCommands
+    from .radio_sender import RadioSender
+    from .radio_receiver import RadioReceiver
+    from .frame_codec import DeltaFrameEncoder
+    from .robot_commands import TeamCommandSerializer, TEAM_SIZE
+
+
+# time from reading the gamestate until a robot acts on the command we send,
+# until the latency from vision capture to the radio has been measured
+# (positions are predicted this far ahead of now)
+COMMAND_LATENCY = .03
+# seconds between logging the radio link stats
+LINK_STATS_LOG_INTERVAL = 10
 
 
 class Comms(Provider):
     """Comms class spins a thread to repeated send the commands stored in
-       gamestate to the robots via radio"""
-    def __init__(self, team, is_second_comms=False):
+       gamestate to the robots via radio, and another to read the robots'
+       feedback into their RobotStatus"""
+    def __init__(self, team, is_second_comms=False, radio_factory=None,
+                 use_delta_frames=False, team_size=TEAM_SIZE):
+        """
+        radio_factory: callable(is_second_comms) making the radio backend,
+            anything with Radio's send/read/close methods (e.g.
+            fake_radio.FakeRadio to run without an xbee) - defaults to Radio
+        use_delta_frames: send compact frames with only the commands that
+            changed (see frame_codec) instead of full team frames - the robot
+            firmware has to understand them
+        team_size: robots in a full team frame (more for larger divisions),
+            extra robots are left out of the frame instead of stopping comms
+        """
         super().__init__()
         assert(team in ['blue', 'yellow'])
         self._team = team
 
         self._is_second_comms = is_second_comms
         self._radio = None
+        self._radio_factory = radio_factory
+        self._use_delta_frames = use_delta_frames
+        # reuses one message buffer for every full team frame
+        self._serializer = TeamCommandSerializer(team_size)
+        # robots left out of the last full frame, to log when it changes
+        self._left_out_ids = []
+        # sends the newest team command on its own thread (see radio_sender)
+        self._sender = None
+        # reads robot feedback on its own thread (see radio_receiver)
+        self._receiver = None
+        self._last_stats_log_time = None
 
         self._owned_fields = [
             '_blue_robot_status',
             '_yellow_robot_status',
+            # (only this team's, the other team may have comms too)
+            '_{}_command_latency'.format(team),
         ]
 
-        # self._receive_loop_sleep = Radio.MESSAGE_DELAY
-        # self._messages_received = []
-        # self._last_receive_loop_time = None
-
     def pre_run(self):
         if self._radio is None:
-            self._radio = Radio(self._is_second_comms)
+            if self._radio_factory is None:
+                self._radio = Radio(self._is_second_comms)
+            else:
+                self._radio = self._radio_factory(self._is_second_comms)
+        encode = None
+        if self._use_delta_frames:
+            encode = DeltaFrameEncoder().encode
+        self._sender = RadioSender(self._radio, encode=encode)
+        self._sender.start()
+        self._receiver = RadioReceiver(self._radio)
+        self._receiver.start()
+        self._last_stats_log_time = time.time()
 
     def run(self):
+        # frames are stamped with the capture time of the vision data they
+        # come from, so the sender measures the latency from the cameras to
+        # the radio - strategy reads it from the gamestate too
+        capture_time = self.gs.get_latest_capture_time(self._team)
+        latency = self._sender.get_latency()
+        if latency is not None:
+            self.gs.set_command_latency(self._team, latency)
+        if latency is None or capture_time is None:
+            prediction_time = COMMAND_LATENCY
+        else:
+            # (not before now - commands can't act in the past)
+            prediction_time = max(capture_time + latency - time.time(), 0)
         team_commands = self.gs.get_team_commands(self._team)
         for robot_id, commands in team_commands.items():
             # self.logger.info(commands)
@@ -41,47 +99,83 @@ class Comms(Provider):
                 self.logger.debug(f"Robot {robot_id} is lost")
                 commands.set_speeds(0, 0, 0)
             else:
-                # recalculate the speed the robot should be commanded at
-                pos = self.gs.get_robot_position(self._team, robot_id)
+                # recalculate the speed the robot should be commanded at,
+                # from where it will be once the command reaches it
+                pos = self.gs.predict_robot_pos(
+                    self._team, robot_id, prediction_time)
                 commands.derive_speeds(pos)
         # send serialized message for whole team
-        message = RobotCommands.get_serialized_team_command(team_commands)
-        self._radio.send(message)
+        if self._use_delta_frames:
+            # (the sender encodes them against the last frame it sent)
+            message = {robot_id: commands.get_serialized_command(robot_id)
+                       for robot_id, commands in team_commands.items()}
+        else:
+            message = self._serializer.serialize(
+                self._fit_team_frame(team_commands))
+        self._sender.submit(message, capture_time)
+        for robot_id, (timestamp, feedback) in \
+                self._receiver.get_feedback().items():
+            robot_status = self.gs.get_robot_status(self._team, robot_id)
+            if robot_status.feedback_time != timestamp:
+                robot_status.update_feedback(feedback, timestamp)
         for robot_id, commands in team_commands.items():
             robot_status = self.gs.get_robot_status(self._team, robot_id)
+            if robot_status.has_fresh_feedback():
+                # the robot tells us its charge, no need to guess
+                continue
             # simulate charge of capacitors according to commands
             if commands.is_charging:
                 robot_status.simulate_charge(self.delta_time)
             # TODO: UNTESTED
             if commands.is_kicking:
                 robot_status.charge_level = 0
-        # sleep to avoid spamming the xbee radio
-        time.sleep(Radio.MESSAGE_DELAY)
+        if time.time() - self._last_stats_log_time > LINK_STATS_LOG_INTERVAL:
+            self._last_stats_log_time = time.time()
+            self.logger.info('radio sends: {}'.format(self.get_send_stats()))
+            self.logger.info('radio feedback: {}'.format(
+                self.get_receive_stats()))
+
+    def _fit_team_frame(self, team_commands):
+        """
+        the commands that fit in a full team frame - if there are too many
+        robots (e.g. ids misread by vision), robots that are being seen win,
+        then the lowest ids
+        """
+        team_size = self._serializer.team_size
+        if len(team_commands) <= team_size:
+            left_out_ids = []
+        else:
+            robot_ids = sorted(team_commands, key=lambda robot_id: (
+                self.gs.is_robot_lost(self._team, robot_id), robot_id))
+            team_commands = {robot_id: team_commands[robot_id]
+                             for robot_id in sorted(robot_ids[:team_size])}
+            left_out_ids = sorted(robot_ids[team_size:])
+        if left_out_ids != self._left_out_ids:
+            if left_out_ids:
+                self.logger.warning(
+                    'more than {} robots, not sending commands to {}'.format(
+                        team_size, left_out_ids))
+            self._left_out_ids = left_out_ids
+        return team_commands
+
+    def get_send_stats(self):
+        """
+        frames sent/skipped, radio send time and command age (seconds), and
+        the send interval + per robot link latency/errors from rate control
+        """
+        return self._sender.get_stats()
+
+    def get_receive_stats(self):
+        """feedback messages received/malformed and how they were batched"""
+        return self._receiver.get_stats()
 
     def post_run(self):
+        if self._sender is not None:
+            self._sender.stop()
+            self.logger.info('radio sends: {}'.format(self.get_send_stats()))
+        if self._receiver is not None:
+            self._receiver.stop()
+            self.logger.info('radio feedback: {}'.format(
+                self.get_receive_stats()))
         if self._radio is not None:
             self._radio.close()
-
-    # def start_receiving(self, loop_sleep):
-    #     self._receive_loop_sleep = loop_sleep
-    #     if self._radio is None:
-    #         self._radio = Radio(self._is_second_comms)
-    #     self._is_receiving = True
-    #     self._receiving_thread = threading.Thread(target=self.receiving_loop)
-    #     # set to daemon mode so it will be easily killed
-    #     self._receiving_thread.daemon = True
-    #     self._receiving_thread.start()
-
-    # def receiving_loop(self):
-    #     self.gs.wait_until_game_begins()
-    #     while self._is_receiving:
-    #         # TODO: save messages for log
-    #         print(self._radio.read())
-    #         # TODO: update relevant data into gamestate
-    #         if self._last_receive_loop_time is not None:
-    #             delta = time.time() - self._last_receive_loop_time
-    #             if delta > .3:
-    #                 print("Comms receiving loop large delay: " + str(delta))
-    #         self._last_receive_loop_time = time.time()
-    #         # yield to other threads
-    #         time.sleep(self._receive_loop_sleep)
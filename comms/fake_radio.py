@@ -0,0 +1,261 @@
+"""In-memory stand-in for digi's XBeeDevice, so Radio (and everything above
+it, up to Comms) can run without an xbee plugged in:
+
+    radio = FakeRadio(robot_ids=range(1, 7), loss=.05)
+    Comms('blue', radio_factory=FakeRadio)  # any callable making a radio
+
+The fake models what limits the real link: each frame occupies the radio
+for a while (the 9600 baud serial line to the xbee dominates), and only
+a few frames fit in the xbee's buffer - once it is full, sends block until
+a frame has gone out, like the real serial flow control. Each robot can
+miss frames at random, and may answer every frame it gets with a feedback
+packet, which Radio.read returns once it has arrived - SimulatedFeedback
+makes the packets a robot's firmware would (see robot_feedback):
+
+    FakeRadio(feedback=SimulatedFeedback())
+"""
+import time
+import random
+import threading
+from collections import deque
+from digi.xbee.devices import RemoteXBeeDevice
+from digi.xbee.models.address import XBee64BitAddress
+from digi.xbee.models.message import XBeeMessage
+from digi.xbee.models.protocol import XBeeProtocol
+from digi.xbee.exception import TransmitException
+
+try:
+    from radio import Radio, SEND_BROADCAST, CONFIRM_INTERVAL
+    from robot_commands import (START_KEY, SINGLE_ROBOT_COMMAND_LENGTH,
+                                CHARGE_BIT, KICK_BIT)
+    from robot_status import RobotStatus
+    from robot_feedback import RobotFeedback, encode_feedback
+    from frame_codec import DELTA_START_KEY, DeltaFrameDecoder
+except (SystemError, ImportError):
+    from .radio import Radio, SEND_BROADCAST, CONFIRM_INTERVAL
+    from .robot_commands import (START_KEY, SINGLE_ROBOT_COMMAND_LENGTH,
+                                 CHARGE_BIT, KICK_BIT)
+    from .robot_status import RobotStatus
+    from .robot_feedback import RobotFeedback, encode_feedback
+    from .frame_codec import DELTA_START_KEY, DeltaFrameDecoder
+
+BAUD_RATE = 9600
+# bytes the xbee api frame adds around the data (start, length, frame type,
+# id, 64 bit address, options, checksum)
+API_FRAME_OVERHEAD = 15
+# frames the xbee can hold before sends block
+BUFFER_FRAMES = 2
+# robots on the fake network, as in the simulator's full_teams setup
+ROBOT_IDS = range(1, 7)
+# frames kept in FakeXBeeDevice.sent
+SENT_HISTORY_LENGTH = 1000
+
+
+def robot_address(robot_id):
+    """64 bit address of a fake robot's xbee"""
+    return XBee64BitAddress.from_hex_string('0013A2000000{:04X}'.format(
+        robot_id))
+
+
+def find_robot_command(frame, robot_id):
+    """the 4 command bytes for robot_id in a team command frame, or None"""
+    start = len(START_KEY)
+    for i in range(start, len(frame) - SINGLE_ROBOT_COMMAND_LENGTH + 1,
+                   SINGLE_ROBOT_COMMAND_LENGTH):
+        command = frame[i:i + SINGLE_ROBOT_COMMAND_LENGTH]
+        if command[0] & 15 == robot_id:
+            return command
+    return None
+
+
+class SimulatedFeedback(object):
+    """
+    Feedback function for FakeXBeeDevice: each robot charges its kicker
+    while its commands say to charge, empties it when told to kick, and
+    reports that (plus its breakbeam + battery) for every command it gets.
+    """
+    def __init__(self, battery_voltage=16.0, has_ball=False):
+        self.battery_voltage = battery_voltage
+        self.has_ball = has_ball
+        # robot_id : (time of its last command, charge level)
+        self._charges = dict()
+
+    def __call__(self, robot_id, command):
+        now = time.time()
+        last_time, charge_level = self._charges.get(robot_id, (now, 0))
+        if command[0] & KICK_BIT:
+            charge_level = 0
+        elif command[0] & CHARGE_BIT:
+            charge_level = min(
+                charge_level + (now - last_time) * RobotStatus.CHARGE_RATE,
+                RobotStatus.MAX_CHARGE_LEVEL)
+        self._charges[robot_id] = (now, charge_level)
+        return encode_feedback(RobotFeedback(
+            robot_id, self.has_ball, charge_level, self.battery_voltage))
+
+
+class FakeXBeeNetwork(object):
+    def __init__(self, devices):
+        self._devices = devices
+
+    def start_discovery_process(self):
+        pass
+
+    def stop_discovery_process(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def get_devices(self):
+        return list(self._devices)
+
+
+class FakeXBeeDevice(object):
+    """
+    Implements the parts of XBeeDevice that Radio uses.
+    robot_ids: ids of the robots whose xbees discovery finds
+    baud_rate: speed of the (pretend) serial line, sets each frame's airtime
+    buffer_frames: frames that can be waiting before sends block
+    loss: chance that a robot misses any one frame
+    feedback: optional function(robot_id, command bytes) giving the payload
+        a robot sends back when it gets its command (None to not answer)
+    seed: seeds the random frame loss
+    """
+    def __init__(self, robot_ids=ROBOT_IDS, baud_rate=BAUD_RATE,
+                 buffer_frames=BUFFER_FRAMES, loss=0, feedback=None,
+                 seed=None):
+        self.baud_rate = baud_rate
+        self.buffer_frames = buffer_frames
+        self.loss = loss
+        self.feedback = feedback
+        self._rng = random.Random(seed)
+        # RemoteXBeeDevice copies the local device's connection, never used
+        # here (serial_port in digi-xbee 1.2.0, comm_iface in later versions)
+        self.serial_port = None
+        self.comm_iface = object()
+        self._is_open = False
+        self._busy_until = 0
+        self._remote_devices = {robot_id: RemoteXBeeDevice(
+            self, robot_address(robot_id)) for robot_id in robot_ids}
+        self._robot_ids = {str(robot_address(robot_id)): robot_id
+                           for robot_id in robot_ids}
+        # (time the frame finishes sending, address, data)
+        self.sent = deque([], SENT_HISTORY_LENGTH)
+        self.num_frames = 0
+        # robot id : (time it was received, latest command bytes it got)
+        self.robot_commands = dict()
+        # robot id : what the robot made of the delta frames it got
+        self._decoders = {robot_id: DeltaFrameDecoder()
+                          for robot_id in robot_ids}
+        self.num_delivered = 0
+        self.num_lost = 0
+        # (time it arrives, XBeeMessage) of feedback, in order of arrival
+        self._feedback = []
+        self._feedback_lock = threading.Lock()
+
+    def open(self):
+        self._is_open = True
+
+    def close(self):
+        self._is_open = False
+
+    def is_open(self):
+        return self._is_open
+
+    def get_protocol(self):
+        return XBeeProtocol.RAW_802_15_4
+
+    def get_network(self):
+        return FakeXBeeNetwork(list(self._remote_devices.values()))
+
+    def remove_robot(self, robot_id):
+        """robot_id's xbee goes away (e.g. its battery died) - it stops
+        getting frames, acknowledging them, or being found by discovery"""
+        address = str(robot_address(robot_id))
+        self._robot_ids.pop(address, None)
+        self._remote_devices.pop(robot_id, None)
+
+    def airtime(self, data):
+        """seconds a frame with data occupies the radio (10 bits a byte)"""
+        return (len(data) + API_FRAME_OVERHEAD) * 10 / self.baud_rate
+
+    def send_data_async(self, remote_xbee, data):
+        if not self._is_open:
+            raise ValueError('fake xbee is not open')
+        airtime = self.airtime(data)
+        now = time.time()
+        # frames still waiting to go out when this one is handed over
+        backlog = max(self._busy_until - now, 0)
+        wait = backlog - (self.buffer_frames - 1) * airtime
+        if wait > 0:
+            time.sleep(wait)
+        self._busy_until = max(self._busy_until, now) + airtime
+        address = str(remote_xbee.get_64bit_addr())
+        self.sent.append((self._busy_until, address, bytes(data)))
+        self.num_frames += 1
+        if remote_xbee.get_64bit_addr() == \
+                XBee64BitAddress.BROADCAST_ADDRESS:
+            robot_ids = list(self._remote_devices)
+        elif address in self._robot_ids:
+            robot_ids = [self._robot_ids[address]]
+        else:
+            # nobody there to hear it
+            robot_ids = []
+        for robot_id in robot_ids:
+            self._deliver(robot_id, bytes(data), self._busy_until)
+
+    def send_data(self, remote_xbee, data):
+        """send and wait for the frame to be acknowledged (unicast only)"""
+        self.send_data_async(remote_xbee, data)
+        wait = self._busy_until - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        if str(remote_xbee.get_64bit_addr()) not in self._robot_ids:
+            # (message only - the constructor's other arguments differ
+            # between digi-xbee versions)
+            raise TransmitException('no ack from {}'.format(
+                remote_xbee.get_64bit_addr()))
+
+    def _deliver(self, robot_id, frame, receive_time):
+        if self._rng.random() < self.loss:
+            self.num_lost += 1
+            return
+        if frame.startswith(DELTA_START_KEY):
+            command = self._decoders[robot_id].decode(frame).get(robot_id)
+        else:
+            command = find_robot_command(frame, robot_id)
+        if command is None:
+            return
+        self.num_delivered += 1
+        self.robot_commands[robot_id] = (receive_time, command)
+        if self.feedback is None:
+            return
+        payload = self.feedback(robot_id, command)
+        if payload is None:
+            return
+        # robots answer over the same air (not the serial line)
+        arrive_time = receive_time + self.airtime(payload)
+        message = XBeeMessage(bytearray(payload),
+                              self._remote_devices[robot_id], arrive_time)
+        with self._feedback_lock:
+            self._feedback.append((arrive_time, message))
+
+    def read_data(self, timeout=None):
+        """oldest feedback message that has arrived, or None"""
+        with self._feedback_lock:
+            if self._feedback and self._feedback[0][0] <= time.time():
+                return self._feedback.pop(0)[1]
+        return None
+
+
+class FakeRadio(Radio):
+    """Radio on a FakeXBeeDevice, takes the same options as the device"""
+    def __init__(self, is_second_radio=False, send_mode=SEND_BROADCAST,
+                 discovery_time=0, cache_path=None,
+                 confirm_interval=CONFIRM_INTERVAL, **device_options):
+        super().__init__(is_second_radio, send_mode,
+                         device=FakeXBeeDevice(**device_options),
+                         discovery_time=discovery_time,
+                         cache_path=cache_path,
+                         confirm_interval=confirm_interval)
@@ -0,0 +1,143 @@
+"""Compact team command frames that only carry the robots whose command
+changed since the previous frame. Most ticks only a few robots get a new
+command, so most frames are a fraction of the 26 byte full frame, and the
+9600 baud link can carry more of them.
+
+Frame layout (no byte in it is ever END_KEY):
+
+    DELTA_START_KEY
+    header      bit 6: keyframe, bits 0-5: sequence number (wraps at 64)
+    mask        3 bytes, 7 bits each: bit i set = robot id i's command follows
+    commands    4 bytes (as RobotCommands.get_serialized_command) for each
+                robot in the mask, by increasing robot id
+    END_KEY
+
+A keyframe carries every robot's command, and replaces whatever the robot
+knew before - one is sent every KEYFRAME_INTERVAL frames (and whenever a
+robot stops being commanded), so a robot that missed a frame catches up
+within that many frames.
+"""
+try:
+    from robot_commands import END_KEY, SINGLE_ROBOT_COMMAND_LENGTH
+except (SystemError, ImportError):
+    from .robot_commands import END_KEY, SINGLE_ROBOT_COMMAND_LENGTH
+
+# different from the full frame's START_KEY, so old firmware ignores these
+DELTA_START_KEY = bytes([101])
+KEYFRAME_BIT = 1 << 6
+SEQUENCE_MODULO = 64
+# robot ids 0 - 14 fit in the mask (15 is used for empty commands)
+MAX_ROBOT_ID = 14
+MASK_BITS_PER_BYTE = 7
+MASK_LENGTH = 3
+# frames between keyframes
+KEYFRAME_INTERVAL = 10
+# bytes of a frame that carries no commands
+DELTA_FRAME_OVERHEAD = len(DELTA_START_KEY) + 1 + MASK_LENGTH + len(END_KEY)
+
+
+def encode_mask(robot_ids):
+    mask = 0
+    for robot_id in robot_ids:
+        if not 0 <= robot_id <= MAX_ROBOT_ID:
+            raise ValueError("robot_id={} is too big".format(robot_id))
+        mask |= 1 << robot_id
+    return bytes([(mask >> (MASK_BITS_PER_BYTE * i)) & 0x7f
+                  for i in range(MASK_LENGTH)])
+
+
+def decode_mask(mask_bytes):
+    mask = 0
+    for i, byte in enumerate(mask_bytes):
+        mask |= (byte & 0x7f) << (MASK_BITS_PER_BYTE * i)
+    return [robot_id for robot_id in range(MAX_ROBOT_ID + 1)
+            if mask & 1 << robot_id]
+
+
+def encode_frame(commands, sequence, is_keyframe):
+    """frame carrying commands, a dict of robot_id : 4 command bytes"""
+    robot_ids = sorted(commands)
+    header = int(is_keyframe) * KEYFRAME_BIT | sequence % SEQUENCE_MODULO
+    body = bytes([header]) + encode_mask(robot_ids) + \
+        b''.join(commands[robot_id] for robot_id in robot_ids)
+    assert END_KEY not in body, "END_KEY appears in message body!!!"
+    return DELTA_START_KEY + body + END_KEY
+
+
+def decode_frame(frame):
+    """
+    (sequence, is_keyframe, dict of robot_id : 4 command bytes) of a frame,
+    raises ValueError if it isn't a well formed delta frame
+    """
+    frame = bytes(frame)
+    if len(frame) < DELTA_FRAME_OVERHEAD or \
+            frame[:len(DELTA_START_KEY)] != DELTA_START_KEY or \
+            frame[-len(END_KEY):] != END_KEY:
+        raise ValueError("not a delta frame")
+    header = frame[len(DELTA_START_KEY)]
+    mask_start = len(DELTA_START_KEY) + 1
+    robot_ids = decode_mask(frame[mask_start:mask_start + MASK_LENGTH])
+    commands_start = mask_start + MASK_LENGTH
+    if len(frame) != DELTA_FRAME_OVERHEAD + \
+            len(robot_ids) * SINGLE_ROBOT_COMMAND_LENGTH:
+        raise ValueError("delta frame length doesn't match its mask")
+    commands = dict()
+    for i, robot_id in enumerate(robot_ids):
+        start = commands_start + i * SINGLE_ROBOT_COMMAND_LENGTH
+        commands[robot_id] = frame[start:start + SINGLE_ROBOT_COMMAND_LENGTH]
+    return header % SEQUENCE_MODULO, bool(header & KEYFRAME_BIT), commands
+
+
+class DeltaFrameEncoder(object):
+    """Turns the latest commands into delta frames, remembering what the
+    previous frame left the robots with"""
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self._sequence = 0
+        self._frames_since_keyframe = None
+        # robot_id : command bytes as of the last frame
+        self._sent_commands = dict()
+
+    def encode(self, commands):
+        """
+        next frame for commands, a dict of robot_id : 4 command bytes (see
+        RobotCommands.get_serialized_command)
+        """
+        is_keyframe = self._frames_since_keyframe is None or \
+            self._frames_since_keyframe + 1 >= self.keyframe_interval or \
+            any(robot_id not in commands for robot_id in self._sent_commands)
+        if is_keyframe:
+            changed = commands
+            self._frames_since_keyframe = 0
+        else:
+            changed = {robot_id: command
+                       for robot_id, command in commands.items()
+                       if self._sent_commands.get(robot_id) != command}
+            self._frames_since_keyframe += 1
+        frame = encode_frame(changed, self._sequence, is_keyframe)
+        self._sequence = (self._sequence + 1) % SEQUENCE_MODULO
+        self._sent_commands = dict(commands)
+        return frame
+
+
+class DeltaFrameDecoder(object):
+    """Rebuilds the commands from delta frames, as a robot would"""
+    def __init__(self):
+        # robot_id : latest command bytes
+        self.commands = dict()
+        self._last_sequence = None
+        # frames that never arrived, going by the sequence numbers
+        self.num_missed = 0
+
+    def decode(self, frame):
+        """apply a frame, returns the commands of every robot"""
+        sequence, is_keyframe, commands = decode_frame(frame)
+        if self._last_sequence is not None:
+            self.num_missed += \
+                (sequence - self._last_sequence - 1) % SEQUENCE_MODULO
+        self._last_sequence = sequence
+        if is_keyframe:
+            self.commands = commands
+        else:
+            self.commands.update(commands)
+        return self.commands
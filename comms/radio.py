@@ -22,64 +22,247 @@ Troubleshooting:
     you can do this by adding user into dialout group. Google this.
 
 """
-from digi.xbee.devices import XBeeDevice
-from digi.xbee.exception import XBeeException
+from digi.xbee.devices import XBeeDevice, RemoteXBeeDevice
+from digi.xbee.models.address import XBee64BitAddress
+from digi.xbee.exception import XBeeException, TransmitException
+import os
+import json
 import time
+import threading
 
 RADIO_PORT_1 = "/dev/ttyUSB0"
 RADIO_PORT_2 = "TODO: doesn't exist yet"
 BAUD_RATE = 9600
+# seconds to wait for the xbees on the network to answer discovery
+DISCOVERY_TIME = 3
+# broadcast sends one frame that every robot hears (each robot picks out
+# its own command), unicast sends the same frame to each robot in turn
+SEND_BROADCAST = 'broadcast'
+SEND_UNICAST = 'unicast'
+# broadcasts failing this many times in a row switch us to unicast for good
+MAX_BROADCAST_FAILURES = 3
+# addresses of the xbees found by discovery are remembered here between runs
+# (one file per radio), so restarting doesn't have to wait for discovery
+DISCOVERY_CACHE_PATHS = ['logs/xbee_devices.json', 'logs/xbee_devices_2.json']
+# most messages read_all takes at once (the rest wait for the next call)
+MAX_READ_BATCH = 50
+# every this many sends, each robot gets an acknowledged frame - async sends
+# never hear back, so this is how robots that drop off mid-match are noticed
+CONFIRM_INTERVAL = 40
+
+
+def load_device_cache(path):
+    """64 bit addresses (hex strings) saved in a discovery cache, or []"""
+    try:
+        with open(path) as f:
+            return list(json.load(f))
+    except (OSError, ValueError):
+        return []
+
+
+def save_device_cache(path, addresses):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # write + rename, so a crash never leaves half a file
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(sorted(addresses), f)
+    os.replace(temp_path, path)
 
 
 class Radio(object):
     # current xbee only can send once every ~60ms, sending faster may block
+    # (fixed delay for simple loops - Comms adapts its rate to the link,
+    # see rate_control.py)
     MESSAGE_DELAY = .1
 
-    def __init__(self, is_second_radio=False):
-        # Find our XBee device connected to this computer
-        port = RADIO_PORT_2 if is_second_radio else RADIO_PORT_1
-        self.device = XBeeDevice(port, BAUD_RATE)
+    def __init__(self, is_second_radio=False, send_mode=SEND_BROADCAST,
+                 device=None, discovery_time=DISCOVERY_TIME, cache_path=None,
+                 confirm_interval=CONFIRM_INTERVAL):
+        """
+        Args:
+            is_second_radio (bool): use the second xbee port
+            send_mode (str): SEND_BROADCAST or SEND_UNICAST
+            device: object with XBeeDevice's interface to use instead of
+                opening the xbee, e.g. fake_radio.FakeXBeeDevice
+            discovery_time (float): seconds to wait for xbees to be found
+            cache_path (str): discovery cache file, defaults to the one in
+                DISCOVERY_CACHE_PATHS for the real xbee, and none otherwise
+            confirm_interval (int): sends between acknowledged frames to
+                each robot, to check they are all still there
+        """
+        if device is None:
+            # Find our XBee device connected to this computer
+            port = RADIO_PORT_2 if is_second_radio else RADIO_PORT_1
+            device = XBeeDevice(port, BAUD_RATE)
+            if cache_path is None:
+                cache_path = DISCOVERY_CACHE_PATHS[int(is_second_radio)]
+        self.device = device
+        self.send_mode = send_mode
+        self._num_broadcast_failures = 0
+        self._discovery_time = discovery_time
+        self._cache_path = cache_path
+        self._confirm_interval = confirm_interval
+        self._num_sends = 0
+        self._discovery_thread = None
+        # addresses of cached devices that haven't acknowledged a frame or
+        # answered discovery yet / that didn't acknowledge one
+        self._unconfirmed_devices = set()
+        self.missing_devices = set()
 
         # TODO: sometimes it errors about operating mode, try replugging xbee
         self.device.open()
 
+        # Start sending straight away to the devices found last time, the
+        # first frame to each is acknowledged to check it is still there
+        cached_addresses = []
+        if self._cache_path is not None:
+            cached_addresses = load_device_cache(self._cache_path)
+        if cached_addresses:
+            self.net_devs = [RemoteXBeeDevice(
+                self.device, XBee64BitAddress.from_hex_string(address))
+                for address in cached_addresses]
+            self._unconfirmed_devices = set(cached_addresses)
+            self.refresh_devices()
+        else:
+            self.net_devs = self._discover()
+        if not self.net_devs:
+            raise RuntimeError("Cound not find any XBEE devices on network")
+        self._broadcast_device = RemoteXBeeDevice(
+            self.device, XBee64BitAddress.BROADCAST_ADDRESS)
+
+    def _discover(self):
+        """
+        find the xbees on the network (takes discovery_time), updating the
+        devices we send to + the cache if any are found
+        """
         # Obtain the remote XBee devices from the XBee network.
         xbee_network = self.device.get_network()
+        # forget devices found before, so ones that went away are dropped
+        xbee_network.clear()
 
         # Try to find devices
         xbee_network.start_discovery_process()
-        time.sleep(3)  # wait a few seconds to find all of the xbees
+        time.sleep(self._discovery_time)  # wait to find all of the xbees
         xbee_network.stop_discovery_process()
-        self.net_devs = xbee_network.get_devices()
-        if not self.net_devs:
-            raise RuntimeError("Cound not find any XBEE devices on network")
+        devices = list(xbee_network.get_devices())
+        if devices:
+            addresses = {str(remote_device.get_64bit_addr())
+                         for remote_device in devices}
+            self.net_devs = devices
+            self.missing_devices -= addresses
+            self._unconfirmed_devices -= addresses
+            if self._cache_path is not None:
+                save_device_cache(self._cache_path, addresses)
+        return devices
 
-    def send(self, message):
+    def refresh_devices(self):
+        """run discovery in the background, unless it is already running"""
+        if self._discovery_thread is not None and \
+                self._discovery_thread.is_alive():
+            return
+        self._discovery_thread = threading.Thread(target=self._discover)
+        # set to daemon mode so it will be easily killed
+        self._discovery_thread.daemon = True
+        self._discovery_thread.start()
+
+    def _confirm_devices(self, message):
+        """send message to unconfirmed devices, waiting for acknowledgements
+        - devices that don't acknowledge are dropped until discovery finds
+        them again"""
+        results = []
         for remote_device in self.net_devs:
-            try:
-                start = time.time()
-                # asynchronous send is fast for first msg, but waits if more
-                # long messages (>30?) take longer because they must be split
-                try:
-                    self.device.send_data_async(remote_device, message)
-                except Exception as e:
-                    print('xbee error - something using same port? (xtcu):')
-                    print(e)
-                    # TODO: reconnect when error?
-                delta = time.time() - start
-                if delta > .003:
-                    print('xbee send is taking a long time, too long/many?')
-                    print("time taken: " + str(delta))
-                    print("message length: " + str(len(message)))
-            except XBeeException as xbee_exp:
-                print(str(xbee_exp))
+            address = str(remote_device.get_64bit_addr())
+            if address in self._unconfirmed_devices:
+                self._unconfirmed_devices.discard(address)
+                results.append(
+                    self._send_to(remote_device, message, wait_for_ack=True))
+        return results
+
+    def _lose_device(self, remote_device):
+        address = str(remote_device.get_64bit_addr())
+        print('xbee {} did not acknowledge, robot missing?'.format(address))
+        self.net_devs = [other for other in self.net_devs
+                         if str(other.get_64bit_addr()) != address]
+        self.missing_devices.add(address)
+        self.refresh_devices()
+
+    def send(self, message):
+        """
+        Send message to every robot - as one broadcast frame, falling back to
+        a frame per robot if broadcasting fails. Every confirm_interval sends
+        (and to devices from the discovery cache) it is also sent to each
+        robot acknowledged, dropping robots that don't answer. Returns (device address,
+        seconds the send took, whether it worked) for each frame sent, for
+        rate_control.
+        """
+        results = []
+        self._num_sends += 1
+        if self._num_sends % self._confirm_interval == 0:
+            self._unconfirmed_devices.update(
+                str(remote_device.get_64bit_addr())
+                for remote_device in self.net_devs)
+        if self._unconfirmed_devices:
+            results += self._confirm_devices(message)
+        if self.send_mode == SEND_UNICAST:
+            return results + self._send_unicast(message)
+        result = self._send_to(self._broadcast_device, message)
+        results.append(result)
+        if result[2]:
+            self._num_broadcast_failures = 0
+            return results
+        self._num_broadcast_failures += 1
+        if self._num_broadcast_failures >= MAX_BROADCAST_FAILURES:
+            print('xbee broadcast keeps failing, sending to each robot')
+            self.send_mode = SEND_UNICAST
+        return results + self._send_unicast(message)
+
+    def _send_unicast(self, message):
+        return [self._send_to(remote_device, message)
+                for remote_device in self.net_devs]
+
+    def _send_to(self, remote_device, message, wait_for_ack=False):
+        start = time.time()
+        is_ok = True
+        # asynchronous send is fast for first msg, but waits if more
+        # long messages (>30?) take longer because they must be split
+        try:
+            if wait_for_ack:
+                self.device.send_data(remote_device, message)
+            else:
+                self.device.send_data_async(remote_device, message)
+        except TransmitException:
+            self._lose_device(remote_device)
+            is_ok = False
+        except XBeeException as xbee_exp:
+            print(str(xbee_exp))
+            is_ok = False
+        except Exception as e:
+            print('xbee error - something using same port? (xtcu):')
+            print(e)
+            is_ok = False
+            # TODO: reconnect when error?
+        return (str(remote_device.get_64bit_addr()), time.time() - start,
+                is_ok)
 
     def read(self):
-        for remote_device in self.net_devs:
-            try:
-                return self.device.read_data()
-            except XBeeException as xbee_exp:
-                print(str(xbee_exp))
+        """oldest message received from any robot, or None"""
+        try:
+            return self.device.read_data()
+        except XBeeException as xbee_exp:
+            print(str(xbee_exp))
+        return None
+
+    def read_all(self, max_messages=MAX_READ_BATCH):
+        """every message received since the last read (oldest first)"""
+        messages = []
+        while len(messages) < max_messages:
+            message = self.read()
+            if message is None:
+                break
+            messages.append(message)
+        return messages
 
     def close(self):
         if self.device.is_open():
@@ -0,0 +1,90 @@
+"""Reads robot feedback from the radio on a thread of its own. Each pass
+takes every frame that has arrived since the last one (Radio.read_all),
+decodes it, and keeps the newest feedback of each robot with the time it
+arrived - Comms copies that into each RobotStatus on its next tick, so the
+comms provider never waits on the xbee to read.
+"""
+import time
+import threading
+
+try:
+    from robot_feedback import decode_feedback
+except (SystemError, ImportError):
+    from .robot_feedback import decode_feedback
+
+# how long the receiver thread sleeps when nothing has arrived
+POLL_INTERVAL = .005
+
+
+class RadioReceiver(object):
+    """
+    Owns the thread that calls radio.read_all. The radio only needs a
+    read_all() method returning the messages that arrived (objects with
+    data + timestamp, like digi's XBeeMessage), oldest first.
+    """
+    def __init__(self, radio, decode=decode_feedback,
+                 poll_interval=POLL_INTERVAL):
+        """
+        decode: function turning message data into feedback with a robot_id,
+            raising ValueError for anything else
+        """
+        self._radio = radio
+        self._decode = decode
+        self.poll_interval = poll_interval
+        self._is_receiving = False
+        self._thread = None
+        # robot_id : (time it arrived, latest feedback)
+        self._feedback = dict()
+        self._lock = threading.Lock()
+        self.num_received = 0
+        self.num_malformed = 0
+        self.num_batches = 0
+        self.max_batch = 0
+
+    def start(self):
+        self._is_receiving = True
+        self._thread = threading.Thread(target=self._receive_loop)
+        # set to daemon mode so it will be easily killed
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _receive_loop(self):
+        while self._is_receiving:
+            messages = self._radio.read_all()
+            if not messages:
+                time.sleep(self.poll_interval)
+                continue
+            latest = dict()
+            for message in messages:
+                try:
+                    feedback = self._decode(message.data)
+                except ValueError:
+                    self.num_malformed += 1
+                    continue
+                # (messages are oldest first, so newer ones win)
+                latest[feedback.robot_id] = (message.timestamp, feedback)
+            with self._lock:
+                self._feedback.update(latest)
+            self.num_received += len(messages)
+            self.num_batches += 1
+            self.max_batch = max(self.max_batch, len(messages))
+
+    def get_feedback(self):
+        """dict of robot_id : (time it arrived, newest feedback)"""
+        with self._lock:
+            return dict(self._feedback)
+
+    def stop(self):
+        """stop the thread after any read in progress"""
+        self._is_receiving = False
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def get_stats(self):
+        return {
+            'received': self.num_received,
+            'malformed': self.num_malformed,
+            'batches': self.num_batches,
+            'max_batch': self.max_batch,
+        }
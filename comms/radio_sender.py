@@ -0,0 +1,152 @@
+"""Sends radio frames on a thread of its own, so the comms provider never
+waits on the xbee. Comms drops the newest serialized team command into a
+single-slot mailbox; the sender thread transmits whatever is newest there
+at most once per send interval (tuned by rate_control), so frames that were
+superseded before the radio was free are skipped instead of queueing up.
+"""
+import time
+import threading
+from latest_value import LatestValue
+
+try:
+    from rate_control import SendRateController
+except (SystemError, ImportError):
+    from .rate_control import SendRateController
+
+# how long the sender thread waits for a new frame before checking whether
+# it should stop
+WAIT_TIMEOUT = .1
+# weight of the newest value in SendStats.smoothed (exponential average)
+SMOOTHING = .1
+
+
+class SendStats(object):
+    """count, mean, max, latest and recent (smoothed) average of a stream of
+    durations (seconds)"""
+    __slots__ = ['count', 'total', 'max', 'last', 'smoothed']
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.last = None
+        self.smoothed = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.last = value
+        if self.smoothed is None:
+            self.smoothed = value
+        else:
+            self.smoothed += SMOOTHING * (value - self.smoothed)
+
+    @property
+    def mean(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def as_dict(self):
+        return {'mean': self.mean, 'max': self.max, 'last': self.last,
+                'smoothed': self.smoothed}
+
+
+class RadioSender(object):
+    """
+    Owns the thread that calls radio.send. The radio only needs a
+    send(message) method returning (device address, seconds taken, whether
+    it worked) for each device, so anything that looks like Radio works.
+    """
+    def __init__(self, radio, rate_controller=None, encode=None):
+        """
+        encode: optional function turning what was submitted into the frame
+            to send, called on the sender thread just before sending - for
+            encodings that depend on the previous frame actually sent (see
+            frame_codec), since submitted values can be skipped
+        """
+        self._radio = radio
+        self._encode = encode
+        if rate_controller is None:
+            rate_controller = SendRateController()
+        self.rate_controller = rate_controller
+        # (time the command was created, serialized frame)
+        self._mailbox = LatestValue()
+        self._is_sending = False
+        self._thread = None
+        self.num_sent = 0
+        # frames replaced in the mailbox before they could be sent
+        self.num_skipped = 0
+        # time radio.send took, and how old each frame was when it was sent
+        self.send_duration = SendStats()
+        self.command_age = SendStats()
+
+    def start(self):
+        self._is_sending = True
+        self._thread = threading.Thread(target=self._send_loop)
+        # set to daemon mode so it will be easily killed
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, message, timestamp=None):
+        """
+        make message the next frame to send, replacing any frame that
+        hasn't been sent yet. timestamp is when the data the command was
+        worked out from was captured (defaults to now), for measuring how old
+        it is when it goes out.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self._mailbox.publish((timestamp, message))
+
+    def _send_loop(self):
+        sent_version = 0
+        last_send_time = None
+        while self._is_sending:
+            if not self._mailbox.wait(sent_version, WAIT_TIMEOUT):
+                continue
+            if last_send_time is not None:
+                delay = last_send_time + self.rate_controller.interval - \
+                    time.time()
+                if delay > 0:
+                    # anything submitted meanwhile replaces the frame
+                    time.sleep(delay)
+            version, (timestamp, message) = self._mailbox.get()
+            self.num_skipped += version - sent_version - 1
+            sent_version = version
+            last_send_time = time.time()
+            if self._encode is not None:
+                message = self._encode(message)
+            results = self._radio.send(message)
+            self.send_duration.add(time.time() - last_send_time)
+            self.rate_controller.update(results)
+            self.command_age.add(last_send_time - timestamp)
+            self.num_sent += 1
+
+    def stop(self):
+        """stop the thread after any send in progress"""
+        self._is_sending = False
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def get_latency(self):
+        """
+        recent seconds from a frame's timestamp until radio.send returned,
+        None before anything was sent - with frames stamped with the vision
+        capture time their commands came from, this is the whole latency
+        from the cameras to the radio
+        """
+        if self.command_age.smoothed is None:
+            return None
+        return self.command_age.smoothed + self.send_duration.smoothed
+
+    def get_stats(self):
+        return {
+            'sent': self.num_sent,
+            'skipped': self.num_skipped,
+            'send_duration': self.send_duration.as_dict(),
+            'command_age': self.command_age.as_dict(),
+            'rate_control': self.rate_controller.get_stats(),
+        }
@@ -0,0 +1,112 @@
+"""Picks how often radio frames are sent from how the xbee link is coping.
+The xbee takes frames asynchronously until its buffer is full, then a send
+blocks (or fails) until there is room again - so a send that takes longer
+than BLOCKING_SEND_TIME, or an error, means frames are going out faster than
+the link can carry them. SendRateController backs the inter-frame interval
+off multiplicatively when that happens and otherwise creeps it back down
+(AIMD, like tcp congestion control), keeping commands as frequent as the
+link allows. LinkStats keeps the latency distribution + error rate of each
+remote device so link saturation can be watched during a match.
+"""
+import numpy as np
+
+# sends slower than this (seconds) mean the xbee buffer was full
+BLOCKING_SEND_TIME = .003
+# inter-frame interval limits + starting point (seconds)
+MIN_SEND_INTERVAL = .02
+MAX_SEND_INTERVAL = .25
+INITIAL_SEND_INTERVAL = .06
+# interval multiplier on a blocked/failed send, and decrease per good frame
+BACKOFF_FACTOR = 1.5
+RECOVERY_STEP = .001
+# number of recent sends the latency distribution + error rate cover
+LINK_STATS_WINDOW = 200
+
+
+class LinkStats(object):
+    """send latency distribution and error rate of one remote device, over
+    the last LINK_STATS_WINDOW sends"""
+    def __init__(self, window=LINK_STATS_WINDOW):
+        self._durations = np.zeros(window)
+        self._errors = np.zeros(window, dtype=bool)
+        self._next = 0
+        self.num_sends = 0
+        self.num_errors = 0
+
+    def add(self, duration, is_ok):
+        i = self._next % len(self._durations)
+        self._durations[i] = duration
+        self._errors[i] = not is_ok
+        self._next += 1
+        self.num_sends += 1
+        self.num_errors += not is_ok
+
+    def _window(self):
+        return min(self._next, len(self._durations))
+
+    def latency_percentiles(self, percentiles=(50, 95, 99)):
+        if not self._window():
+            return [None] * len(percentiles)
+        return list(np.percentile(self._durations[:self._window()],
+                                  percentiles))
+
+    @property
+    def error_rate(self):
+        if not self._window():
+            return 0
+        return self._errors[:self._window()].mean()
+
+    def as_dict(self):
+        p50, p95, p99 = self.latency_percentiles()
+        return {
+            'sends': self.num_sends,
+            'errors': self.num_errors,
+            'error_rate': self.error_rate,
+            'latency_p50': p50,
+            'latency_p95': p95,
+            'latency_p99': p99,
+        }
+
+
+class SendRateController(object):
+    """
+    Tunes the interval between radio frames from the outcome of each send.
+    Give min_interval == max_interval for a fixed rate.
+    """
+    def __init__(self, initial_interval=INITIAL_SEND_INTERVAL,
+                 min_interval=MIN_SEND_INTERVAL,
+                 max_interval=MAX_SEND_INTERVAL):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(initial_interval, min_interval), max_interval)
+        self.links = dict()  # device address : LinkStats
+        self.num_backoffs = 0
+
+    def update(self, results):
+        """
+        record the outcome of sending one frame, given as a list of
+        (device address, seconds the send took, whether it worked) for each
+        device it was sent to, and adjust the interval
+        """
+        is_saturated = False
+        for address, duration, is_ok in results:
+            if address not in self.links:
+                self.links[address] = LinkStats()
+            self.links[address].add(duration, is_ok)
+            is_saturated |= not is_ok or duration > BLOCKING_SEND_TIME
+        if is_saturated:
+            self.interval = min(self.interval * BACKOFF_FACTOR,
+                                self.max_interval)
+            self.num_backoffs += 1
+        else:
+            self.interval = max(self.interval - RECOVERY_STEP,
+                                self.min_interval)
+        return self.interval
+
+    def get_stats(self):
+        return {
+            'interval': self.interval,
+            'backoffs': self.num_backoffs,
+            'links': {address: link.as_dict()
+                      for address, link in self.links.items()},
+        }
@@ -19,9 +19,16 @@ END_KEY = bytes([255])
 EMPTY_COMMAND = bytearray([15, 0, 0, 0])
 # Length of serialized commands for single robot
 SINGLE_ROBOT_COMMAND_LENGTH = 4
+# Robots in a team command message (more for larger divisions, up to 15)
+TEAM_SIZE = 6
 # Length of final message to be sent to firmware
 # (contains 6 robots commands, plus a start key and end key)
 TEAM_COMMAND_MESSAGE_LENGTH = 26
+# bit of the first command byte for each boolean command
+DRIBBLE_BIT = 1 << 5
+CHARGE_BIT = 1 << 6
+KICK_BIT = 1 << 7
+
 
 """
 Contains information about a robot's command state. Provides functions for
@@ -122,26 +129,12 @@ class RobotCommands:
             'robot_id': robot_id
         }
 
-    # Compile a single serialized command message for all 6 robots
-    # (static method) takes a dict of {robot_id: robot_commands}
-    def get_serialized_team_command(self, team_commands):
-        team_command_message = b""
-        num_robots = len(team_commands)
-        if len(team_commands) > 6:
-            # TODO: handle better?
-            print('too many robot ids seen, not sending any commands?')
-            num_robots = 0
-        # pad message so it always contains 6 robots worth of data
-        # (this is so firmware can deal with constant message length)
-        for i in range(6 - num_robots):
-            team_command_message += EMPTY_COMMAND
-        for robot_id, commands in team_commands.items():
-            command_message = commands.get_serialized_command(robot_id)
-            # print(RobotCommands.deserialize_command(command_message))
-            team_command_message += command_message
-        team_command_message = START_KEY + team_command_message + END_KEY
-        assert(len(team_command_message) == TEAM_COMMAND_MESSAGE_LENGTH)
-        return team_command_message
+    # Compile a single serialized command message for all robots
+    # takes a dict of {robot_id: robot_commands}
+    # (to serialize every tick, keep a TeamCommandSerializer around instead)
+    @staticmethod
+    def get_serialized_team_command(team_commands, team_size=TEAM_SIZE):
+        return TeamCommandSerializer(team_size).serialize(team_commands)
 
     def clear_waypoints(self):
         self.waypoints = []
@@ -197,6 +190,10 @@ class RobotCommands:
         self._y = y
         self._w = w
 
+    # current speeds (x, y, w) from the robot's perspective
+    def get_speeds(self):
+        return (self._x, self._y, self._w)
+
     # predict where the robot will be if it follows the current command
     def predict_pos(self, current_position, delta_time):
         assert(len(current_position) == 3
@@ -358,3 +355,134 @@ class RobotCommands:
             self._w,
             self.waypoints
         )
+
+
+def team_command_length(team_size=TEAM_SIZE):
+    """bytes in a team command message for team_size robots"""
+    return len(START_KEY) + team_size * SINGLE_ROBOT_COMMAND_LENGTH + \
+        len(END_KEY)
+
+
+# (x, y, w) limits as columns, for quantizing every robot's speeds at once
+_SPEED_MINS = np.array([[MIN_X], [MIN_Y], [MIN_W]])
+_SPEED_MAXES = np.array([[MAX_X], [MAX_Y], [MAX_W]])
+
+
+class TeamCommandSerializer:
+    """
+    Packs a whole team's commands into one message in a single pass, into a
+    message buffer allocated once - from RobotCommands objects, or from
+    arrays of every robot's ids/speeds/flags (quantized together by numpy).
+    Gives the same bytes as calling get_serialized_command for each robot
+    (padding with EMPTY_COMMAND first), and deserialize decodes any number
+    of messages at once.
+    """
+    def __init__(self, team_size=TEAM_SIZE):
+        if not 0 < team_size <= 15:
+            raise ValueError("team_size={} is too big".format(team_size))
+        self.team_size = team_size
+        self.message_length = team_command_length(team_size)
+        self._message = bytearray(self.message_length)
+        self._message[:len(START_KEY)] = START_KEY
+        self._message[-len(END_KEY):] = END_KEY
+        # writable view of the commands in the message, one row per robot
+        self._commands = np.frombuffer(self._message, dtype=np.uint8)[
+            len(START_KEY):-len(END_KEY)].reshape(
+                team_size, SINGLE_ROBOT_COMMAND_LENGTH)
+
+    def serialize_arrays(self, robot_ids, x, y, w, is_dribbling=False,
+                         is_charging=False, is_kicking=False):
+        """
+        message for the robots whose ids + speeds (robot perspective) are
+        given as equal length arrays, flags can be arrays or single bools
+        """
+        robot_ids = np.asarray(robot_ids, dtype=int).reshape(-1)
+        num_robots = len(robot_ids)
+        if num_robots > self.team_size:
+            raise ValueError("{} robots don't fit in a message for {}".format(
+                num_robots, self.team_size))
+        if ((robot_ids < 0) | (robot_ids > 14)).any():
+            raise ValueError("robot_id={} is too big".format(robot_ids))
+        speeds = np.array([x, y, w], dtype=float).reshape(3, num_robots)
+        is_in_range = (_SPEED_MINS < speeds) & (speeds < _SPEED_MAXES)
+        if not is_in_range.all():
+            raise ValueError("(x, y, w)={} is too big".format(
+                speeds.T[~is_in_range.all(axis=0)]))
+        first_bytes = robot_ids | \
+            np.asarray(is_dribbling, dtype=bool) * DRIBBLE_BIT | \
+            np.asarray(is_charging, dtype=bool) * CHARGE_BIT | \
+            np.asarray(is_kicking, dtype=bool) * KICK_BIT
+        # pad message so it always contains team_size robots worth of data
+        # (this is so firmware can deal with constant message length)
+        num_empty = self.team_size - num_robots
+        self._commands[:num_empty] = EMPTY_COMMAND
+        commands = self._commands[num_empty:]
+        commands[:, 0] = first_bytes
+        # (the same float operations as get_serialized_command, so the bytes
+        # match exactly - values are positive so truncating is flooring)
+        commands[:, 1:] = (((speeds - _SPEED_MINS) /
+                            (_SPEED_MAXES - _SPEED_MINS)) * MAX_ENCODING).T
+        assert END_KEY[0] not in self._commands, \
+            "END_KEY appears in message body!!!"
+        return bytes(self._message)
+
+    def serialize(self, team_commands):
+        """message for a dict of {robot_id: robot_commands}"""
+        num_empty = self.team_size - len(team_commands)
+        if num_empty < 0:
+            raise ValueError("{} robots don't fit in a message for {}".format(
+                len(team_commands), self.team_size))
+        message = self._message
+        # pad message so it always contains team_size robots worth of data
+        i = len(START_KEY) + num_empty * SINGLE_ROBOT_COMMAND_LENGTH
+        message[len(START_KEY):i] = EMPTY_COMMAND * num_empty
+        for robot_id, commands in team_commands.items():
+            x, y, w = commands.get_speeds()
+            if not (MIN_X < x < MAX_X and MIN_Y < y < MAX_Y and
+                    MIN_W < w < MAX_W and 0 <= robot_id <= 14):
+                # (raises the ValueError saying what is wrong)
+                commands.get_serialized_command(robot_id)
+            message[i] = robot_id | \
+                commands.is_dribbling * DRIBBLE_BIT | \
+                commands.is_charging * CHARGE_BIT | \
+                commands.is_kicking * KICK_BIT
+            message[i + 1] = int(((x - MIN_X) / (MAX_X - MIN_X)) *
+                                 MAX_ENCODING)
+            message[i + 2] = int(((y - MIN_Y) / (MAX_Y - MIN_Y)) *
+                                 MAX_ENCODING)
+            message[i + 3] = int(((w - MIN_W) / (MAX_W - MIN_W)) *
+                                 MAX_ENCODING)
+            i += SINGLE_ROBOT_COMMAND_LENGTH
+        return bytes(message)
+
+    def deserialize(self, messages):
+        """
+        decode one or more team command messages back to back (e.g. a
+        telemetry log) into a dict of arrays, shape (messages, team_size):
+        robot_id, is_empty (padding slot), is_dribbling, is_charging,
+        is_kicking, x, y, w
+        """
+        data = np.frombuffer(bytes(messages), dtype=np.uint8)
+        if not len(data) or len(data) % self.message_length:
+            raise ValueError("{} bytes isn't a whole number of messages "
+                             "of {}".format(len(data), self.message_length))
+        data = data.reshape(-1, self.message_length)
+        if (data[:, 0] != START_KEY[0]).any() or \
+                (data[:, -1] != END_KEY[0]).any():
+            raise ValueError("message doesn't start with START_KEY and end "
+                             "with END_KEY")
+        commands = data[:, len(START_KEY):-len(END_KEY)].reshape(
+            len(data), self.team_size, SINGLE_ROBOT_COMMAND_LENGTH)
+        first_bytes = commands[:, :, 0]
+        x_bytes, y_bytes, w_bytes = (commands[:, :, i].astype(float)
+                                     for i in range(1, 4))
+        return {
+            'robot_id': first_bytes & 15,
+            'is_empty': first_bytes & 15 == EMPTY_COMMAND[0],
+            'is_dribbling': first_bytes & DRIBBLE_BIT != 0,
+            'is_charging': first_bytes & CHARGE_BIT != 0,
+            'is_kicking': first_bytes & KICK_BIT != 0,
+            'x': (x_bytes * ((MAX_X - MIN_X) / MAX_ENCODING)) + MIN_X,
+            'y': (y_bytes * ((MAX_Y - MIN_Y) / MAX_ENCODING)) + MIN_Y,
+            'w': (w_bytes * ((MAX_W - MIN_W) / MAX_ENCODING)) + MIN_W,
+        }
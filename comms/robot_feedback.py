@@ -0,0 +1,66 @@
+"""Feedback frames the robots send back over the xbee, and decoding them.
+
+Frame layout (serialization constants - must match with firmware):
+
+    FEEDBACK_START_KEY
+    robot id        0 - 14
+    flags           bit 0: breakbeam tripped (the robot has the ball)
+    charge          kicker capacitor charge, 0 - MAX_CHARGE_LEVEL scaled to
+                    0 - MAX_ENCODING
+    battery         battery voltage, 0 - MAX_BATTERY_VOLTAGE scaled to
+                    0 - MAX_ENCODING
+    END_KEY
+"""
+from collections import namedtuple
+
+try:
+    from robot_commands import END_KEY, MAX_ENCODING
+    from robot_status import RobotStatus
+except (SystemError, ImportError):
+    from .robot_commands import END_KEY, MAX_ENCODING
+    from .robot_status import RobotStatus
+
+# different from the command frames' start keys
+FEEDBACK_START_KEY = bytes([102])
+FEEDBACK_LENGTH = 6
+BREAKBEAM_BIT = 1
+MAX_BATTERY_VOLTAGE = 25.2  # fully charged 6 cell lipo
+
+RobotFeedback = namedtuple('RobotFeedback', [
+    'robot_id',
+    'has_ball',
+    'charge_level',
+    'battery_voltage',
+])
+
+
+def encode_feedback(feedback):
+    """frame for a RobotFeedback, as the robot firmware builds it"""
+    if not 0 <= feedback.robot_id <= 14:
+        raise ValueError("robot_id={} is too big".format(feedback.robot_id))
+    charge = min(max(feedback.charge_level, 0), RobotStatus.MAX_CHARGE_LEVEL)
+    battery = min(max(feedback.battery_voltage, 0), MAX_BATTERY_VOLTAGE)
+    return FEEDBACK_START_KEY + bytes([
+        feedback.robot_id,
+        int(feedback.has_ball) * BREAKBEAM_BIT,
+        int(charge / RobotStatus.MAX_CHARGE_LEVEL * MAX_ENCODING),
+        int(battery / MAX_BATTERY_VOLTAGE * MAX_ENCODING),
+    ]) + END_KEY
+
+
+def decode_feedback(frame):
+    """RobotFeedback in a frame, raises ValueError if it isn't one"""
+    frame = bytes(frame)
+    if len(frame) != FEEDBACK_LENGTH or \
+            frame[:len(FEEDBACK_START_KEY)] != FEEDBACK_START_KEY or \
+            frame[-len(END_KEY):] != END_KEY:
+        raise ValueError("not a feedback frame: {}".format(frame))
+    robot_id, flags, charge, battery = frame[1:-1]
+    if robot_id > 14 or charge > MAX_ENCODING or battery > MAX_ENCODING:
+        raise ValueError("feedback frame out of range: {}".format(frame))
+    return RobotFeedback(
+        robot_id,
+        flags & BREAKBEAM_BIT != 0,
+        charge / MAX_ENCODING * RobotStatus.MAX_CHARGE_LEVEL,
+        battery / MAX_ENCODING * MAX_BATTERY_VOLTAGE,
+    )
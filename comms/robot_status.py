@@ -3,6 +3,7 @@ Contains information about a robot's state that we don't directly control.
 For example, the kicker charge level or other sensor data.
 Populated by feedback from radio or simulator.
 """
+import time
 
 
 class RobotStatus:
@@ -10,9 +11,32 @@ class RobotStatus:
     MAX_KICK_SPEED = 2500  # TODO
     MAX_CHARGE_LEVEL = 250  # volts? should be whatever the board measures in
     CHARGE_RATE = 60  # volts per second?
+    # feedback older than this (seconds) is stale, charge is simulated again
+    FEEDBACK_TIMEOUT = .5
 
     def __init__(self):
         self.charge_level = 0
+        # from robot feedback (None until the robot reports them)
+        self.has_ball = None
+        self.battery_voltage = None
+        # when the latest feedback arrived
+        self.feedback_time = None
+
+    # copy in what the robot reported about itself (see robot_feedback)
+    def update_feedback(self, feedback, timestamp):
+        self.charge_level = feedback.charge_level
+        self.has_ball = feedback.has_ball
+        self.battery_voltage = feedback.battery_voltage
+        self.feedback_time = timestamp
+
+    # whether the robot has reported recently enough to trust it over the
+    # simulated charge
+    def has_fresh_feedback(self, now=None):
+        if self.feedback_time is None:
+            return False
+        if now is None:
+            now = time.time()
+        return now - self.feedback_time < self.FEEDBACK_TIMEOUT
 
     # clears out charge as though we kicked
     def simulate_kick(self):
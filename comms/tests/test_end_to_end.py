@@ -0,0 +1,121 @@
+import time
+import logging
+import pytest
+import numpy as np
+from functools import partial
+from gamestate import GameState
+from simulator import Simulator
+from strategy import Strategy
+from ..comms import Comms
+from ..fake_radio import FakeRadio, SimulatedFeedback
+from ..robot_commands import (RobotCommands, TeamCommandSerializer,
+                              team_command_length)
+
+team = 'blue'
+TICKS = 50
+TICK_TIME = .01
+
+
+def step(provider, gs):
+    """run a provider once on its own copy of gs, keeping the fields it
+    owns, as the coordinator would"""
+    provider.data_in_q.put(gs)
+    provider._update_gamestate()
+    provider.run()
+    provider._update_times()
+    for field in provider._owned_fields:
+        setattr(gs, field, getattr(provider.gs, field))
+
+
+@pytest.mark.parametrize('use_delta_frames', [False, True])
+def test_strategy_to_fake_robots(use_delta_frames):
+    """ Runs the simulator, strategy + comms on the simulator's full teams
+    for half a second, sending over a fake xbee where robots answer every
+    command.
+    Passes if every robot got its own recent command, the link kept close to
+    its maximum rate, the latency from the (simulated) cameras to the radio
+    was measured into the gamestate, and every robot's feedback reached its
+    RobotStatus - with full frames and with delta frames.
+    """
+    simulator = Simulator('full_teams', simulate_robot_status=False)
+    simulator.logger = logging.getLogger('simulator')
+    simulator.pre_run()
+    gs = simulator.gs
+    strategy = Strategy(team, 'random_robot', seed=0)
+    strategy.logger = logging.getLogger('strategy')
+    comms = Comms(team, radio_factory=partial(
+        FakeRadio, feedback=SimulatedFeedback(battery_voltage=16)),
+        use_delta_frames=use_delta_frames)
+    comms.logger = logging.getLogger('comms')
+    comms.pre_run()
+    device = comms._radio.device
+    start = time.time()
+    for _ in range(TICKS):
+        for provider in [simulator, strategy, comms]:
+            step(provider, gs)
+        time.sleep(TICK_TIME)
+    time.sleep(.1)
+    elapsed = time.time() - start
+    stats = comms.get_send_stats()
+    receive_stats = comms.get_receive_stats()
+    comms.post_run()
+
+    assert sorted(device.robot_commands) == list(range(1, 7))
+    for robot_id, (receive_time, command) in device.robot_commands.items():
+        assert RobotCommands().deserialize_command(command)['robot_id'] == \
+            robot_id
+        assert time.time() - receive_time < .3
+    # broadcast frames take ~40 ms on the 9600 baud line
+    assert stats['sent'] / elapsed > 10
+    # (frames are stamped with the capture time of the positions they used)
+    assert 0 < stats['command_age']['mean'] < .2
+    assert 0 < gs.get_command_latency(team) < .3
+    assert gs.get_command_latency('yellow') is None
+    assert receive_stats['received'] > 0
+    assert receive_stats['malformed'] == 0
+    for robot_id in range(1, 7):
+        robot_status = gs.get_robot_status(team, robot_id)
+        assert robot_status.has_fresh_feedback()
+        assert abs(robot_status.battery_voltage - 16) < .1
+
+
+def test_simulator_leaves_robot_status_to_comms():
+    """ Sets up the simulator the way main.py does for --simulate with
+    --fake_radio.
+    Passes if only Comms owns the robot statuses, so the coordinator doesn't
+    take them from both.
+    """
+    simulator = Simulator('full_teams', simulate_robot_status=False)
+    comms = Comms(team, radio_factory=FakeRadio)
+    assert not set(simulator._owned_fields) & set(comms._owned_fields)
+    assert set(Simulator('full_teams')._owned_fields) & \
+        set(comms._owned_fields)
+
+
+@pytest.mark.parametrize('team_size', [6, 11])
+def test_too_many_robots_for_frame(team_size):
+    """ Gives comms commands for 12 robots, robot 1 lost, with frames for
+    team_size robots.
+    Passes if comms keeps sending frames of team_size robots, leaving out
+    the lost robot first, then the highest ids.
+    """
+    gs = GameState()
+    for robot_id in range(1, 13):
+        seen_time = time.time() - (1 if robot_id == 1 else 0)
+        gs.update_robot_position(team, robot_id, np.array([0., 0., 0.]),
+                                 seen_time)
+        gs.get_robot_commands(team, robot_id)
+    comms = Comms(team, radio_factory=partial(FakeRadio, loss=0),
+                  team_size=team_size)
+    comms.logger = logging.getLogger('comms')
+    comms.pre_run()
+    comms.gs = gs
+    for _ in range(3):
+        comms.run()
+        time.sleep(.05)
+    comms.post_run()
+    _, _, frame = comms._radio.device.sent[-1]
+    assert len(frame) == team_command_length(team_size)
+    sent_ids = TeamCommandSerializer(team_size).deserialize(frame)[
+        'robot_id'][0]
+    assert list(sent_ids) == list(range(2, team_size + 2))
@@ -0,0 +1,91 @@
+import random
+import pytest
+from ..robot_commands import RobotCommands, END_KEY
+from ..frame_codec import (DeltaFrameEncoder, DeltaFrameDecoder,
+                           decode_frame, KEYFRAME_INTERVAL)
+
+
+def random_commands(rng, commands):
+    """change some robots' commands, and maybe add/remove a robot"""
+    commands = dict(commands)
+    if rng.random() < .1:
+        commands.pop(rng.choice(list(commands)), None) if commands else None
+    if rng.random() < .1 or not commands:
+        commands[rng.randint(0, 14)] = None
+    for robot_id in commands:
+        if commands[robot_id] is None or rng.random() < .3:
+            robot_commands = RobotCommands()
+            robot_commands.set_speeds(rng.uniform(-999, 999),
+                                      rng.uniform(-999, 999),
+                                      rng.uniform(-6.28, 6.28))
+            robot_commands.is_dribbling = rng.random() < .5
+            robot_commands.is_charging = rng.random() < .5
+            robot_commands.is_kicking = rng.random() < .5
+            commands[robot_id] = \
+                robot_commands.get_serialized_command(robot_id)
+    return commands
+
+
+def test_round_trip_fuzz():
+    """ Encodes 5000 ticks of randomly changing commands, and decodes them
+    like a robot that gets every frame.
+    Passes if the decoded commands always match, and no frame body
+    contains END_KEY.
+    """
+    rng = random.Random(0)
+    encoder = DeltaFrameEncoder()
+    decoder = DeltaFrameDecoder()
+    commands = dict()
+    for _ in range(5000):
+        commands = random_commands(rng, commands)
+        frame = encoder.encode(commands)
+        assert END_KEY not in frame[:-1]
+        assert decoder.decode(frame) == commands
+    assert decoder.num_missed == 0
+
+
+def test_lost_frames_recover_at_keyframe():
+    """ Decodes the same random ticks, but loses a third of the frames.
+    Passes if lost frames are counted, and the robot's commands are right
+    after every keyframe it gets.
+    """
+    rng = random.Random(1)
+    encoder = DeltaFrameEncoder()
+    decoder = DeltaFrameDecoder()
+    commands = dict()
+    num_keyframes = 0
+    for _ in range(2000):
+        commands = random_commands(rng, commands)
+        frame = encoder.encode(commands)
+        if rng.random() < 1 / 3:
+            continue
+        decoded = decoder.decode(frame)
+        if decode_frame(frame)[1]:
+            num_keyframes += 1
+            assert decoded == commands
+    assert num_keyframes >= 2000 / KEYFRAME_INTERVAL / 2
+    assert decoder.num_missed > 0
+
+
+def test_unchanged_commands_are_small():
+    """ Encodes the same six commands twice.
+    Passes if the second frame carries no commands at all.
+    """
+    commands = {robot_id: RobotCommands().get_serialized_command(robot_id)
+                for robot_id in range(6)}
+    encoder = DeltaFrameEncoder()
+    assert len(encoder.encode(commands)) == 6 + 6 * 4
+    assert len(encoder.encode(commands)) == 6
+
+
+def test_malformed_frames_rejected():
+    """ Decodes truncated frames and a full (non-delta) frame.
+    Passes if each raises ValueError.
+    """
+    commands = {3: RobotCommands().get_serialized_command(3)}
+    frame = DeltaFrameEncoder().encode(commands)
+    full_frame = RobotCommands.get_serialized_team_command(
+        {3: RobotCommands()})
+    for bad_frame in [frame[:-2] + END_KEY, frame[:4], full_frame]:
+        with pytest.raises(ValueError):
+            decode_frame(bad_frame)
@@ -0,0 +1,94 @@
+import time
+from digi.xbee.exception import XBeeException
+from digi.xbee.models.address import XBee64BitAddress
+from ..radio import (Radio, SEND_BROADCAST, SEND_UNICAST,
+                     MAX_BROADCAST_FAILURES, save_device_cache,
+                     load_device_cache)
+from ..fake_radio import FakeXBeeDevice, FakeRadio, robot_address
+
+# fast enough that the fake never blocks
+FAST_BAUD_RATE = 1e9
+
+
+class NoBroadcastXBeeDevice(FakeXBeeDevice):
+    """fake xbee on a network that drops broadcasts"""
+    def send_data_async(self, remote_xbee, data):
+        if remote_xbee.get_64bit_addr() == \
+                XBee64BitAddress.BROADCAST_ADDRESS:
+            raise XBeeException('broadcast not allowed')
+        super().send_data_async(remote_xbee, data)
+
+
+def test_broadcast_sends_one_frame():
+    """ Sends a team command to 6 robots in each mode.
+    Passes if broadcast hands the xbee one frame and unicast one per robot.
+    """
+    for send_mode, num_frames in [(SEND_BROADCAST, 1), (SEND_UNICAST, 6)]:
+        device = FakeXBeeDevice(robot_ids=range(6), baud_rate=FAST_BAUD_RATE)
+        radio = Radio(send_mode=send_mode, device=device, discovery_time=0)
+        results = radio.send(b'team command')
+        assert device.num_frames == num_frames
+        assert len(results) == num_frames
+        assert all(is_ok for _, _, is_ok in results)
+
+
+def test_broadcast_falls_back_to_unicast():
+    """ Broadcasts on a network where broadcasts fail.
+    Passes if every frame still reaches each robot, and radio switches to
+    unicast after repeated failures.
+    """
+    device = NoBroadcastXBeeDevice(robot_ids=range(3),
+                                   baud_rate=FAST_BAUD_RATE)
+    radio = Radio(device=device, discovery_time=0)
+    for i in range(MAX_BROADCAST_FAILURES):
+        results = radio.send(b'team command')
+        assert [is_ok for _, _, is_ok in results] == [False, True, True, True]
+    assert radio.send_mode == SEND_UNICAST
+    assert len(radio.send(b'team command')) == 3
+    assert device.num_frames == 3 * (MAX_BROADCAST_FAILURES + 1)
+
+
+def test_discovery_cache(tmp_path):
+    """ Starts a radio with a cache listing robots 1-3, when only robots 1
+    and 2 are on the network and discovery takes a while.
+    Passes if the radio starts without waiting for discovery, the first send
+    finds robot 3 missing, and the background discovery rewrites the cache.
+    """
+    cache_path = str(tmp_path / 'xbee_devices.json')
+    save_device_cache(cache_path,
+                      [str(robot_address(robot_id)) for robot_id in [1, 2, 3]])
+    start = time.time()
+    radio = FakeRadio(robot_ids=[1, 2], baud_rate=FAST_BAUD_RATE,
+                      discovery_time=.2, cache_path=cache_path)
+    assert time.time() - start < .1
+    assert len(radio.net_devs) == 3
+    results = radio.send(b'team command')
+    assert [is_ok for _, _, is_ok in results] == [True, True, False, True]
+    assert radio.missing_devices == {str(robot_address(3))}
+    assert len(radio.net_devs) == 2
+    radio._discovery_thread.join()
+    assert load_device_cache(cache_path) == \
+        [str(robot_address(robot_id)) for robot_id in [1, 2]]
+
+
+def test_robot_lost_after_startup():
+    """ Sends to 3 robots in each mode, then robot 2's xbee goes away.
+    Passes if the next acknowledged round of frames finds robot 2 missing,
+    drops it from the robots sent to, and discovery doesn't bring it back.
+    """
+    for send_mode in [SEND_BROADCAST, SEND_UNICAST]:
+        radio = FakeRadio(robot_ids=[1, 2, 3], baud_rate=FAST_BAUD_RATE,
+                          send_mode=send_mode, confirm_interval=5)
+        for i in range(4):
+            assert all(is_ok for _, _, is_ok in radio.send(b'team command'))
+        assert not radio.missing_devices
+        radio.device.remove_robot(2)
+        results = radio.send(b'team command')
+        assert (str(robot_address(2)), False) in \
+            [(address, is_ok) for address, _, is_ok in results]
+        assert radio.missing_devices == {str(robot_address(2))}
+        radio._discovery_thread.join()
+        assert sorted(str(device.get_64bit_addr())
+                      for device in radio.net_devs) == \
+            [str(robot_address(robot_id)) for robot_id in [1, 3]]
+        assert radio.missing_devices == {str(robot_address(2))}
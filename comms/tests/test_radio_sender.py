@@ -0,0 +1,79 @@
+import time
+from ..radio_sender import RadioSender
+from ..rate_control import SendRateController, BLOCKING_SEND_TIME
+from ..robot_commands import (RobotCommands, TEAM_COMMAND_MESSAGE_LENGTH,
+                              START_KEY, END_KEY)
+
+
+class RecordingRadio(object):
+    """stands in for Radio, remembers what was sent when"""
+    def __init__(self, send_time=.005):
+        self.send_time = send_time
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append((time.time(), message))
+        time.sleep(self.send_time)
+        return [('robot', self.send_time, True)]
+
+
+def test_sender_sends_newest_frame_at_interval():
+    """ Submits frames every 5 ms for a quarter of a second, faster than the
+    radio can take them.
+    Passes if sends are never closer than the send interval, the newest
+    frame always gets sent in the end, and the frames in between are counted
+    as skipped. (Bounds are loose so a slow machine doesn't fail it.)
+    """
+    radio = RecordingRadio()
+    sender = RadioSender(radio, SendRateController(.05, .05, .05))
+    sender.start()
+    start = time.time()
+    for i in range(50):
+        sender.submit(bytes([i]))
+        time.sleep(.005)
+    elapsed = time.time() - start
+    # wait (within reason) for the last frame to go out
+    deadline = time.time() + 2
+    while time.time() < deadline and \
+            (not radio.sent or radio.sent[-1][1] != bytes([49])):
+        time.sleep(.01)
+    sender.stop()
+    send_times = [send_time for send_time, _ in radio.sent]
+    assert radio.sent[-1][1] == bytes([49])
+    # sleeps never end early, so sends can't be closer than the interval
+    assert min(b - a for a, b in zip(send_times, send_times[1:])) >= .045
+    # ... and at most one frame per interval while frames were coming in
+    assert 2 <= len(send_times) <= elapsed / .05 + 2
+    stats = sender.get_stats()
+    assert stats['sent'] + stats['skipped'] == 50
+    assert stats['skipped'] > 0
+    assert stats['send_duration']['mean'] >= .005
+
+
+def test_serialized_team_command():
+    """ Serializes commands for two robots through the class.
+    Passes if the frame has the fixed length and start/end keys.
+    """
+    team_commands = {0: RobotCommands(), 3: RobotCommands()}
+    message = RobotCommands.get_serialized_team_command(team_commands)
+    assert len(message) == TEAM_COMMAND_MESSAGE_LENGTH
+    assert message[:1] == START_KEY and message[-1:] == END_KEY
+
+
+def test_rate_adapts_to_link():
+    """ Sends frames over a link that blocks whenever frames are less than
+    40 ms apart.
+    Passes if the interval settles close above 40 ms - fast, but mostly
+    without blocking - and the blocked sends show up in the link stats.
+    """
+    controller = SendRateController(initial_interval=.2)
+    for _ in range(500):
+        is_blocked = controller.interval < .04
+        duration = .03 if is_blocked else BLOCKING_SEND_TIME / 2
+        controller.update([('robot', duration, True),
+                           ('other robot', BLOCKING_SEND_TIME / 2, True)])
+    assert .04 <= controller.interval < .07
+    stats = controller.get_stats()
+    assert 0 < stats['backoffs'] < 50
+    assert stats['links']['robot']['latency_p99'] == .03
+    assert stats['links']['other robot']['error_rate'] == 0
@@ -0,0 +1,99 @@
+import random
+import numpy as np
+import pytest
+from ..robot_commands import (RobotCommands, TeamCommandSerializer,
+                              START_KEY, END_KEY, EMPTY_COMMAND,
+                              TEAM_COMMAND_MESSAGE_LENGTH,
+                              team_command_length)
+
+
+def random_team(rng, num_robots):
+    team = dict()
+    for robot_id in rng.sample(range(15), num_robots):
+        robot_commands = RobotCommands()
+        robot_commands.set_speeds(rng.uniform(-999, 999),
+                                  rng.uniform(-999, 999),
+                                  rng.uniform(-6.28, 6.28))
+        robot_commands.is_dribbling = rng.random() < .5
+        robot_commands.is_charging = rng.random() < .5
+        robot_commands.is_kicking = rng.random() < .5
+        team[robot_id] = robot_commands
+    return team
+
+
+def concatenated_team_command(team_commands, team_size):
+    """the message built one robot at a time"""
+    message = bytes(EMPTY_COMMAND) * (team_size - len(team_commands))
+    for robot_id, commands in team_commands.items():
+        message += commands.get_serialized_command(robot_id)
+    return START_KEY + message + END_KEY
+
+
+@pytest.mark.parametrize('team_size', [6, 11])
+def test_serializer_matches_single_commands(team_size):
+    """ Serializes 500 random teams of up to team_size robots.
+    Passes if every message (from objects and from arrays) is the same bytes
+    as building it from each robot's get_serialized_command, and
+    deserializes back to each robot's deserialize_command.
+    """
+    rng = random.Random(team_size)
+    serializer = TeamCommandSerializer(team_size)
+    for _ in range(500):
+        team = random_team(rng, rng.randint(0, team_size))
+        message = serializer.serialize(team)
+        assert len(message) == team_command_length(team_size)
+        assert message == concatenated_team_command(team, team_size)
+        speeds = np.array([commands.get_speeds()
+                           for commands in team.values()]).reshape(-1, 3)
+        assert message == serializer.serialize_arrays(
+            list(team), speeds[:, 0], speeds[:, 1], speeds[:, 2],
+            [commands.is_dribbling for commands in team.values()],
+            [commands.is_charging for commands in team.values()],
+            [commands.is_kicking for commands in team.values()])
+        decoded = serializer.deserialize(message)
+        robot_ids = decoded['robot_id'][0][~decoded['is_empty'][0]]
+        assert list(robot_ids) == list(team)
+        for i, robot_id in enumerate(decoded['robot_id'][0]):
+            if decoded['is_empty'][0][i]:
+                continue
+            expected = RobotCommands().deserialize_command(
+                team[robot_id].get_serialized_command(robot_id))
+            for key, value in expected.items():
+                assert decoded[key][0][i] == pytest.approx(value)
+
+
+def test_deserialize_many_messages():
+    """ Deserializes three messages back to back.
+    Passes if the arrays have a row per message, in order.
+    """
+    serializer = TeamCommandSerializer()
+    messages = b''
+    for robot_id in [1, 2, 3]:
+        robot_commands = RobotCommands()
+        robot_commands.set_speeds(100 * robot_id, 0, 0)
+        messages += serializer.serialize({robot_id: robot_commands})
+    decoded = serializer.deserialize(messages)
+    assert decoded['robot_id'].shape == (3, 6)
+    assert list(decoded['robot_id'][:, -1]) == [1, 2, 3]
+    assert np.allclose(decoded['x'][:, -1], [100, 200, 300], atol=10)
+    assert decoded['is_empty'][:, :-1].all()
+
+
+def test_serializer_rejects_bad_input():
+    """ Serializes too many robots and out of range speeds, and
+    deserializes a truncated message.
+    Passes if each raises ValueError instead of sending a bad frame.
+    """
+    rng = random.Random(0)
+    serializer = TeamCommandSerializer()
+    with pytest.raises(ValueError):
+        serializer.serialize(random_team(rng, 7))
+    with pytest.raises(ValueError):
+        serializer.serialize_arrays([1], [1000], [0], [0])
+    with pytest.raises(ValueError):
+        serializer.serialize_arrays([15], [0], [0], [0])
+    message = RobotCommands.get_serialized_team_command(
+        random_team(rng, 6))
+    assert len(message) == TEAM_COMMAND_MESSAGE_LENGTH
+    with pytest.raises(ValueError):
+        serializer.deserialize(message[:-1])
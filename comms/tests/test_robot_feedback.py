@@ -0,0 +1,99 @@
+import time
+import pytest
+from digi.xbee.models.message import XBeeMessage
+from ..radio_receiver import RadioReceiver
+from ..robot_feedback import (RobotFeedback, encode_feedback, decode_feedback,
+                              FEEDBACK_LENGTH)
+from ..robot_status import RobotStatus
+from ..robot_commands import RobotCommands
+from ..fake_radio import SimulatedFeedback
+
+
+class QueuedRadio(object):
+    """stands in for Radio, hands out queued messages in batches"""
+    def __init__(self):
+        self.batches = []
+
+    def read_all(self):
+        if self.batches:
+            return self.batches.pop(0)
+        return []
+
+
+def message(data, timestamp):
+    return XBeeMessage(bytearray(data), None, timestamp)
+
+
+def test_feedback_round_trip():
+    """ Encodes feedback for every robot id, with and without the ball.
+    Passes if decoding gives the same feedback back, to within the
+    quantization, and never puts END_KEY in the body.
+    """
+    for robot_id in range(15):
+        for has_ball in [False, True]:
+            feedback = RobotFeedback(robot_id, has_ball, robot_id * 16.6,
+                                     14 + robot_id * .5)
+            frame = encode_feedback(feedback)
+            assert len(frame) == FEEDBACK_LENGTH
+            assert 255 not in frame[:-1]
+            decoded = decode_feedback(frame)
+            assert decoded.robot_id == robot_id
+            assert decoded.has_ball == has_ball
+            assert decoded.charge_level == pytest.approx(
+                feedback.charge_level, abs=1)
+            assert decoded.battery_voltage == pytest.approx(
+                feedback.battery_voltage, abs=.1)
+    for bad_frame in [b'', bytes([1]), encode_feedback(feedback)[:-1],
+                      RobotCommands.get_serialized_team_command({})]:
+        with pytest.raises(ValueError):
+            decode_feedback(bad_frame)
+
+
+def test_receiver_keeps_newest_feedback():
+    """ Feeds the receiver two batches of messages for two robots, with a
+    garbage message in between.
+    Passes if it keeps each robot's newest feedback and arrival time, counts
+    the garbage, and the feedback goes stale after FEEDBACK_TIMEOUT.
+    """
+    radio = QueuedRadio()
+    now = time.time()
+    radio.batches = [
+        [message(encode_feedback(RobotFeedback(1, False, 10, 16)), now),
+         message(encode_feedback(RobotFeedback(2, True, 20, 16)), now),
+         message(b'garbage', now)],
+        [message(encode_feedback(RobotFeedback(1, True, 30, 15)), now + .1)],
+    ]
+    receiver = RadioReceiver(radio, poll_interval=.001)
+    receiver.start()
+    time.sleep(.05)
+    receiver.stop()
+    feedback = receiver.get_feedback()
+    assert sorted(feedback) == [1, 2]
+    timestamp, robot_feedback = feedback[1]
+    assert timestamp == now + .1 and robot_feedback.has_ball
+    assert receiver.get_stats() == {
+        'received': 4, 'malformed': 1, 'batches': 2, 'max_batch': 3}
+
+    robot_status = RobotStatus()
+    robot_status.update_feedback(robot_feedback, timestamp)
+    assert robot_status.charge_level == pytest.approx(30, abs=1)
+    assert robot_status.has_fresh_feedback(now + .2)
+    assert not robot_status.has_fresh_feedback(
+        now + .1 + RobotStatus.FEEDBACK_TIMEOUT)
+
+
+def test_simulated_feedback_follows_commands():
+    """ Commands a fake robot to charge for a tenth of a second, then kick.
+    Passes if its reported charge goes up at CHARGE_RATE, then to 0.
+    """
+    feedback = SimulatedFeedback()
+    commands = RobotCommands()
+    commands.is_charging = True
+    feedback(3, commands.get_serialized_command(3))
+    time.sleep(.1)
+    charge_level = decode_feedback(
+        feedback(3, commands.get_serialized_command(3))).charge_level
+    assert charge_level == pytest.approx(RobotStatus.CHARGE_RATE * .1, abs=2)
+    commands.is_kicking = True
+    assert decode_feedback(feedback(
+        3, commands.get_serialized_command(3))).charge_level == 0
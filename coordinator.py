@@ -189,13 +189,16 @@ class Coordinator(object):
     parties including vision, refbox data, XBEE processes and
     strategy processes.
     """
-    def __init__(self, providers):
+    def __init__(self, providers, telemetry=None):
         """
         Collects the objects to coordinate
+        telemetry: optional TelemetryWriter (see recording) that gets a row
+        every time a provider has updated the gamestate
         """
         from gamestate import GameState
         # A list of all of the provider that need to be synchronised
         self.providers = providers
+        self.telemetry = telemetry
 
         # Stores the processes currently in use by the coordinator
         self.processes = []
@@ -241,6 +244,8 @@ class Coordinator(object):
         # Start main game loop
         self.logger.info("Starting main game loop")
         self.game_loop()
+        if self.telemetry:
+            self.telemetry.close()
 
     def stop_game(self):
         """
@@ -258,18 +263,23 @@ class Coordinator(object):
         while not self.stop_event.is_set():
             sys.stdout.flush()
             self.publish_new_gamestate()
+            is_updated = False
             for provider in self.providers:
-                self.get_data_from_provider(provider)
+                is_updated |= self.get_data_from_provider(provider)
+            if is_updated and self.telemetry:
+                self.telemetry.record(self.gamestate)
 
     def get_data_from_provider(self, provider):
         """
         Gets and integrates updated gamestate data from a provider's returned
-        gamestate
+        gamestate, returns whether there was any
         """
         provider_gs = self.get_from_provider_ignore_exceptions(provider)
         if provider_gs:
             for field in provider._owned_fields:
                 setattr(self.gamestate, field, getattr(provider_gs, field))
+            return True
+        return False
 
     def publish_new_gamestate(self):
         """
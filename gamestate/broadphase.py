@@ -0,0 +1,77 @@
+from bisect import bisect_left, bisect_right
+
+
+class SweepAndPrune(object):
+    """
+    Broad phase for collision checks between robots (or any point bodies).
+    Bodies are kept sorted by x. Between ticks robots barely move, so the
+    previous order is re-sorted with insertion sort in close to linear time.
+    Candidates still need an exact check (e.g. robot_overlap) afterwards.
+    """
+    def __init__(self):
+        self._keys = []  # sorted by x
+        self._xs = []  # x coordinate for each key, same order
+        self._positions = {}  # key : position
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, bodies):
+        """
+        Replace the tracked bodies with a list of (key, position), keeping
+        the order from the previous update as the starting point for sorting
+        """
+        positions = dict(bodies)
+        keys = [key for key in self._keys if key in positions]
+        keys += [key for key in positions if key not in self._positions]
+        xs = [positions[key][0] for key in keys]
+        # insertion sort - nearly sorted already, so this is close to O(n)
+        for i in range(1, len(keys)):
+            key, x = keys[i], xs[i]
+            j = i - 1
+            while j >= 0 and xs[j] > x:
+                keys[j + 1] = keys[j]
+                xs[j + 1] = xs[j]
+                j -= 1
+            keys[j + 1] = key
+            xs[j + 1] = x
+        self._keys = keys
+        self._xs = xs
+        self._positions = positions
+
+    def candidate_pairs(self, distance):
+        """
+        returns a list of (key1, key2) for bodies whose x and y coordinates
+        are both within distance of each other
+        """
+        pairs = []
+        keys, xs, positions = self._keys, self._xs, self._positions
+        n = len(keys)
+        for i in range(n):
+            key, x = keys[i], xs[i]
+            y = positions[key][1]
+            j = i + 1
+            # sweep right until bodies are too far away in x to overlap
+            while j < n and xs[j] - x <= distance:
+                other_key = keys[j]
+                if abs(positions[other_key][1] - y) <= distance:
+                    pairs.append((key, other_key))
+                j += 1
+        return pairs
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """returns a list of (key, position) for bodies inside the box"""
+        lo = bisect_left(self._xs, min_x)
+        hi = bisect_right(self._xs, max_x)
+        results = []
+        for key in self._keys[lo:hi]:
+            pos = self._positions[key]
+            if min_y <= pos[1] <= max_y:
+                results.append((key, pos))
+        return results
+
+    def query_radius(self, pos, distance):
+        """candidate (key, position) bodies within distance of pos"""
+        x, y = pos[0], pos[1]
+        return self.query(x - distance, y - distance,
+                          x + distance, y + distance)
@@ -6,15 +6,19 @@ from collections import deque
 # (expected to run from root directory, use try/except if run from here)
 from comms import RobotCommands, RobotStatus  # pylint: disable=import-error
 from refbox import SSL_Referee  # pylint: disable=import-error
+from refbox.events import (RefereeEvent, referee_changes,  # noqa pylint: disable=import-error
+                           COMMAND_CHANGED)
 
 # import parts of gamestate that we've separated out for readability
 # (they are actually just part of the same class)
 try:
     from gamestate_field import Field
     from gamestate_analysis import Analysis
+    from broadphase import SweepAndPrune
 except (SystemError, ImportError):
     from .gamestate_field import Field
     from .gamestate_analysis import Analysis
+    from .broadphase import SweepAndPrune
 
 # RAW DATA PROCESSING CONSTANTS
 BALL_POS_HISTORY_LENGTH = 200
@@ -24,6 +28,8 @@ ROBOT_POS_HISTORY_LENGTH = 20
 ROBOT_LOST_TIME = .5
 # time after which lost robot is deleted from the gamestate
 ROBOT_REMOVE_TIME = 5
+# referee events kept for providers that fall behind
+REFEREE_EVENT_HISTORY_LENGTH = 100
 
 
 class GameState(Field, Analysis):
@@ -50,6 +56,16 @@ class GameState(Field, Analysis):
         # robot positions are np.array([x, y, w]) where w = rotation
         self._blue_robot_positions = dict()  # Robot ID: queue of (time, pos)
         self._yellow_robot_positions = dict()  # Robot ID: queue of (time, pos)
+        # Filtered state from vision tracking (see vision/tracking.py)
+        # (time, pos, velocity) of the ball at the latest measurement
+        self._tracked_ball = None
+        # Robot ID: (time, velocity) where velocity is np.array([x, y, w])
+        self._blue_robot_velocities = dict()
+        self._yellow_robot_velocities = dict()
+        # robots sorted by x for fast collision checks - synced lazily
+        # from the positions above whenever they have changed
+        self._broadphase = SweepAndPrune()
+        self._is_broadphase_stale = True
 
         # Commands Data (desired robot actions) - updated by strategy
         self._blue_robot_commands = dict()  # Robot ID: commands object
@@ -58,6 +74,11 @@ class GameState(Field, Analysis):
         # Status Info (robot sensory feedback) - update by comms/sim?
         self._blue_robot_status = dict()  # Robot ID: status object
         self._yellow_robot_status = dict()  # Robot ID: status object
+        # seconds from a vision capture until the commands worked out from
+        # it go out over the radio, measured by each team's comms
+        # (None until it has been measured)
+        self._blue_command_latency = None
+        self._yellow_command_latency = None
 
         # UI Inputs - updated by visualizer
         self.viz_inputs = {
@@ -87,6 +108,11 @@ class GameState(Field, Analysis):
         # about the refbox
         self._latest_refbox_message_string = b'\x08\x8f\xbb\xb7\x83\x86\xf5\xe7\x02\x10\r \x00(\x010\x9e\xb6\xe3\x9b\x82\xf5\xe7\x02:\x12\n\x00\x10\x00\x18\x00(\x000\x048\x80\xc6\x86\x8f\x01@\x00B\x12\n\x00\x10\x00\x18\x00(\x000\x048\x80\xc6\x86\x8f\x01@\x00P\x00'  # noqa
         # TODO - functions to get data from refbox message?
+        # Changes between consecutive refbox messages, oldest first
+        # (see refbox/events.py), and how many times the command changed -
+        # strategy compares this number to react once per new command
+        self._referee_events = deque([], REFEREE_EVENT_HISTORY_LENGTH)
+        self._referee_command_sequence = 0
         # Game status/events
         self.game_clock = None
 
@@ -126,8 +152,46 @@ class GameState(Field, Analysis):
         # print(f"{self._latest_refbox_message_string}\n")
         return refbox_message
 
-    def update_latest_refbox_message(self, message):
+    def update_latest_refbox_message(self, message, timestamp=None):
+        """
+        Store a new serialized refbox message, logging referee events for
+        whatever changed since the previous one. Returns the new events.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        old_message = None
+        if self._latest_refbox_message_string is not None:
+            old_message = self.get_latest_refbox_message()
+        new_message = SSL_Referee()
+        new_message.ParseFromString(message)
         self._latest_refbox_message_string = message
+        sequence = 0
+        if self._referee_events:
+            sequence = self._referee_events[-1].sequence + 1
+        events = []
+        for kind, team, old, new in referee_changes(old_message, new_message):
+            event = RefereeEvent(sequence, timestamp, kind, team, old, new)
+            events.append(event)
+            self._referee_events.append(event)
+            sequence += 1
+            if kind == COMMAND_CHANGED:
+                self._referee_command_sequence += 1
+        return events
+
+    def get_referee_events(self, after_sequence=None):
+        """
+        Referee events (oldest first) with a sequence number greater than
+        after_sequence, or all remembered events if it is None.
+        """
+        if after_sequence is None:
+            return list(self._referee_events)
+        return [event for event in self._referee_events
+                if event.sequence > after_sequence]
+
+    def get_referee_command_sequence(self):
+        """number of referee commands given so far, goes up by one for
+        every new command (even a repeat of the same command)"""
+        return self._referee_command_sequence
 
     # returns position ball was last seen at, or (0, 0) if unseen
     def get_ball_position(self):
@@ -147,6 +211,18 @@ class GameState(Field, Analysis):
         pos = pos.copy().astype(float)
         self._ball_position.appendleft((timestamp, pos))
 
+    def update_tracked_ball(self, timestamp, pos, velocity):
+        """filtered ball state at timestamp, e.g. from a Kalman filter"""
+        self._tracked_ball = (timestamp, pos.copy().astype(float),
+                              velocity.copy().astype(float))
+
+    def get_tracked_ball(self):
+        """(time, pos, velocity) from tracking, None if not fresh"""
+        if self._tracked_ball is None or \
+                time.time() - self._tracked_ball[0] > BALL_LOST_TIME:
+            return None
+        return self._tracked_ball
+
     def get_ball_last_update_time(self):
         if len(self._ball_position) == 0:
             # print("getting ball update time but ball never seen?!?")
@@ -200,18 +276,127 @@ class GameState(Field, Analysis):
                     all_robot_positions.append((key, robot_pos))
         return all_robot_positions
 
-    def update_robot_position(self, team, robot_id, pos):
+    def update_robot_position(self, team, robot_id, pos, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
         assert(len(pos) == 3 and type(pos) == np.ndarray)
         pos = pos.copy().astype(float)
         robot_positions = self.get_team_positions(team)
         if robot_id not in robot_positions:
             # assert(len(robot_positions) <= 6)
             robot_positions[robot_id] = deque([], ROBOT_POS_HISTORY_LENGTH)
-        robot_positions[robot_id].appendleft((time.time(), pos))
+        robot_positions[robot_id].appendleft((timestamp, pos))
+        self._is_broadphase_stale = True
+
+    def get_team_velocities(self, team):
+        if team == 'blue':
+            return self._blue_robot_velocities
+        else:
+            assert team == 'yellow'
+            return self._yellow_robot_velocities
+
+    def update_robot_velocity(self, team, robot_id, velocity, timestamp=None):
+        """filtered velocity (x, y, w) of a robot, e.g. from tracking"""
+        if timestamp is None:
+            timestamp = time.time()
+        self.get_team_velocities(team)[robot_id] = \
+            (timestamp, velocity.copy().astype(float))
+
+    def get_robot_velocity(self, team, robot_id):
+        """
+        velocity (x, y, w) from tracking if fresh, otherwise estimated
+        from the position history
+        """
+        tracked = self.get_team_velocities(team).get(robot_id)
+        if tracked is not None and \
+                time.time() - tracked[0] <= ROBOT_LOST_TIME:
+            return tracked[1]
+        positions = self.get_team_positions(team).get(robot_id)
+        if positions is None or len(positions) <= 1:
+            return np.array([0, 0, 0])
+        MIN_TIME_INTERVAL = .05
+        i = 0
+        while i < len(positions) - 1 and \
+                positions[0][0] - positions[i][0] < MIN_TIME_INTERVAL:
+            i += 1
+        time1, pos1 = positions[i]
+        time2, pos2 = positions[0]
+        if time2 == time1:
+            return np.array([0, 0, 0])
+        delta_pos = pos2 - pos1
+        delta_pos[2] = (delta_pos[2] + np.pi) % (2 * np.pi) - np.pi
+        return delta_pos / (time2 - time1)
+
+    def predict_robot_pos(self, team, robot_id, delta_time=0):
+        """
+        where a robot will be delta_time from now, extrapolating from when
+        it was last seen - so vision + radio latency can be compensated for
+        """
+        positions = self.get_team_positions(team).get(robot_id)
+        if not positions:
+            return self.get_robot_position(team, robot_id)
+        timestamp, pos = positions[0]
+        elapsed = time.time() + delta_time - timestamp
+        predicted = pos + self.get_robot_velocity(team, robot_id) * elapsed
+        predicted[2] = predicted[2] % (2 * np.pi)
+        return predicted
+
+    def get_latest_capture_time(self, team):
+        """when the newest robot position of team was seen, None if never"""
+        timestamps = [positions[0][0] for positions in
+                      self.get_team_positions(team).values() if positions]
+        if not timestamps:
+            return None
+        return max(timestamps)
+
+    def set_command_latency(self, team, latency):
+        """measured seconds from vision capture until commands are sent"""
+        if team == 'blue':
+            self._blue_command_latency = latency
+        else:
+            assert team == 'yellow'
+            self._yellow_command_latency = latency
+
+    def get_command_latency(self, team):
+        """seconds from vision capture until commands are sent, or None if
+        comms hasn't measured it (e.g. in the simulator)"""
+        if team == 'blue':
+            return self._blue_command_latency
+        else:
+            assert team == 'yellow'
+            return self._yellow_command_latency
+
+    def advance_world(self, target_time):
+        """
+        Add where every robot and the ball will be at target_time (e.g. when
+        the commands being worked out now reach the radio) as their newest
+        positions, so everything reading this gamestate acts on that.
+        Only for a provider's own copy of fields it doesn't own - the next
+        gamestate from the coordinator has the real positions again.
+        Lost robots and a lost ball are left alone, so they stay lost.
+        """
+        for team in ['blue', 'yellow']:
+            for robot_id in self.get_robot_ids(team):
+                if self.is_robot_lost(team, robot_id):
+                    continue
+                timestamp = self.get_robot_last_update_time(team, robot_id)
+                if timestamp >= target_time:
+                    continue
+                pos = self.predict_robot_pos(team, robot_id,
+                                             target_time - time.time())
+                self.update_robot_position(team, robot_id, pos, target_time)
+        if not self.is_ball_lost() and \
+                self.get_ball_last_update_time() < target_time:
+            pos = self.predict_ball_pos(target_time - time.time())
+            self.update_ball_position(pos, target_time)
 
     def remove_robot(self, team, robot_id):
         team_positions = self.get_team_positions(team)
         del team_positions[robot_id]
+        team_velocities = self.get_team_velocities(team)
+        if robot_id in team_velocities:
+            del team_velocities[robot_id]
+        self._is_broadphase_stale = True
         team_commands = self.get_team_commands(team)
         if robot_id in team_commands:
             del team_commands[robot_id]
@@ -219,6 +404,25 @@ class GameState(Field, Analysis):
         if robot_id in team_status:
             del team_status[robot_id]
 
+    def get_broadphase(self):
+        """
+        Returns the SweepAndPrune broad phase holding the latest robot
+        positions, for finding collision candidates without checking all pairs
+        """
+        if self._is_broadphase_stale:
+            self._broadphase.update(self.get_all_robot_positions())
+            self._is_broadphase_stale = False
+        return self._broadphase
+
+    def use_broadphase(self, broadphase):
+        """
+        Providers get a fresh gamestate every loop, so they can hand over
+        their own broad phase here to keep the robots' sort order from the
+        last tick (which makes re-sorting close to linear)
+        """
+        self._broadphase = broadphase
+        self._is_broadphase_stale = True
+
     def get_robot_last_update_time(self, team, robot_id):
         robot_positions = self.get_team_positions(team)
         if robot_id not in robot_positions:
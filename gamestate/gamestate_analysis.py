@@ -1,4 +1,5 @@
 # pylint: disable=no-member
+import time
 import numpy as np
 
 
@@ -125,7 +126,9 @@ class Analysis(object):
         return whether robot can be in a location without colliding
         with another robot
         """
-        for key, robot_pos in self.get_all_robot_positions():
+        radius_sum = self.ROBOT_RADIUS * 2 + buffer_dist
+        broadphase = self.get_broadphase()
+        for key, robot_pos in broadphase.query_radius(pos, radius_sum):
             if key == (team, robot_id):
                 continue
             if self.robot_overlap(pos, robot_pos, buffer_dist).any():
@@ -136,7 +139,9 @@ class Analysis(object):
         """
         return robot team and id occupying a current position, if any
         """
-        for (team, robot_id), robot_pos in self.get_all_robot_positions():
+        broadphase = self.get_broadphase()
+        for (team, robot_id), robot_pos in \
+                broadphase.query_radius(pos, self.ROBOT_RADIUS):
             if self.overlap(pos, robot_pos, self.ROBOT_RADIUS).any():
                 return (team, robot_id)
         return None
@@ -144,7 +149,11 @@ class Analysis(object):
     def get_ball_velocity(self):
         """
         Here we find ball velocity at most recent timestamp from position data
+        (or use the filtered velocity from tracking if there is a fresh one)
         """
+        tracked = self.get_tracked_ball()
+        if tracked is not None:
+            return tracked[2]
         # TOOD: smooth out this value by averaging?
         # prev_velocity = self.ball_velocity
         positions = self._ball_position
@@ -180,10 +189,17 @@ class Analysis(object):
         return velocity_now
 
     def predict_ball_pos(self, delta_time):
-        velocity_initial = self.get_ball_velocity()
+        tracked = self.get_tracked_ball()
+        if tracked is not None:
+            # predict from when the ball was seen, not from now
+            timestamp, ball_pos, velocity_initial = tracked
+            delta_time += time.time() - timestamp
+        else:
+            ball_pos = self.get_ball_position()
+            velocity_initial = self.get_ball_velocity()
         # print(f"{velocity_initial}")
         if not velocity_initial.any():
-            return (self.get_ball_position())
+            return ball_pos
         accel_direction = -velocity_initial / np.linalg.norm(velocity_initial)
         accel = accel_direction * self.BALL_DECCELERATION
         # truncate if we're going past the time where the ball would stop
@@ -202,7 +218,7 @@ class Analysis(object):
         predicted_pos_change = \
             0.5 * accel * delta_time ** 2 + velocity_initial * delta_time
         # print("dt: {} PPC: {}".format(delta_time, predicted_pos_change))
-        predicted_pos = predicted_pos_change + self.get_ball_position()
+        predicted_pos = predicted_pos_change + ball_pos
         return predicted_pos
 
     # TODO: move to strategy analysis
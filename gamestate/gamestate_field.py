@@ -67,12 +67,13 @@ class Field(object):
                 not in_own_defense_area and
                 not in_other_defense_area)
 
-    def random_position(self):
+    def random_position(self, rng):
         """
-        return a random position inside the field
+        return a random (x, y) position inside the field, drawn from the
+        caller's numpy.random.Generator so results can be reproduced
         """
-        return (np.random.randint(0, self.FIELD_X_LENGTH),
-                np.random.randint(0, self.FIELD_Y_LENGTH))
+        return (rng.integers(int(self.FIELD_MIN_X), int(self.FIELD_MAX_X)),
+                rng.integers(int(self.FIELD_MIN_Y), int(self.FIELD_MAX_Y)))
 
     def is_pos_valid(self, pos, team, robot_id):
         return self.is_position_open(pos, team, robot_id) and \
@@ -0,0 +1,39 @@
+# pylint: disable=import-error
+import numpy as np
+from ..broadphase import SweepAndPrune
+
+
+def brute_force_pairs(positions, distance):
+    pairs = set()
+    for i, (key, pos) in enumerate(positions):
+        for other_key, other_pos in positions[i + 1:]:
+            if (abs(pos[:2] - other_pos[:2]) <= distance).all():
+                pairs.add(frozenset([key, other_key]))
+    return pairs
+
+
+def test_candidate_pairs_match_brute_force():
+    """ Moves random bodies around for a few ticks.
+    Passes if sweep and prune finds exactly the brute force pairs each tick.
+    """
+    rng = np.random.default_rng(0)
+    sap = SweepAndPrune()
+    xy = rng.uniform(-2000, 2000, (60, 2))
+    for _ in range(5):
+        xy += rng.normal(0, 50, xy.shape)
+        positions = [(i, np.append(p, 0)) for i, p in enumerate(xy)]
+        sap.update(positions)
+        pairs = {frozenset(p) for p in sap.candidate_pairs(300)}
+        assert pairs == brute_force_pairs(positions, 300)
+
+
+def test_query_box():
+    sap = SweepAndPrune()
+    sap.update([('a', np.array([0, 0, 0])),
+                ('b', np.array([500, 0, 0])),
+                ('c', np.array([100, 900, 0]))])
+    keys = [key for key, pos in sap.query(-100, -100, 600, 100)]
+    assert sorted(keys) == ['a', 'b']
+    sap.update([('a', np.array([0, 0, 0])), ('c', np.array([100, 0, 0]))])
+    keys = [key for key, pos in sap.query_radius([0, 0], 200)]
+    assert sorted(keys) == ['a', 'c']
@@ -0,0 +1,28 @@
+# pylint: disable=import-error
+import time
+import numpy as np
+from ..gamestate import GameState
+
+
+def test_advance_world():
+    """ Puts a moving robot, a robot lost a second ago and a still ball in
+    the gamestate, then advances it to 0.1 s after the moving robot was seen.
+    Passes if the moving robot moved by its velocity, the lost robot stayed
+    lost, and the newest capture time is the moving robot's.
+    """
+    gs = GameState()
+    now = time.time()
+    gs.update_robot_position('blue', 1, np.array([0., 0., 0.]), now)
+    gs.update_robot_velocity('blue', 1, np.array([100., 0., 0.]), now)
+    gs.update_robot_position('blue', 2, np.array([500., 0., 0.]), now - 1)
+    gs.update_ball_position(np.array([10., 10.]), now)
+    assert gs.get_latest_capture_time('blue') == now
+    assert gs.get_latest_capture_time('yellow') is None
+    assert gs.get_command_latency('blue') is None
+
+    gs.advance_world(now + .1)
+    assert np.allclose(gs.get_robot_position('blue', 1), [10, 0, 0], atol=.01)
+    assert gs.get_robot_last_update_time('blue', 1) == now + .1
+    assert gs.is_robot_lost('blue', 2)
+    assert np.allclose(gs.get_robot_position('blue', 2), [500, 0, 0])
+    assert np.allclose(gs.get_ball_position(), [10, 10])
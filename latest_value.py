@@ -0,0 +1,41 @@
+'''Single-slot mailbox for handing data from one thread to another'''
+import threading
+
+
+class LatestValue(object):
+    """
+    Holds only the most recently published value, plus a version number
+    that increases with every publish, so readers can tell in O(1) whether
+    anything changed since they last looked.
+    Reading needs no lock: with a single writer, publishing swaps one
+    (version, value) tuple, which other threads see either fully or not at
+    all. Published values must not be modified afterwards.
+    The condition is only there to wake up readers blocked in wait().
+    """
+    def __init__(self, value=None):
+        self._slot = (0, value)
+        self._published = threading.Condition()
+
+    def publish(self, value):
+        with self._published:
+            self._slot = (self._slot[0] + 1, value)
+            self._published.notify_all()
+
+    def wait(self, version, timeout=None):
+        """
+        block until something newer than version is published, returns
+        False if that didn't happen within timeout seconds
+        """
+        if self._slot[0] != version:
+            return True
+        with self._published:
+            return self._published.wait_for(
+                lambda: self._slot[0] != version, timeout)
+
+    def get(self):
+        """returns (version, value) - version is 0 until the first publish"""
+        return self._slot
+
+    @property
+    def version(self):
+        return self._slot[0]
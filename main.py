@@ -7,13 +7,17 @@ import signal
 import argparse
 import logging
 import logging.handlers
-from vision import SSLVisionDataProvider
+from functools import partial
+from vision import SSLVisionDataProvider, ReplayDataProvider
 from refbox import RefboxDataProvider
 from strategy import Strategy
 from visualization import Visualizer
 from comms import Comms
+from comms.fake_radio import FakeRadio, SimulatedFeedback
 from simulator import Simulator
 from coordinator import Coordinator
+from recording.packet_log import log_path, SOURCE_VISION, SOURCE_REFBOX
+from recording.telemetry import TelemetryWriter
 import os
 
 # Remove pygame's annoying welcome message
@@ -35,6 +39,15 @@ parser.add_argument('-ss', '--simulator_setup',
 parser.add_argument('-nra', '--no_radio',
                     action="store_true",
                     help='Turns off command sending. No cmds go over radio.')
+parser.add_argument('-fra', '--fake_radio',
+                    action="store_true",
+                    help='Sends commands to an in-memory fake xbee instead '
+                         'of the radio (works with --simulate too).')
+parser.add_argument('-ts', '--team_size',
+                    type=int,
+                    default=6,
+                    help='Robots per team in each radio command frame '
+                         '(more for larger divisions, up to 15).')
 parser.add_argument('-nre', '--no_refbox',
                     action="store_true",
                     help='Ignores commands from the refbox.')
@@ -52,6 +65,36 @@ parser.add_argument('-hs', '--home_strategy',
 parser.add_argument('-as', '--away_strategy',
                     default='UI',
                     help="The strategy the away team should use to play.")
+parser.add_argument('-sd', '--seed',
+                    type=int,
+                    default=None,
+                    help='Seeds the random number generators of the '
+                         'strategies and simulator, for reproducible runs.')
+parser.add_argument('-rec', '--record',
+                    default=None,
+                    metavar='PREFIX',
+                    help='Records raw vision and refbox packets to '
+                         'PREFIX.vision.log and PREFIX.refbox.log for replay.')
+parser.add_argument('-rp', '--replay',
+                    default=None,
+                    metavar='PREFIX',
+                    help='Plays back a recording made with --record instead '
+                         'of listening to vision and the refbox.')
+parser.add_argument('-rps', '--replay_speed',
+                    type=float,
+                    default=1,
+                    help='Playback speed multiplier for --replay, '
+                         '0 plays as fast as possible.')
+parser.add_argument('-rpo', '--replay_offset',
+                    type=float,
+                    default=0,
+                    help='Seconds into the recording to start replaying.')
+parser.add_argument('-tel', '--telemetry',
+                    default=None,
+                    metavar='DIRECTORY',
+                    help='Writes a row of telemetry (positions, commands, '
+                         'flags) per gamestate update to DIRECTORY, load it '
+                         'with recording.load_telemetry.')
 parser.add_argument('-d', '--debug',
                     action="store_true",
                     help='Uses more verbose logging for debugging.')
@@ -60,6 +103,8 @@ command_line_args = parser.parse_args()
 # Create globals
 IS_SIMULATION = command_line_args.simulate
 NO_RADIO = command_line_args.no_radio
+FAKE_RADIO = command_line_args.fake_radio
+TEAM_SIZE = command_line_args.team_size
 NO_REFBOX = command_line_args.no_refbox
 CONTROL_BOTH_TEAMS = command_line_args.control_both_teams
 HOME_TEAM = command_line_args.home_team_color
@@ -67,6 +112,12 @@ AWAY_TEAM = 'yellow' if HOME_TEAM == 'blue' else 'blue'
 SIMULATOR_SETUP = command_line_args.simulator_setup
 HOME_STRATEGY = command_line_args.home_strategy
 AWAY_STRATEGY = command_line_args.away_strategy
+SEED = command_line_args.seed
+RECORD_PREFIX = command_line_args.record
+REPLAY_PREFIX = command_line_args.replay
+REPLAY_SPEED = command_line_args.replay_speed
+REPLAY_OFFSET = command_line_args.replay_offset
+TELEMETRY_DIRECTORY = command_line_args.telemetry
 
 
 def setup_logging():
@@ -92,27 +143,52 @@ if __name__ == '__main__':
 
     if IS_SIMULATION:
         NO_RADIO = True
-        providers += [Simulator(SIMULATOR_SETUP)]
+        # with a fake radio, Comms fills the robot statuses from feedback
+        providers += [Simulator(SIMULATOR_SETUP, SEED,
+                                simulate_robot_status=not FAKE_RADIO)]
+    elif REPLAY_PREFIX is not None:
+        # the replay provides the refbox messages too
+        NO_RADIO = True
+        NO_REFBOX = True
+        providers += [ReplayDataProvider(REPLAY_PREFIX, REPLAY_SPEED,
+                                         REPLAY_OFFSET)]
     else:
-        providers += [SSLVisionDataProvider()]
+        vision_log = None
+        if RECORD_PREFIX is not None:
+            vision_log = log_path(RECORD_PREFIX, SOURCE_VISION)
+        providers += [SSLVisionDataProvider(record_path=vision_log)]
 
     if not NO_REFBOX:
-        providers += [RefboxDataProvider()]
+        refbox_log = None
+        if RECORD_PREFIX is not None:
+            refbox_log = log_path(RECORD_PREFIX, SOURCE_REFBOX)
+        providers += [RefboxDataProvider(record_path=refbox_log)]
+
+    radio_factory = None
+    if FAKE_RADIO:
+        NO_RADIO = False
+        radio_factory = partial(FakeRadio, feedback=SimulatedFeedback())
 
     if not NO_RADIO:
-        providers += [Comms(HOME_TEAM)]
+        providers += [Comms(HOME_TEAM, radio_factory=radio_factory,
+                            team_size=TEAM_SIZE)]
         if CONTROL_BOTH_TEAMS:
-            providers += [Comms(AWAY_TEAM, True)]
+            providers += [Comms(AWAY_TEAM, True, radio_factory,
+                                team_size=TEAM_SIZE)]
 
-    providers += [Strategy(HOME_TEAM, HOME_STRATEGY)]
+    providers += [Strategy(HOME_TEAM, HOME_STRATEGY, SEED)]
 
     if CONTROL_BOTH_TEAMS:
-        providers += [Strategy(AWAY_TEAM, AWAY_STRATEGY)]
+        providers += [Strategy(AWAY_TEAM, AWAY_STRATEGY, SEED)]
 
     providers += [Visualizer()]
 
+    telemetry = None
+    if TELEMETRY_DIRECTORY is not None:
+        telemetry = TelemetryWriter(TELEMETRY_DIRECTORY)
+
     # Pass the providers to the coordinator
-    c = Coordinator(providers)
+    c = Coordinator(providers, telemetry)
 
     # Setup the exit handler
     def stop_it(signum, frame):
@@ -0,0 +1,112 @@
+"""Non-blocking UDP multicast receiver shared by the vision and refbox clients.
+Each wakeup drains every datagram waiting in the socket and keeps only the
+newest one per key (e.g. per camera), so a slow loop never works through a
+backlog of stale packets. Drop and backlog counts show how far behind the
+consumer was.
+"""
+import time
+import select
+import socket
+from struct import pack
+
+# big enough for any ssl-vision/refbox datagram
+MAX_DATAGRAM_SIZE = 65536
+
+
+class MulticastReceiver(object):
+    def __init__(self, group, port, interface=None):
+        """
+        Args:
+            group (str): multicast group to join, e.g. '224.5.23.2'
+            port (int): port the group sends to
+            interface (str, optional): ip of the interface to join the group
+                on, e.g. '127.0.0.1' for a sender on this machine that sends
+                over loopback. Defaults to the system's choice.
+        """
+        if not isinstance(group, str):
+            raise ValueError('IP type should be string type')
+        if not isinstance(port, int):
+            raise ValueError('Port type should be int type')
+        self.group = group
+        self.port = port
+        self.interface = interface
+        self.sock = None
+        # datagrams received / dropped because a newer one had the same key
+        self.num_received = 0
+        self.num_dropped = 0
+        # datagrams that were waiting at the last / worst wakeup
+        self.last_backlog = 0
+        self.max_backlog = 0
+
+    def connect(self):
+        """joins the multicast group, packets are queued from now on"""
+        self.sock = socket.socket(socket.AF_INET,
+                                  socket.SOCK_DGRAM,
+                                  socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.group, self.port))
+        if self.interface is None:
+            membership = pack("=4sl", socket.inet_aton(self.group),
+                              socket.INADDR_ANY)
+        else:
+            membership = socket.inet_aton(self.group) + \
+                socket.inet_aton(self.interface)
+        self.sock.setsockopt(socket.IPPROTO_IP,
+                             socket.IP_ADD_MEMBERSHIP,
+                             membership)
+        self.sock.setblocking(False)
+
+    def wait(self, timeout):
+        """block until a datagram is waiting, False on timeout"""
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        return bool(readable)
+
+    def drain(self, key=None, parse=None):
+        """
+        Read every waiting datagram without blocking.
+        Returns (all datagrams, latest datagrams), each a list of
+        (receive time, payload) in arrival order. The latest only keeps the
+        newest datagram for each key(payload) (or just the newest one if key
+        is None) - all are returned too, e.g. so they can be recorded.
+        If parse is given it is called once on each payload, the lists hold
+        (receive time, payload, parse(payload)) and key gets the parsed
+        message instead - so nothing has to decode a datagram twice.
+        """
+        datagrams = []
+        while True:
+            try:
+                payload, _ = self.sock.recvfrom(MAX_DATAGRAM_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            if parse is None:
+                datagrams.append((time.time(), payload))
+            else:
+                datagrams.append((time.time(), payload, parse(payload)))
+        latest = dict()
+        for i, datagram in enumerate(datagrams):
+            latest[None if key is None else key(datagram[-1])] = i
+        kept = sorted(latest.values())
+        self.num_received += len(datagrams)
+        self.num_dropped += len(datagrams) - len(kept)
+        self.last_backlog = len(datagrams)
+        self.max_backlog = max(self.max_backlog, len(datagrams))
+        return datagrams, [datagrams[i] for i in kept]
+
+    def receive(self, timeout, key=None, parse=None):
+        """wait up to timeout for datagrams, then drain them"""
+        if not self.wait(timeout):
+            return [], []
+        return self.drain(key, parse)
+
+    def get_stats(self):
+        return {
+            'received': self.num_received,
+            'dropped': self.num_dropped,
+            'last_backlog': self.last_backlog,
+            'max_backlog': self.max_backlog,
+        }
+
+    def disconnect(self):
+        if self.sock:
+            self.sock.close()
+        self.sock = None
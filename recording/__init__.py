@@ -0,0 +1,2 @@
+from .packet_log import PacketRecorder, PacketLog  # noqa
+from .telemetry import TelemetryWriter, load_telemetry  # noqa
@@ -0,0 +1,174 @@
+"""Binary log of raw network packets (ssl-vision + refbox) for replay.
+
+Data file layout:
+    FILE_MAGIC, then records of RECORD_HEADER (receive time, source,
+    camera id, payload length) followed by the raw protobuf payload.
+Index file (data path + INDEX_SUFFIX):
+    one INDEX_DTYPE entry (receive time, offset of the record) per record,
+    so a time window can be found with a binary search over a memory map
+    without reading the data file.
+"""
+import os
+import mmap
+import time
+import struct
+import threading
+import numpy as np
+
+FILE_MAGIC = b'RFCPLOG1'
+# receive timestamp, source, camera id (-1 if none), payload length
+RECORD_HEADER = struct.Struct('<dBhI')
+INDEX_DTYPE = np.dtype([('timestamp', '<f8'), ('offset', '<u8')])
+INDEX_ENTRY = struct.Struct('<dQ')
+INDEX_SUFFIX = '.idx'
+
+# packet sources
+SOURCE_VISION = 0
+SOURCE_REFBOX = 1
+SOURCE_NAMES = {SOURCE_VISION: 'vision', SOURCE_REFBOX: 'refbox'}
+
+# how often buffered writes are pushed to disk (in case we get killed)
+FLUSH_INTERVAL = 1
+
+
+def log_path(prefix, source):
+    """file name used for one source of a recording, e.g. match.vision.log"""
+    return '{}.{}.log'.format(prefix, SOURCE_NAMES[source])
+
+
+class PacketRecorder(object):
+    """Appends raw packets to a log file + its time index.
+    Safe to call from a receiver thread while other threads read the gs.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._data_file = open(path, 'wb')
+        self._index_file = open(path + INDEX_SUFFIX, 'wb')
+        self._data_file.write(FILE_MAGIC)
+        self._offset = len(FILE_MAGIC)
+        self._lock = threading.Lock()
+        self._last_flush_time = time.time()
+        self.num_records = 0
+
+    def record(self, payload, source, camera_id=-1, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        header = RECORD_HEADER.pack(timestamp, source, camera_id, len(payload))
+        with self._lock:
+            self._data_file.write(header)
+            self._data_file.write(payload)
+            self._index_file.write(INDEX_ENTRY.pack(timestamp, self._offset))
+            self._offset += len(header) + len(payload)
+            self.num_records += 1
+            if timestamp - self._last_flush_time > FLUSH_INTERVAL:
+                self._flush()
+                self._last_flush_time = timestamp
+
+    def _flush(self):
+        # data first, so the index never points past the end of the data
+        self._data_file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._data_file.close()
+            self._index_file.close()
+
+
+def build_index(path):
+    """
+    (Re)write the index of a data file by scanning it, e.g. if a recording
+    was killed before its index was flushed. Stops at a truncated record.
+    """
+    entries = []
+    with open(path, 'rb') as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError('{} is not a packet log'.format(path))
+        offset = len(FILE_MAGIC)
+        size = os.fstat(f.fileno()).st_size
+        while offset + RECORD_HEADER.size <= size:
+            timestamp, _, _, length = RECORD_HEADER.unpack(
+                f.read(RECORD_HEADER.size))
+            if offset + RECORD_HEADER.size + length > size:
+                break
+            entries.append((timestamp, offset))
+            f.seek(length, os.SEEK_CUR)
+            offset += RECORD_HEADER.size + length
+    index = np.array(entries, dtype=INDEX_DTYPE)
+    index.tofile(path + INDEX_SUFFIX)
+    return index
+
+
+class PacketLog(object):
+    """Memory-mapped reader for a log written by PacketRecorder.
+    Nothing is loaded into RAM up front, so multi-gigabyte logs open
+    instantly and a time window is found by binary search on the index.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError('{} is not a packet log'.format(path))
+        index_path = path + INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            build_index(path)
+        # (a recording in progress may end with a partially written entry)
+        num_entries = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+        if num_entries == 0:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        else:
+            self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode='r',
+                                   shape=(num_entries,))
+        # ignore index entries for records that never made it to disk
+        valid = self.index['offset'] + RECORD_HEADER.size <= len(self._data)
+        self.index = self.index[:np.count_nonzero(valid)]
+        if len(self.index) and not self._is_complete(len(self.index) - 1):
+            self.index = self.index[:-1]
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def timestamps(self):
+        return self.index['timestamp']
+
+    def start_time(self):
+        return self.timestamps[0] if len(self) else None
+
+    def end_time(self):
+        return self.timestamps[-1] if len(self) else None
+
+    def find(self, timestamp):
+        """index of the first record received at or after timestamp"""
+        return int(np.searchsorted(self.timestamps, timestamp, side='left'))
+
+    def _is_complete(self, i):
+        offset = int(self.index['offset'][i])
+        length = RECORD_HEADER.unpack_from(self._data, offset)[3]
+        return offset + RECORD_HEADER.size + length <= len(self._data)
+
+    def read(self, i):
+        """returns (timestamp, source, camera_id, payload bytes) of record i"""
+        offset = int(self.index['offset'][i])
+        timestamp, source, camera_id, length = \
+            RECORD_HEADER.unpack_from(self._data, offset)
+        start = offset + RECORD_HEADER.size
+        return timestamp, source, camera_id, self._data[start:start + length]
+
+    def records(self, start=0, stop=None):
+        """iterate over records start (inclusive) to stop (exclusive)"""
+        if stop is None:
+            stop = len(self)
+        for i in range(start, stop):
+            yield self.read(i)
+
+    def window(self, start_time, end_time):
+        """iterate over the records received between two timestamps"""
+        return self.records(self.find(start_time), self.find(end_time))
+
+    def close(self):
+        self.index = None
+        self._data.close()
+        self._file.close()
@@ -0,0 +1,127 @@
+"""Convert pcap captures (e.g. from tcpdump/wireshark at a competition) of
+the ssl-vision and refbox multicast traffic into packet logs for replay.
+Only classic libpcap files with IPv4 UDP packets are understood.
+
+    python -m recording.pcap capture.pcap match
+"""
+import struct
+import argparse
+
+try:
+    from packet_log import PacketRecorder, log_path, \
+        SOURCE_VISION, SOURCE_REFBOX
+except (SystemError, ImportError):
+    from .packet_log import PacketRecorder, log_path, \
+        SOURCE_VISION, SOURCE_REFBOX
+
+# (multicast group, port) : source
+DEFAULT_STREAMS = {
+    ('224.5.23.2', 10006): SOURCE_VISION,
+    ('224.5.23.1', 10003): SOURCE_REFBOX,
+}
+
+PCAP_MAGIC_US = 0xa1b2c3d4
+PCAP_MAGIC_NS = 0xa1b23c4d
+# link layer types : length of the link layer header
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINK_HEADER_LENGTHS = {
+    LINKTYPE_ETHERNET: 14,
+    LINKTYPE_RAW: 0,
+    LINKTYPE_LINUX_SLL: 16,
+}
+ETHERTYPE_VLAN = 0x8100
+IP_PROTOCOL_UDP = 17
+
+
+def read_pcap(path):
+    """yields (timestamp, link type, frame bytes) for each captured frame"""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+        if len(header) < 24:
+            raise ValueError('{} is not a pcap file'.format(path))
+        for endian in '<>':
+            magic = struct.unpack(endian + 'I', header[:4])[0]
+            if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+                break
+        else:
+            raise ValueError('{} is not a pcap file'.format(path))
+        subsecond = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+        link_type = struct.unpack(endian + 'I', header[20:24])[0]
+        record_header = struct.Struct(endian + 'IIII')
+        while True:
+            data = f.read(record_header.size)
+            if len(data) < record_header.size:
+                return
+            seconds, fraction, captured_length, _ = record_header.unpack(data)
+            frame = f.read(captured_length)
+            if len(frame) < captured_length:
+                return
+            yield seconds + fraction * subsecond, link_type, frame
+
+
+def udp_payload(link_type, frame):
+    """returns (destination ip, destination port, payload) or None"""
+    if link_type not in LINK_HEADER_LENGTHS:
+        return None
+    offset = LINK_HEADER_LENGTHS[link_type]
+    if link_type == LINKTYPE_ETHERNET:
+        ethertype = struct.unpack_from('>H', frame, 12)[0]
+        if ethertype == ETHERTYPE_VLAN:
+            offset += 4
+    if len(frame) < offset + 20 or frame[offset] >> 4 != 4:
+        return None
+    header_length = (frame[offset] & 0x0f) * 4
+    flags_fragment = struct.unpack_from('>H', frame, offset + 6)[0]
+    # fragments can't be matched to a port, vision packets are small anyway
+    if flags_fragment & 0x3fff or frame[offset + 9] != IP_PROTOCOL_UDP:
+        return None
+    ip = '.'.join(str(b) for b in frame[offset + 16:offset + 20])
+    udp = offset + header_length
+    port, udp_length = struct.unpack_from('>HH', frame, udp + 2)
+    return ip, port, frame[udp + 8:udp + udp_length]
+
+
+def camera_id(payload):
+    """camera id of a vision packet, -1 if it has no detection"""
+    import sslclient
+    wrapper = sslclient.messages_robocup_ssl_wrapper_pb2.SSL_WrapperPacket
+    data = wrapper.FromString(payload)
+    if data.HasField('detection'):
+        return data.detection.camera_id
+    return -1
+
+
+def convert_pcap(pcap_path, prefix, streams=DEFAULT_STREAMS):
+    """
+    Write the vision and refbox packets of a capture to PREFIX.vision.log
+    and PREFIX.refbox.log, returns the number of packets of each source.
+    """
+    recorders = {source: PacketRecorder(log_path(prefix, source))
+                 for source in set(streams.values())}
+    try:
+        for timestamp, link_type, frame in read_pcap(pcap_path):
+            packet = udp_payload(link_type, frame)
+            if packet is None or packet[:2] not in streams:
+                continue
+            payload = packet[2]
+            source = streams[packet[:2]]
+            cid = camera_id(payload) if source == SOURCE_VISION else -1
+            recorders[source].record(payload, source, cid, timestamp)
+    finally:
+        for recorder in recorders.values():
+            recorder.close()
+    return {source: recorder.num_records
+            for source, recorder in recorders.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Converts a pcap capture to packet logs for replay')
+    parser.add_argument('pcap', help='path of the capture to convert')
+    parser.add_argument('prefix', help='prefix of the packet logs to write')
+    args = parser.parse_args()
+    counts = convert_pcap(args.pcap, args.prefix)
+    print('vision packets: {}, refbox packets: {}'.format(
+        counts.get(SOURCE_VISION, 0), counts.get(SOURCE_REFBOX, 0)))
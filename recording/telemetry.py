@@ -0,0 +1,156 @@
+"""Columnar per-tick telemetry of the coordinator's gamestate.
+Rows are written into preallocated column arrays; every CHUNK_SIZE rows the
+full chunk is handed to a background thread which saves it as one .npz
+segment, so recording a tick costs a few array assignments.
+
+Robots live in fixed slots (see robot_slot) so every tick has the same
+shape: columns are (ticks,) or (ticks, ROBOT_SLOTS, ...) arrays.
+
+    telemetry = load_telemetry('logs/match_telemetry')
+    telemetry['ball'][:, 0]  # ball x over the whole match
+"""
+import os
+import glob
+import time
+import queue
+import threading
+import numpy as np
+
+CHUNK_SIZE = 1024
+# robot ids 0 - 15 for each team
+ROBOT_IDS_PER_TEAM = 16
+TEAMS = ('blue', 'yellow')
+ROBOT_SLOTS = ROBOT_IDS_PER_TEAM * len(TEAMS)
+# bits of the flags column
+FLAG_VISIBLE = 1
+FLAG_KICKING = 2
+FLAG_DRIBBLING = 4
+FLAG_CHARGING = 8
+
+# column name : (per row shape, dtype)
+COLUMNS = {
+    'timestamp': ((), np.float64),
+    'ball': ((2,), np.float32),
+    'ball_velocity': ((2,), np.float32),
+    # (x, y, w) of each robot, nan if not seen
+    'robots': ((ROBOT_SLOTS, 3), np.float32),
+    # speeds derived from waypoints (robot perspective x, y, w)
+    'speeds': ((ROBOT_SLOTS, 3), np.float32),
+    # waypoint the robot is currently heading to, nan if none
+    'waypoint': ((ROBOT_SLOTS, 3), np.float32),
+    'num_waypoints': ((ROBOT_SLOTS,), np.uint8),
+    'charge_level': ((ROBOT_SLOTS,), np.float32),
+    'flags': ((ROBOT_SLOTS,), np.uint8),
+}
+SEGMENT_PATTERN = 'telemetry_{:06d}.npz'
+
+
+def robot_slot(team, robot_id):
+    return TEAMS.index(team) * ROBOT_IDS_PER_TEAM + robot_id
+
+
+def slot_robot(slot):
+    """(team, robot_id) of a slot"""
+    return TEAMS[slot // ROBOT_IDS_PER_TEAM], slot % ROBOT_IDS_PER_TEAM
+
+
+def _empty_chunk(size):
+    return {name: np.zeros((size,) + shape, dtype=dtype)
+            for name, (shape, dtype) in COLUMNS.items()}
+
+
+class TelemetryWriter(object):
+    """Appends one row per record() call to .npz segments in directory"""
+    def __init__(self, directory, chunk_size=CHUNK_SIZE):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        self._chunk = _empty_chunk(chunk_size)
+        self._row = 0
+        self._num_segments = 0
+        self.num_rows = 0
+        # full chunks waiting to be saved, None tells the writer to stop
+        self._segment_q = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._write_loop)
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    def record(self, gs, timestamp=None):
+        """append the current state of gs as a new row"""
+        chunk, row = self._chunk, self._row
+        robots = chunk['robots'][row]
+        waypoint = chunk['waypoint'][row]
+        robots[:] = np.nan
+        waypoint[:] = np.nan
+        chunk['speeds'][row] = 0
+        chunk['num_waypoints'][row] = 0
+        chunk['charge_level'][row] = 0
+        flags = chunk['flags'][row]
+        flags[:] = 0
+        for (team, robot_id), pos in gs.get_all_robot_positions():
+            if not 0 <= robot_id < ROBOT_IDS_PER_TEAM:
+                continue
+            slot = robot_slot(team, robot_id)
+            robots[slot] = pos
+            flags[slot] = FLAG_VISIBLE
+            # (don't use get_robot_commands, it would add missing ones to gs)
+            status = gs.get_team_status(team).get(robot_id)
+            if status is not None:
+                chunk['charge_level'][row, slot] = status.charge_level
+            commands = gs.get_team_commands(team).get(robot_id)
+            if commands is None:
+                continue
+            chunk['speeds'][row, slot] = commands.get_speeds()
+            if commands.waypoints:
+                waypoint[slot] = commands.waypoints[0]
+                chunk['num_waypoints'][row, slot] = \
+                    min(len(commands.waypoints), 255)
+            flags[slot] |= FLAG_KICKING * commands.is_kicking | \
+                FLAG_DRIBBLING * commands.is_dribbling | \
+                FLAG_CHARGING * commands.is_charging
+        if timestamp is None:
+            timestamp = time.time()
+        chunk['timestamp'][row] = timestamp
+        chunk['ball'][row] = gs.get_ball_position()
+        chunk['ball_velocity'][row] = gs.get_ball_velocity()
+        self._row += 1
+        self.num_rows += 1
+        if self._row == self.chunk_size:
+            self._hand_off_chunk()
+
+    def _hand_off_chunk(self):
+        path = os.path.join(self.directory,
+                            SEGMENT_PATTERN.format(self._num_segments))
+        self._segment_q.put((path, self._chunk, self._row))
+        self._num_segments += 1
+        self._chunk = _empty_chunk(self.chunk_size)
+        self._row = 0
+
+    def _write_loop(self):
+        while True:
+            item = self._segment_q.get()
+            if item is None:
+                return
+            path, chunk, num_rows = item
+            np.savez(path, **{name: column[:num_rows]
+                              for name, column in chunk.items()})
+
+    def close(self):
+        """save the partially filled chunk and wait for all writes"""
+        if self._row:
+            self._hand_off_chunk()
+        self._segment_q.put(None)
+        self._writer_thread.join()
+
+
+def load_telemetry(directory):
+    """whole recording as a dict of column name : array over all ticks"""
+    paths = sorted(glob.glob(os.path.join(directory, 'telemetry_*.npz')))
+    if not paths:
+        return _empty_chunk(0)
+    segments = []
+    for path in paths:
+        with np.load(path) as segment:
+            segments.append({name: segment[name] for name in COLUMNS})
+    return {name: np.concatenate([segment[name] for segment in segments])
+            for name in COLUMNS}
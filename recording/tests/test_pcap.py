@@ -0,0 +1,38 @@
+import struct
+import socket
+from ..pcap import convert_pcap
+from ..packet_log import PacketLog, log_path, SOURCE_VISION, SOURCE_REFBOX
+
+
+def udp_frame(ip, port, payload):
+    """ethernet + ipv4 + udp headers around payload (checksums unchecked)"""
+    udp = struct.pack('>HHHH', 40000, port, 8 + len(payload), 0) + payload
+    ipv4 = struct.pack('>BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 1, 17,
+                       0, socket.inet_aton('10.0.0.1'),
+                       socket.inet_aton(ip)) + udp
+    return b'\x01' * 12 + struct.pack('>H', 0x0800) + ipv4
+
+
+def test_convert_pcap(tmp_path):
+    """ Converts a capture with a refbox packet, an unrelated packet and an
+    (empty) vision packet. Passes if each lands in the right log.
+    """
+    frames = [(1.5, udp_frame('224.5.23.1', 10003, b'refbox')),
+              (1.75, udp_frame('10.0.0.2', 5353, b'mdns')),
+              (2.0, udp_frame('224.5.23.2', 10006, b''))]
+    path = str(tmp_path / 'capture.pcap')
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+        for timestamp, frame in frames:
+            f.write(struct.pack('<IIII', int(timestamp),
+                                int(timestamp % 1 * 1e6),
+                                len(frame), len(frame)))
+            f.write(frame)
+    prefix = str(tmp_path / 'match')
+    counts = convert_pcap(path, prefix)
+    assert counts == {SOURCE_VISION: 1, SOURCE_REFBOX: 1}
+    refbox = PacketLog(log_path(prefix, SOURCE_REFBOX))
+    assert refbox.read(0)[0] == 1.5
+    assert bytes(refbox.read(0)[3]) == b'refbox'
+    vision = PacketLog(log_path(prefix, SOURCE_VISION))
+    assert vision.read(0)[:3] == (2.0, SOURCE_VISION, -1)
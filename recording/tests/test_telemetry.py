@@ -0,0 +1,44 @@
+import numpy as np
+from simulator import Simulator
+from ..telemetry import (TelemetryWriter, load_telemetry, robot_slot,
+                         FLAG_VISIBLE, FLAG_KICKING, ROBOT_SLOTS,
+                         CHUNK_SIZE)
+
+
+def test_round_trip_over_several_chunks(tmp_path):
+    """ Records 25 ticks of the full_teams setup in chunks of 10.
+    Passes if the loaded columns hold every tick, in order.
+    """
+    simulator = Simulator("full_teams")
+    simulator.pre_run()
+    gs = simulator.gs
+    gs.get_robot_commands('blue', 1).is_kicking = True
+    directory = str(tmp_path / 'telemetry')
+    writer = TelemetryWriter(directory, chunk_size=10)
+    for i in range(25):
+        writer.record(gs, timestamp=i)
+    writer.close()
+    telemetry = load_telemetry(directory)
+    assert (telemetry['timestamp'] == np.arange(25)).all()
+    assert telemetry['robots'].shape == (25, ROBOT_SLOTS, 3)
+    slot = robot_slot('blue', 1)
+    assert np.allclose(telemetry['robots'][-1, slot],
+                       gs.get_robot_position('blue', 1))
+    assert telemetry['flags'][0, slot] == FLAG_VISIBLE | FLAG_KICKING
+    assert np.isnan(telemetry['robots'][0, robot_slot('blue', 15)]).all()
+
+
+def test_default_chunks(tmp_path):
+    """ Records more ticks than fit in one chunk with the default chunk
+    size (its speed is timed in benchmarks/telemetry_benchmark.py).
+    Passes if every tick is loaded back.
+    """
+    simulator = Simulator("full_teams")
+    simulator.pre_run()
+    directory = str(tmp_path / 'telemetry')
+    writer = TelemetryWriter(directory)
+    for i in range(CHUNK_SIZE + 10):
+        writer.record(simulator.gs, timestamp=i)
+    writer.close()
+    telemetry = load_telemetry(directory)
+    assert (telemetry['timestamp'] == np.arange(CHUNK_SIZE + 10)).all()
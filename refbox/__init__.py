@@ -2,3 +2,4 @@
 # pylint: disable=all
 from .referee_pb2 import SSL_Referee  # noqa
 from .refbox import RefboxDataProvider  # noqa
+from .events import RefereeEvent  # noqa
@@ -0,0 +1,223 @@
+"""Local stand-in for the game controller, for testing without one.
+Multicasts SSL_Referee messages following a scripted timeline, at a
+configurable rate (up to stress test rates), to the standard refbox
+group/port or any other one.
+
+A timeline file has one step per line: how long the step lasts (seconds),
+the command, then optional key=value changes to the rest of the message.
+Blank lines and anything after a # are ignored.
+
+    # kickoff, then a free kick after a foul
+    2   HALT    stage=NORMAL_FIRST_HALF_PRE blue_goalie=0 yellow_goalie=0
+    2   STOP
+    3   PREPARE_KICKOFF_BLUE
+    10  NORMAL_START    stage=NORMAL_FIRST_HALF
+    2   STOP
+    5   BALL_PLACEMENT_YELLOW   x=1000 y=-500
+    10  DIRECT_FREE_YELLOW
+    1   STOP    blue_score=1 side=positive
+
+Run it from the root directory:
+
+    python -m refbox.emitter refbox/timelines/match.txt --rate 100
+"""
+import time
+import socket
+import argparse
+from collections import namedtuple
+
+try:
+    from referee_pb2 import SSL_Referee
+except (SystemError, ImportError):
+    from .referee_pb2 import SSL_Referee
+
+DEFAULT_GROUP = '224.5.23.1'
+DEFAULT_PORT = 10003
+# messages per second - the game controller sends about this many
+DEFAULT_RATE = 10
+
+# one step of a timeline, changes are (key, value) pairs (see apply_changes)
+TimelineStep = namedtuple('TimelineStep', ['duration', 'command', 'changes'])
+
+
+def _microseconds(timestamp):
+    return int(timestamp * 1e6)
+
+
+def parse_timeline(lines):
+    """list of TimelineSteps from the lines of a timeline file"""
+    steps = []
+    for line_number, line in enumerate(lines, 1):
+        words = line.split('#')[0].split()
+        if not words:
+            continue
+        try:
+            duration = float(words[0])
+            command = SSL_Referee.Command.Value(words[1])
+            changes = [tuple(word.split('=', 1)) for word in words[2:]]
+            for change in changes:
+                if len(change) != 2:
+                    raise ValueError('expected key=value, got ' + change[0])
+                # check the change applies before we start sending
+                apply_changes(SSL_Referee(), [change])
+        except (IndexError, ValueError) as e:
+            raise ValueError('bad timeline line {}: {} ({})'.format(
+                line_number, line.strip(), e))
+        steps.append(TimelineStep(duration, command, changes))
+    return steps
+
+
+def load_timeline(path):
+    with open(path) as f:
+        return parse_timeline(f)
+
+
+def apply_changes(message, changes):
+    """
+    Apply timeline key=value changes to an SSL_Referee message:
+        stage=<Stage name>
+        blue_score=, yellow_score=, blue_goalie=, yellow_goalie= (ints)
+        blue_name=, yellow_name=
+        x=, y= (designated position for ball placement, mm)
+        side=positive/negative (half the blue team defends)
+    """
+    for key, value in changes:
+        if key == 'stage':
+            message.stage = SSL_Referee.Stage.Value(value)
+        elif key in ('x', 'y'):
+            setattr(message.designated_position, key, float(value))
+        elif key == 'side':
+            if value not in ('positive', 'negative'):
+                raise ValueError('side should be positive or negative')
+            message.blueTeamOnPositiveHalf = value == 'positive'
+        elif key.split('_', 1)[0] in ('blue', 'yellow') and \
+                key.split('_', 1)[-1] in ('score', 'goalie', 'name'):
+            team, field = key.split('_', 1)
+            if field != 'name':
+                value = int(value)
+            setattr(getattr(message, team), field, value)
+        else:
+            raise ValueError('unknown timeline key ' + key)
+
+
+def initial_message():
+    """SSL_Referee with every required field set, as at the start of a game"""
+    message = SSL_Referee()
+    message.packet_timestamp = 0
+    message.stage = SSL_Referee.NORMAL_FIRST_HALF_PRE
+    message.command = SSL_Referee.HALT
+    message.command_counter = 0
+    message.command_timestamp = _microseconds(time.time())
+    for team in [message.yellow, message.blue]:
+        team.name = ''
+        team.score = 0
+        team.red_cards = 0
+        team.yellow_cards = 0
+        team.timeouts = 4
+        team.timeout_time = 300000000
+        team.goalie = 0
+    message.blueTeamOnPositiveHalf = False
+    return message
+
+
+class RefboxEmitter(object):
+    """Sends SSL_Referee messages to a multicast group"""
+    def __init__(self, group=DEFAULT_GROUP, port=DEFAULT_PORT,
+                 rate=DEFAULT_RATE, interface=None):
+        """
+        Args:
+            group (str): multicast group to send to
+            port (int): port to send to
+            rate (float): messages sent per second while a command holds
+            interface (str, optional): ip of the interface to send from,
+                e.g. '127.0.0.1' to keep the messages on this machine (the
+                receivers must join the group on the same interface, see
+                RefboxClient). Defaults to the system's multicast interface.
+        """
+        self.group = group
+        self.port = port
+        self.rate = rate
+        self.message = initial_message()
+        self.num_sent = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM,
+                                  socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        # so receivers on this machine get the messages too
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if interface is not None:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                 socket.inet_aton(interface))
+
+    def set_command(self, command, changes=()):
+        """give a new command (the command counter goes up even if the
+        command is the same), along with any other changes to the message"""
+        apply_changes(self.message, changes)
+        self.message.command = command
+        self.message.command_counter += 1
+        self.message.command_timestamp = _microseconds(time.time())
+
+    def send(self):
+        """send the current message, stamped with the current time"""
+        self.message.packet_timestamp = _microseconds(time.time())
+        self.sock.sendto(self.message.SerializeToString(),
+                         (self.group, self.port))
+        self.num_sent += 1
+
+    def hold(self, duration):
+        """keep sending the current message at rate for duration seconds -
+        if sending falls behind, messages are sent back to back to catch up
+        """
+        start_time = time.time()
+        num_messages = max(1, int(round(duration * self.rate)))
+        for i in range(num_messages):
+            delay = start_time + i / self.rate - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self.send()
+        remaining = start_time + duration - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def play(self, timeline, speed=1, loop=False):
+        """
+        Give each command of the timeline in turn.
+        speed: N runs the timeline N times faster (so commands change N times
+            as often) - the message rate stays the same
+        """
+        while True:
+            for step in timeline:
+                self.set_command(step.command, step.changes)
+                self.hold(step.duration / speed)
+            if not loop:
+                return
+
+    def close(self):
+        self.sock.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Multicasts refbox messages from a scripted timeline')
+    parser.add_argument('timeline', help='path of the timeline file')
+    parser.add_argument('-g', '--group', default=DEFAULT_GROUP,
+                        help='multicast group to send to')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT,
+                        help='port to send to')
+    parser.add_argument('-r', '--rate', type=float, default=DEFAULT_RATE,
+                        help='messages per second')
+    parser.add_argument('-sp', '--speed', type=float, default=1,
+                        help='play the timeline this many times faster')
+    parser.add_argument('-i', '--interface', default=None,
+                        help='ip of the interface to send from '
+                             '(127.0.0.1 keeps it on this machine)')
+    parser.add_argument('-l', '--loop', action='store_true',
+                        help='start the timeline over when it ends')
+    args = parser.parse_args()
+    emitter = RefboxEmitter(args.group, args.port, args.rate, args.interface)
+    try:
+        emitter.play(load_timeline(args.timeline), args.speed, args.loop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emitter.close()
+        print('sent {} messages'.format(emitter.num_sent))
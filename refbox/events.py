@@ -0,0 +1,54 @@
+"""Turns the stream of full referee messages into discrete change events.
+The refbox repeats its whole state in every packet; comparing each message to
+the previous one gives the transitions (new command, stage, score, goalie or
+side) that strategy actually cares about. See GameState.get_referee_events.
+"""
+from collections import namedtuple
+
+# kinds of referee events
+COMMAND_CHANGED = 'command'
+STAGE_CHANGED = 'stage'
+SCORE_CHANGED = 'score'
+GOALIE_CHANGED = 'goalie'
+SIDE_CHANGED = 'side'
+
+# sequence: increasing number of the event within the game
+# team: 'blue'/'yellow' for score + goalie events, None otherwise
+# old/new: value before and after the change (old is None for the first)
+RefereeEvent = namedtuple('RefereeEvent',
+                          ['sequence', 'timestamp', 'kind', 'team',
+                           'old', 'new'])
+
+
+def referee_changes(old_message, new_message):
+    """
+    Differences between two SSL_Referee messages as a list of
+    (kind, team, old value, new value), in the order they should be handled.
+    A new command is detected from command_counter as well as the command, so
+    e.g. STOP after STOP (a second foul) is still a change.
+    """
+    if old_message is None:
+        return [(COMMAND_CHANGED, None, None, new_message.command)]
+    changes = []
+    if new_message.stage != old_message.stage:
+        changes.append(
+            (STAGE_CHANGED, None, old_message.stage, new_message.stage))
+    for team in ['blue', 'yellow']:
+        old_info = getattr(old_message, team)
+        new_info = getattr(new_message, team)
+        if new_info.score != old_info.score:
+            changes.append(
+                (SCORE_CHANGED, team, old_info.score, new_info.score))
+        if new_info.goalie != old_info.goalie:
+            changes.append(
+                (GOALIE_CHANGED, team, old_info.goalie, new_info.goalie))
+    if new_message.blueTeamOnPositiveHalf != \
+            old_message.blueTeamOnPositiveHalf:
+        changes.append((SIDE_CHANGED, None,
+                        old_message.blueTeamOnPositiveHalf,
+                        new_message.blueTeamOnPositiveHalf))
+    if new_message.command_counter != old_message.command_counter or \
+            new_message.command != old_message.command:
+        changes.append(
+            (COMMAND_CHANGED, None, old_message.command, new_message.command))
+    return changes
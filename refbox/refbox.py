@@ -1,14 +1,20 @@
 import socket
-from struct import pack
 from coordinator import Provider
+from multicast import MulticastReceiver
+from recording.packet_log import PacketRecorder, SOURCE_REFBOX
 from .referee_pb2 import SSL_Referee
 
 
+# how long receive() waits for a packet
+RECEIVE_TIMEOUT = .1
+
+
 class RefboxClient:
     """
     A client class to get information from the refbox.
     """
-    def __init__(self, ip='224.5.23.1', port=10003):
+    def __init__(self, ip='224.5.23.1', port=10003, recorder=None,
+                 interface=None):
         """
         Creates a RefboxClient object
 
@@ -17,9 +23,17 @@ class RefboxClient:
                 Defaults to '224.5.23.1'.
             port (int, optional): The port to listen for refbox messages on.
                 Defaults to 10003.
+            recorder (PacketRecorder, optional): If given, every raw packet
+                received is appended to its log. Defaults to None.
+            interface (str, optional): ip of the interface to listen on,
+                e.g. '127.0.0.1' for a local refbox.emitter sending over
+                loopback. Defaults to the system's choice.
         """
         self.ip = ip
         self.port = port
+        self.interface = interface
+        self.recorder = recorder
+        self.receiver = None
 
     def connect(self):
         """
@@ -29,26 +43,13 @@ class RefboxClient:
             ValueError: If IP is not string
             ValueError: If port is not int type
         """
-
-        if not isinstance(self.ip, str):
-            raise ValueError('IP type should be string type')
-        if not isinstance(self.port, int):
-            raise ValueError('Port type should be int type')
-
-        self.sock = socket.socket(socket.AF_INET,
-                                  socket.SOCK_DGRAM,
-                                  socket.IPPROTO_UDP)
-        self.sock.settimeout(0.1)
-        self.sock.setsockopt(socket.IPPROTO_IP,
-                             socket.IP_ADD_MEMBERSHIP,
-                             pack("=4sl",
-                                  socket.inet_aton(self.ip),
-                                  socket.INADDR_ANY))
-        self.sock.bind((self.ip, self.port))
+        self.receiver = MulticastReceiver(self.ip, self.port, self.interface)
+        self.receiver.connect()
 
     def receive(self):
         """
-        Receive a single packet from the refbox
+        Receive the newest packet from the refbox, skipping any older ones
+        that queued up in the meantime
 
         Returns:
             SSL_Referee: The protobuf message from the refbox
@@ -56,7 +57,13 @@ class RefboxClient:
         Raises:
             socket.timeout exception if no packets are received
         """
-        data, _ = self.sock.recvfrom(1024)
+        datagrams, latest = self.receiver.receive(RECEIVE_TIMEOUT)
+        if not latest:
+            raise socket.timeout()
+        if self.recorder:
+            for receive_time, data in datagrams:
+                self.recorder.record(data, SOURCE_REFBOX, -1, receive_time)
+        _, data = latest[-1]
         decoded_data = SSL_Referee.FromString(data)
         return decoded_data
 
@@ -64,8 +71,9 @@ class RefboxClient:
         """
         Closes the socket
         """
-        if self.sock:
-            self.sock.close()
+        if self.receiver:
+            self.receiver.disconnect()
+        self.receiver = None
 
 
 class RefboxDataProvider(Provider):
@@ -74,7 +82,7 @@ class RefboxDataProvider(Provider):
     Link to SSL Referee User Manual:
         https://robocup-ssl.github.io/ssl-refbox/manual.html
     """
-    def __init__(self, ip='224.5.23.1', port=10003):
+    def __init__(self, ip='224.5.23.1', port=10003, record_path=None):
         """
         Creates a RefboxDataProvider object
 
@@ -84,21 +92,29 @@ class RefboxDataProvider(Provider):
                 Defaults to '224.5.23.1'.
             port (int, optional): The port to listen for messages.
                 Defaults to 10003.
+            record_path (str, optional): If given, raw refbox packets are
+                recorded to a packet log at this path. Defaults to None.
         """
         super().__init__()
         self._client = None
+        self._recorder = None
+        self._record_path = record_path
         self._receive_data_thread = None
         self._ip = ip
         self._port = port
-        self._owned_fields = ['_latest_refbox_message_string']
+        self._owned_fields = ['_latest_refbox_message_string',
+                              '_referee_events',
+                              '_referee_command_sequence']
 
     def pre_run(self):
         """
         Start updating the gamestate with the latest info.
         """
+        if self._record_path is not None:
+            self._recorder = PacketRecorder(self._record_path)
         # Connect to client
         try:
-            self._client = RefboxClient(self._ip, self._port)
+            self._client = RefboxClient(self._ip, self._port, self._recorder)
             self._client.connect()
         except Exception:
             self.logger.exception("failed to connect to refbox")
@@ -109,8 +125,13 @@ class RefboxDataProvider(Provider):
         Stop updating the gamestate and close the client
         """
         if self._client:
+            self.logger.info('refbox packets: {}'.format(
+                self._client.receiver.get_stats()))
             self._client.disconnect()
         self._client = None
+        if self._recorder:
+            self._recorder.close()
+        self._recorder = None
 
     def run(self):
         """
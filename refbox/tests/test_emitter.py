@@ -0,0 +1,54 @@
+import time
+import pytest
+from ..referee_pb2 import SSL_Referee
+from ..refbox import RefboxClient
+from ..emitter import RefboxEmitter, parse_timeline
+
+GROUP = '224.5.23.1'
+PORT = 10912
+
+
+def test_parse_timeline():
+    """ Parses a timeline with comments, blank lines and message changes.
+    Passes if each step is read, and a bad line says which line it was.
+    """
+    steps = parse_timeline([
+        '# comment',
+        '',
+        '2 STOP  stage=NORMAL_FIRST_HALF  # trailing comment',
+        '.5 BALL_PLACEMENT_BLUE x=100 y=-20.5 blue_score=1',
+    ])
+    assert [(step.duration, step.command) for step in steps] == \
+        [(2, SSL_Referee.STOP), (.5, SSL_Referee.BALL_PLACEMENT_BLUE)]
+    assert steps[1].changes == [('x', '100'), ('y', '-20.5'),
+                                ('blue_score', '1')]
+    with pytest.raises(ValueError, match='line 2'):
+        parse_timeline(['1 STOP', '1 STOP blue_shoe_size=3'])
+
+
+def test_emitter_to_client():
+    """ Plays a two step timeline to a RefboxClient over loopback.
+    Passes if the client gets the newest message, with the command counted
+    and the changes applied.
+    """
+    client = RefboxClient(GROUP, PORT, interface='127.0.0.1')
+    try:
+        client.connect()
+    except OSError:
+        pytest.skip('multicast is not available')
+    emitter = RefboxEmitter(GROUP, PORT, rate=100, interface='127.0.0.1')
+    try:
+        emitter.play(parse_timeline([
+            '.05 STOP',
+            '.05 BALL_PLACEMENT_YELLOW x=1000 y=-500 yellow_goalie=3',
+        ]))
+        time.sleep(.05)
+        message = client.receive()
+    finally:
+        emitter.close()
+        client.disconnect()
+    assert message.command == SSL_Referee.BALL_PLACEMENT_YELLOW
+    assert message.command_counter == 2
+    assert message.yellow.goalie == 3
+    assert (message.designated_position.x,
+            message.designated_position.y) == (1000, -500)
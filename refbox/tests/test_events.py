@@ -0,0 +1,62 @@
+import logging
+from gamestate import GameState
+from strategy.strategy import Strategy
+from ..referee_pb2 import SSL_Referee
+from ..events import COMMAND_CHANGED, SCORE_CHANGED
+
+
+def referee_message(command, command_counter, blue_score=0):
+    message = SSL_Referee.FromString(
+        GameState()._latest_refbox_message_string)
+    message.command = command
+    message.command_counter = command_counter
+    message.blue.score = blue_score
+    return message.SerializeToString()
+
+
+def test_events_only_for_changes():
+    """ Feeds the same message twice, then a new command and a goal.
+    Passes if only the changes become events, and the command sequence
+    counts each new command - including a repeated STOP.
+    """
+    gs = GameState()
+    gs.update_latest_refbox_message(referee_message(SSL_Referee.STOP, 5))
+    sequence = gs.get_referee_command_sequence()
+    assert gs.update_latest_refbox_message(
+        referee_message(SSL_Referee.STOP, 5)) == []
+    assert gs.get_referee_command_sequence() == sequence
+    events = gs.update_latest_refbox_message(
+        referee_message(SSL_Referee.STOP, 6, blue_score=1))
+    assert [(event.kind, event.team) for event in events] == \
+        [(SCORE_CHANGED, 'blue'), (COMMAND_CHANGED, None)]
+    assert gs.get_referee_command_sequence() == sequence + 1
+    last = events[-1].sequence
+    gs.update_latest_refbox_message(
+        referee_message(SSL_Referee.NORMAL_START, 7, blue_score=1))
+    new_events = gs.get_referee_events(last)
+    assert len(new_events) == 1
+    assert (new_events[0].old, new_events[0].new) == \
+        (SSL_Referee.STOP, SSL_Referee.NORMAL_START)
+
+
+def test_coach_sets_up_once_per_command():
+    """ Runs the full game strategy for several ticks of one command.
+    Passes if the command handler only runs when a new command arrives.
+    """
+    strategy = Strategy('blue', 'full_game')
+    strategy.logger = logging.getLogger('strategy')
+    strategy.gs.update_latest_refbox_message(
+        referee_message(SSL_Referee.STOP, 5))
+    strategy.full_game()
+    coach = strategy._coach
+    calls = []
+    coach._command_dict[SSL_Referee.STOP] = lambda: calls.append('stop')
+    coach._command_dict[SSL_Referee.FORCE_START] = \
+        lambda: calls.append('force start')
+    for _ in range(3):
+        strategy.full_game()
+    strategy.gs.update_latest_refbox_message(
+        referee_message(SSL_Referee.FORCE_START, 6))
+    for _ in range(3):
+        strategy.full_game()
+    assert calls == ['force start']
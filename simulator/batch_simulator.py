@@ -0,0 +1,82 @@
+"""Batched ("vector env") rollouts over many independent worlds.
+All K worlds share the same robots (keys), and are stepped together in
+one call, which is what Monte-Carlo evaluation of passes/shots or tuning
+physics constants needs: thousands of short rollouts per second.
+"""
+import numpy as np
+from gamestate import GameState  # pylint: disable=import-error
+
+try:
+    from physics import step_ball, step_robots, separate_robots, collide_ball
+    from world_state import WorldState
+except (SystemError, ImportError):
+    from .physics import step_ball, step_robots, separate_robots, collide_ball
+    from .world_state import WorldState
+
+
+class BatchSimulator(object):
+    """Steps K worlds at once.
+    robots: (K, N, 3) positions (x, y, w)
+    speeds: (K, N, 3) commanded speeds from each robot's perspective
+    ball, ball_velocity: (K, 2)
+    ball_decceleration: scalar, or (K,) to give every world its own value
+    """
+    def __init__(self, keys, robots, speeds, ball, ball_velocity,
+                 ball_decceleration=GameState.BALL_DECCELERATION):
+        self.keys = tuple(keys)
+        self.robots = np.array(robots, dtype=float)
+        self.speeds = np.array(speeds, dtype=float)
+        self.ball = np.array(ball, dtype=float)
+        self.ball_velocity = np.array(ball_velocity, dtype=float)
+        assert self.robots.shape == self.speeds.shape
+        assert self.robots.shape[1:] == (len(self.keys), 3)
+        assert self.ball.shape == self.ball_velocity.shape == \
+            (self.num_worlds, 2)
+        # keep a trailing axis so it broadcasts against (K, 2) ball arrays
+        self.ball_decceleration = \
+            np.broadcast_to(ball_decceleration, (self.num_worlds,))[:, None]
+        self.elapsed_time = 0
+
+    @classmethod
+    def from_state(cls, state, num_worlds, **kwargs):
+        """K identical copies of a WorldState snapshot"""
+        def tile(array):
+            return np.repeat(array[np.newaxis], num_worlds, axis=0)
+        return cls(state.keys, tile(state.robots), tile(state.speeds),
+                   tile(state.ball), tile(state.ball_velocity), **kwargs)
+
+    @property
+    def num_worlds(self):
+        return self.robots.shape[0]
+
+    def index(self, team, robot_id):
+        return self.keys.index((team, robot_id))
+
+    def get_state(self, k):
+        """WorldState copy of a single world"""
+        return WorldState(self.keys, self.robots[k], self.speeds[k],
+                          self.ball[k], self.ball_velocity[k])
+
+    def step(self, delta_time, speeds=None):
+        """
+        advance every world by delta_time, optionally applying new (K, N, 3)
+        speed commands first
+        """
+        if speeds is not None:
+            self.speeds[...] = speeds
+        self.robots = step_robots(self.robots, self.speeds, delta_time)
+        self.robots = separate_robots(self.robots, GameState.ROBOT_RADIUS * 2)
+        self.ball, self.ball_velocity = step_ball(
+            self.ball, self.ball_velocity, delta_time,
+            self.ball_decceleration)
+        self.ball, self.ball_velocity = collide_ball(
+            self.ball, self.ball_velocity, self.robots,
+            GameState.ROBOT_RADIUS + GameState.BALL_RADIUS)
+        self.elapsed_time += delta_time
+
+    def rollout(self, duration, delta_time=.02, speeds=None):
+        """step all worlds forward by duration with constant commands"""
+        if speeds is not None:
+            self.speeds[...] = speeds
+        for _ in range(int(np.ceil(duration / delta_time))):
+            self.step(delta_time)
@@ -0,0 +1,84 @@
+"""Vectorized physics used for simulator rollouts.
+Every function takes arrays with any number of leading (batch) dimensions,
+so the same code steps a single world snapshot or many worlds at once.
+Robots are modelled as circles, positions are (x, y, w) and speeds are
+(x, y, w) from the robot's perspective, as in RobotCommands.
+"""
+import numpy as np
+
+
+def step_ball(ball, velocity, delta_time, decceleration):
+    """
+    Advance ball positions (..., 2) by delta_time under constant friction.
+    decceleration may be a scalar or an array broadcastable to (..., 1).
+    Returns (new_ball, new_velocity).
+    """
+    speed = np.linalg.norm(velocity, axis=-1, keepdims=True)
+    direction = velocity / np.where(speed > 0, speed, 1)
+    # truncate at the time where the ball would stop
+    move_time = np.minimum(delta_time, speed / decceleration)
+    distance = speed * move_time - .5 * decceleration * move_time ** 2
+    new_speed = np.maximum(speed - decceleration * delta_time, 0)
+    return ball + direction * distance, direction * new_speed
+
+
+def step_robots(robots, speeds, delta_time):
+    """
+    Advance robot positions (..., N, 3) following robot perspective speeds
+    (..., N, 3), like RobotCommands.predict_pos does for a single robot.
+    """
+    w = robots[..., 2]
+    sin_w, cos_w = np.sin(w), np.cos(w)
+    speed_x, speed_y = speeds[..., 0], speeds[..., 1]
+    new_robots = np.empty_like(robots)
+    new_robots[..., 0] = robots[..., 0] + \
+        delta_time * (speed_x * sin_w + speed_y * cos_w)
+    new_robots[..., 1] = robots[..., 1] + \
+        delta_time * (speed_y * sin_w - speed_x * cos_w)
+    new_robots[..., 2] = (w + delta_time * speeds[..., 2]) % (np.pi * 2)
+    return new_robots
+
+
+def separate_robots(robots, radius_sum):
+    """
+    Push overlapping robots (..., N, 3) apart, each taking half of every
+    overlap (same rule as Simulator.run). Exactly coincident robots are left
+    alone since there is no direction to push them in.
+    """
+    xy = robots[..., :2]
+    delta = xy[..., np.newaxis, :, :] - xy[..., :, np.newaxis, :]
+    distance = np.linalg.norm(delta, axis=-1)
+    overlap = np.where(distance > 0, radius_sum - distance, 0)
+    overlap = np.maximum(overlap, 0)
+    if not overlap.any():
+        return robots
+    unit = delta / np.where(distance > 0, distance, 1)[..., np.newaxis]
+    push = (unit * overlap[..., np.newaxis] / 2).sum(axis=-2)
+    new_robots = robots.copy()
+    new_robots[..., :2] -= push
+    return new_robots
+
+
+def collide_ball(ball, velocity, robots, radius_sum):
+    """
+    Bounce the ball (..., 2) off the nearest overlapping robot (..., N, 3):
+    it is moved back onto the robot's edge and keeps only the velocity
+    component tangent to the robot. Returns (new_ball, new_velocity).
+    """
+    if robots.shape[-2] == 0:
+        return ball, velocity
+    delta = ball[..., np.newaxis, :] - robots[..., :2]
+    distance = np.linalg.norm(delta, axis=-1)
+    nearest = np.argmin(distance, axis=-1)[..., np.newaxis]
+    nearest_distance = np.take_along_axis(distance, nearest, axis=-1)
+    hit = (nearest_distance < radius_sum) & (nearest_distance > 0)
+    if not hit.any():
+        return ball, velocity
+    nearest_delta = np.take_along_axis(
+        delta, nearest[..., np.newaxis], axis=-2)[..., 0, :]
+    normal = nearest_delta / np.where(hit, nearest_distance, 1)
+    surface = ball - nearest_delta + normal * radius_sum
+    tangent_velocity = velocity - \
+        (velocity * normal).sum(axis=-1, keepdims=True) * normal
+    return (np.where(hit, surface, ball),
+            np.where(hit, tangent_velocity, velocity))
@@ -4,6 +4,14 @@ import numpy as np
 from typing import Tuple
 import logging
 from coordinator import Provider  # pylint: disable=import-error
+from gamestate.broadphase import SweepAndPrune  # pylint: disable=import-error
+
+try:
+    from world_state import WorldState
+    from batch_simulator import BatchSimulator
+except (SystemError, ImportError):
+    from .world_state import WorldState
+    from .batch_simulator import BatchSimulator
 
 logger = logging.getLogger(__name__)
 
@@ -14,20 +22,32 @@ class Simulator(Provider):
     """
     # TODO: when we get multiple comms, connect to all available robots
 
-    def __init__(self, initial_setup):
+    def __init__(self, initial_setup, seed=None, simulate_robot_status=True):
+        """
+        simulate_robot_status: charge + empty the kickers here, set False
+            when Comms is running (e.g. on comms.fake_radio) and fills the
+            robot statuses from feedback instead
+        """
         super().__init__()
         self.logger = None
         self._initial_setup = initial_setup
+        # source of randomness for setups, seed it for reproducible runs
+        self._rng = np.random.default_rng(seed)
         self._viz_events_handled = 0
+        self._broadphase = SweepAndPrune()
+        self._simulate_robot_status = simulate_robot_status
         self._owned_fields = [
             # act as vision provider
             '_ball_position',
             '_blue_robot_positions',
             '_yellow_robot_positions',
-            # also act as robot feedback
-            '_blue_robot_status',
-            '_yellow_robot_status',
         ]
+        if simulate_robot_status:
+            # also act as robot feedback
+            self._owned_fields += [
+                '_blue_robot_status',
+                '_yellow_robot_status',
+            ]
 
     def put_fake_robot(self, team: str,
                        robot_id: int,
@@ -50,6 +70,38 @@ class Simulator(Provider):
         self.gs.update_ball_position(prev_pos, time.time() - dt)
         self.gs.update_ball_position(position, time.time())
 
+    def snapshot(self) -> WorldState:
+        """copy the current world into a WorldState that can be stepped
+        (e.g. for strategy lookahead) without touching the live gamestate"""
+        return WorldState.from_gamestate(self.gs)
+
+    def restore(self, state: WorldState) -> None:
+        """write a snapshot's positions + speeds back into the gamestate"""
+        for (team, robot_id), pos, speeds in \
+                zip(state.keys, state.robots, state.speeds):
+            self.gs.update_robot_position(team, robot_id, pos)
+            commands = self.gs.get_robot_commands(team, robot_id)
+            commands.set_speeds(*speeds)
+        self.put_fake_ball(state.ball, state.ball_velocity)
+
+    def batch(self, num_worlds: int, **kwargs) -> BatchSimulator:
+        """num_worlds copies of the current world, to be stepped together"""
+        return BatchSimulator.from_state(self.snapshot(), num_worlds, **kwargs)
+
+    def put_full_teams(self):
+        """line up six robots per team in front of their own goals"""
+        for i in range(1, 7):
+            left_pos = np.array([-3000, 200 * (i - 3.5), 0])
+            right_pos = np.array([3000, 200 * (i - 3.5), 3.14])
+            if self.gs.is_blue_defense_side_left():
+                blue_pos = left_pos
+                yellow_pos = right_pos
+            else:
+                blue_pos = right_pos
+                yellow_pos = left_pos
+            self.put_fake_robot('blue', i, blue_pos)
+            self.put_fake_robot('yellow', i, yellow_pos)
+
     def pre_run(self):
         if self.logger is None:
             self.create_logger()
@@ -59,17 +111,7 @@ class Simulator(Provider):
         # ))
         # initialize the chosen scenario
         if self._initial_setup == 'full_teams':
-            for i in range(1, 7):
-                left_pos = np.array([-3000, 200 * (i - 3.5), 0])
-                right_pos = np.array([3000, 200 * (i - 3.5), 3.14])
-                if self.gs.is_blue_defense_side_left():
-                    blue_pos = left_pos
-                    yellow_pos = right_pos
-                else:
-                    blue_pos = right_pos
-                    yellow_pos = left_pos
-                self.put_fake_robot('blue', i, blue_pos)
-                self.put_fake_robot('yellow', i, yellow_pos)
+            self.put_full_teams()
             self.put_fake_ball(np.array([0, 0]))
         elif self._initial_setup == "moving_ball":
             self.put_fake_robot('blue', 1, np.array([-3000, 0, 0]))
@@ -99,6 +141,41 @@ class Simulator(Provider):
             self.put_fake_robot('yellow', 4, np.array([-3180, -100, 0]))
             self.put_fake_robot('yellow', 5, np.array([-2820, 100, 0]))
             self.put_fake_robot('yellow', 6, np.array([-2820, -100, 0]))
+        elif self._initial_setup == "dense_traffic":
+            # both teams packed into a grid around the center of the field
+            for i in range(12):
+                col, row = i % 4, i // 4
+                team = 'blue' if (col + row) % 2 == 0 else 'yellow'
+                self.put_fake_robot(team, i // 2 + 1, np.array(
+                    [-600 + 400 * col, -400 + 400 * row, 0]))
+            self.put_fake_ball(np.array([0, 200]))
+        elif self._initial_setup == "penalty_box_crowd":
+            # blue attacking a yellow defense area lined with defenders
+            goal_x = self.gs.get_defense_goal('yellow')[0][0]
+            direction = np.sign(goal_x)
+            self.put_fake_robot('yellow', 0, np.array(
+                [goal_x - direction * 300, 0, 0]))
+            for i in range(1, 6):
+                self.put_fake_robot('yellow', i, np.array(
+                    [goal_x - direction * 1200, 400 * (i - 3), 0]))
+            for i in range(1, 7):
+                self.put_fake_robot('blue', i, np.array(
+                    [goal_x - direction * 1600, 400 * (i - 3.5), 0]))
+            self.put_fake_ball(np.array([goal_x - direction * 1450, 0]))
+        elif self._initial_setup == "random_teams":
+            # six robots per team wherever there is room, for fuzzing
+            for team in ['blue', 'yellow']:
+                for i in range(1, 7):
+                    pos = np.array([*self.gs.random_position(self._rng), 0])
+                    while not self.gs.is_position_open(pos, team, i):
+                        pos = np.array(
+                            [*self.gs.random_position(self._rng), 0])
+                    self.put_fake_robot(team, i, pos)
+            self.put_fake_ball(np.array(self.gs.random_position(self._rng)))
+        elif self._initial_setup == "fast_ball":
+            self.put_full_teams()
+            self.put_fake_ball(np.array([-2000, -1000]),
+                               np.array([4000, 1500]))
         else:
             logger.error("(initial_setup not recognized, empty field). "
                          "initial_setup: %s", self._initial_setup)
@@ -128,23 +205,30 @@ class Simulator(Provider):
             new_ball_pos = self.gs.predict_ball_pos(self.delta_time)
             self.gs.update_ball_position(new_ball_pos)
 
+        # keep the robots' x order from the last tick for the broad phase
+        self.gs.use_broadphase(self._broadphase)
         for (team, robot_id), pos in \
                 self.gs.get_all_robot_positions():
             # refresh positions of all robots
             pos = self.gs.get_robot_position(team, robot_id)
             self.gs.update_robot_position(team, robot_id, pos)
 
-            # handle collisions with other robots
-            for (team2, robot_id2), pos2 in \
-                    self.gs.get_all_robot_positions():
-                if ((team2, robot_id2) != (team, robot_id) and
-                        self.gs.robot_overlap(pos, pos2).any()):
-                    overlap = self.gs.robot_overlap(pos, pos2)
-                    overlap = np.append(overlap, 0)
-                    self.gs.update_robot_position(
-                        team, robot_id, pos - overlap / 2)
-                    self.gs.update_robot_position(
-                        team2, robot_id2, pos2 + overlap / 2)
+        # handle collisions between robots (only pairs that might overlap)
+        broadphase = self.gs.get_broadphase()
+        for (team, robot_id), (team2, robot_id2) in \
+                broadphase.candidate_pairs(self.gs.ROBOT_RADIUS * 2):
+            pos = self.gs.get_robot_position(team, robot_id)
+            pos2 = self.gs.get_robot_position(team2, robot_id2)
+            overlap = self.gs.robot_overlap(pos, pos2)
+            if overlap.any():
+                overlap = np.append(overlap, 0)
+                self.gs.update_robot_position(
+                    team, robot_id, pos - overlap / 2)
+                self.gs.update_robot_position(
+                    team2, robot_id2, pos2 + overlap / 2)
+
+        for (team, robot_id), pos in \
+                self.gs.get_all_robot_positions():
             # collision with ball
             ball_pos = self.gs.get_ball_position()
             ball_overlap = self.gs.robot_ball_overlap(pos)
@@ -199,7 +283,7 @@ class Simulator(Provider):
                     new_pos -= self.gs.robot_ball_overlap(robot_pos, new_pos)
                     self.put_fake_ball(new_pos)
             # simulate charging
-            if robot_commands.is_charging:
+            if robot_commands.is_charging and self._simulate_robot_status:
                 robot_status.simulate_charge(self.delta_time)
             # kick according to commands
             if robot_commands.is_kicking:
@@ -213,4 +297,5 @@ class Simulator(Provider):
                         self.gs.get_robot_direction(team, robot_id)
                     new_pos = ball_pos + new_velocity * self.delta_time
                     self.put_fake_ball(new_pos, new_velocity)
-                robot_status.simulate_kick()
+                if self._simulate_robot_status:
+                    robot_status.simulate_kick()
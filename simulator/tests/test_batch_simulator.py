@@ -0,0 +1,23 @@
+import numpy as np
+from ..simulator import Simulator
+
+
+def test_batch_matches_single_rollouts():
+    """ Steps a batch of worlds with different ball decelerations + robot
+    commands. Passes if each world matches a single WorldState rollout.
+    """
+    simulator = Simulator("moving_ball")
+    simulator.pre_run()
+    state = simulator.snapshot()
+    decelerations = np.array([100., 350., 1000.])
+    batch = simulator.batch(3, ball_decceleration=decelerations)
+    speeds = np.zeros_like(batch.speeds)
+    speeds[:, batch.index('blue', 1)] = [[0, 100, 0], [0, 200, 0], [0, 0, 1]]
+    batch.rollout(.5, speeds=speeds)
+    for k in range(3):
+        single = state.copy()
+        single.speeds[...] = speeds[k]
+        world = single.rollout(.5)
+        assert np.allclose(batch.robots[k], world.robots)
+    # less friction means the ball travels further
+    assert batch.ball[0, 1] < batch.ball[1, 1] < batch.ball[2, 1]
@@ -0,0 +1,45 @@
+import numpy as np
+from ..simulator import Simulator
+
+
+def test_rollout_does_not_touch_gamestate():
+    """ Rolls the moving_ball setup forward from a snapshot.
+    Passes if the snapshot's ball moves while the live gamestate does not.
+    """
+    simulator = Simulator("moving_ball")
+    simulator.pre_run()
+    gs = simulator.gs
+    ball_pos = gs.get_ball_position().copy()
+    state = simulator.snapshot()
+    future = state.rollout(.5)
+    assert future.ball[1] < ball_pos[1]
+    assert (gs.get_ball_position() == ball_pos).all()
+    assert (state.ball == ball_pos).all()
+
+
+def test_copy_is_independent():
+    """ Changing a copy's commands should not change the original snapshot.
+    """
+    simulator = Simulator("full_teams")
+    simulator.pre_run()
+    state = simulator.snapshot()
+    copy = state.copy()
+    copy.set_robot_speeds('blue', 1, 0, 500, 0)
+    copy.step(.1)
+    assert not state.speeds.any()
+    assert not (copy.get_robot_position('blue', 1) ==
+                state.get_robot_position('blue', 1)).all()
+
+
+def test_restore_round_trip():
+    """ Restoring a stepped snapshot should move the live robots there.
+    """
+    simulator = Simulator("clear_field_test")
+    simulator.pre_run()
+    state = simulator.snapshot()
+    state.set_robot_speeds('blue', 1, 0, 1000, 0)
+    future = state.rollout(1)
+    simulator.restore(future)
+    restored_pos = simulator.gs.get_robot_position('blue', 1)
+    assert np.allclose(restored_pos, future.get_robot_position('blue', 1))
+    assert np.allclose(restored_pos[:2], [-2000, 0])
@@ -0,0 +1,87 @@
+"""Array-backed world snapshots for strategy lookahead.
+A WorldState holds everything the rollout physics needs in a few small
+numpy arrays, so copying one costs microseconds instead of deep copying the
+gamestate's position history deques.
+"""
+import time
+import numpy as np
+from gamestate import GameState  # pylint: disable=import-error
+
+try:
+    from physics import step_ball, step_robots, separate_robots, collide_ball
+except (SystemError, ImportError):
+    from .physics import step_ball, step_robots, separate_robots, collide_ball
+
+
+class WorldState(object):
+    """Compact, copyable copy of the simulated world.
+    keys is a tuple of (team, robot_id), in the same order as the rows of
+    robots (x, y, w) and speeds (robot perspective x, y, w).
+    """
+    __slots__ = ['timestamp', 'keys', 'robots', 'speeds',
+                 'ball', 'ball_velocity']
+
+    def __init__(self, keys, robots, speeds, ball, ball_velocity,
+                 timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self.timestamp = timestamp
+        self.keys = tuple(keys)
+        self.robots = np.asarray(robots, dtype=float).reshape(-1, 3)
+        self.speeds = np.asarray(speeds, dtype=float).reshape(-1, 3)
+        self.ball = np.asarray(ball, dtype=float)
+        self.ball_velocity = np.asarray(ball_velocity, dtype=float)
+
+    @classmethod
+    def from_gamestate(cls, gs):
+        """build a snapshot from the latest data in a gamestate"""
+        keys = []
+        robots = []
+        speeds = []
+        for (team, robot_id), pos in gs.get_all_robot_positions():
+            keys.append((team, robot_id))
+            robots.append(pos)
+            speeds.append(gs.get_robot_commands(team, robot_id).get_speeds())
+        return cls(keys, robots, speeds,
+                   gs.get_ball_position(), gs.get_ball_velocity())
+
+    def copy(self):
+        """cheap copy, keys are immutable so they are shared"""
+        state = WorldState.__new__(WorldState)
+        state.timestamp = self.timestamp
+        state.keys = self.keys
+        state.robots = self.robots.copy()
+        state.speeds = self.speeds.copy()
+        state.ball = self.ball.copy()
+        state.ball_velocity = self.ball_velocity.copy()
+        return state
+
+    def index(self, team, robot_id):
+        return self.keys.index((team, robot_id))
+
+    def get_robot_position(self, team, robot_id):
+        return self.robots[self.index(team, robot_id)]
+
+    def set_robot_speeds(self, team, robot_id, x, y, w):
+        """override a robot's command, e.g. to try out a candidate action"""
+        self.speeds[self.index(team, robot_id)] = (x, y, w)
+
+    def step(self, delta_time):
+        """advance the snapshot in place by delta_time seconds"""
+        self.robots = step_robots(self.robots, self.speeds, delta_time)
+        self.robots = separate_robots(self.robots, GameState.ROBOT_RADIUS * 2)
+        self.ball, self.ball_velocity = step_ball(
+            self.ball, self.ball_velocity, delta_time,
+            GameState.BALL_DECCELERATION)
+        self.ball, self.ball_velocity = collide_ball(
+            self.ball, self.ball_velocity, self.robots,
+            GameState.ROBOT_RADIUS + GameState.BALL_RADIUS)
+        self.timestamp += delta_time
+
+    def rollout(self, duration, delta_time=.02):
+        """return a copy of this snapshot stepped forward by duration"""
+        state = self.copy()
+        steps = int(np.ceil(duration / delta_time))
+        for _ in range(steps):
+            state.step(delta_time)
+        return state
@@ -236,10 +236,10 @@ class Analysis(object):
         ball_pos = self.gs.get_ball_position()
         if not self.gs.is_pos_legal(pos, self._team, robot_id) \
                 or not self.gs.is_position_open(pos, self._team, robot_id):
-            return np.NINF
+            return -np.inf
         # TODO: Handle cases where path is blocked
         if not self.is_straight_path_open(ball_pos, pos):
-            return np.NINF
+            return -np.inf
         # Calculate the passing distance
         pass_dist = np.linalg.norm(ball_pos - pos[:2])
         # Calculate the distance to the center of the goal
@@ -373,13 +373,17 @@ class Analysis(object):
         about whether it is legal for robots.
         Should be used when finding a path to send the ball.
         """
-        robot_positions = self.gs.get_all_robot_positions()
         s_pos = s_pos[:2]
         g_pos = g_pos[:2]
         if (s_pos == g_pos).all():
             return True
         x1, y1 = s_pos[:2]
         x2, y2 = g_pos[:2]
+        # only robots near the path's bounding box can block it
+        buffer = 2 * self.gs.ROBOT_RADIUS
+        robot_positions = self.gs.get_broadphase().query(
+            min(x1, x2) - buffer, min(y1, y2) - buffer,
+            max(x1, x2) + buffer, max(y1, y2) + buffer)
         line_unit_vector = (s_pos - g_pos) / np.linalg.norm(s_pos - g_pos)
         for pos in robot_positions:
             if pos[0][0] == self._team and pos[0][1] in ignore_ids \
@@ -418,12 +422,8 @@ class Analysis(object):
         cnt = 0
         success = False
         for _ in range(lim):
-            # use gamestate.random_position()
-            new_pos = np.array(
-                [np.random.randint(self.gs.FIELD_MIN_X, self.gs.FIELD_MAX_X),
-                 np.random.randint(self.gs.FIELD_MIN_Y, self.gs.FIELD_MAX_Y),
-                 0.0])
-            if np.random.random() < 0.05:
+            new_pos = np.array([*self.gs.random_position(self._rng), 0.0])
+            if self._rng.random() < 0.05:
                 new_pos = goal_pos
 
             if not self.gs.is_position_open(new_pos, self._team,
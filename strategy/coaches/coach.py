@@ -1,6 +1,7 @@
 """Role analysis class for strategy."""
 # pylint: disable=import-error
 from refbox import SSL_Referee
+from refbox.events import COMMAND_CHANGED
 
 
 class Coach(object):
@@ -20,7 +21,12 @@ class Coach(object):
         self._strategy = strategy
         self._team = self._strategy._team
         self.logger = strategy.logger
-        self.gs = strategy.gs
+        # referee command sequence the current play was set up for
+        self._command_sequence = None
+        self._last_event_sequence = None
+        # called every tick until the next referee command, set up by the
+        # command handlers below (which only run once per new command)
+        self._current_play = None
         self._command_dict = {
             SSL_Referee.HALT: self.halt,
             SSL_Referee.STOP: self.stop,
@@ -62,6 +68,11 @@ class Coach(object):
                 self.defend_ball_placement,
         }
 
+    @property
+    def gs(self):
+        # strategy gets a fresh gamestate copy every tick
+        return self._strategy.gs
+
     def is_blue(self) -> bool:
         return self._team == 'blue'
 
@@ -70,9 +81,20 @@ class Coach(object):
 
     def play(self):
         self.logger.debug("Play was called")
-        latest_refbox_message = self.gs.get_latest_refbox_message()
-        if latest_refbox_message:
-            self._command_dict[latest_refbox_message.command]()
+        for event in self.gs.get_referee_events(self._last_event_sequence):
+            self._last_event_sequence = event.sequence
+            if event.kind != COMMAND_CHANGED:
+                self.logger.info(f"Referee {event.kind} change "
+                                 f"{event.team or ''}: {event.old} -> "
+                                 f"{event.new}")
+        command_sequence = self.gs.get_referee_command_sequence()
+        if command_sequence != self._command_sequence:
+            self._command_sequence = command_sequence
+            self._current_play = None
+            command = self.gs.get_latest_refbox_message().command
+            self._command_dict[command]()
+        if self._current_play is not None:
+            self._current_play()
         for robot_id in self.gs.get_robot_ids(self._team):
             current_pos = self.gs.get_robot_position(self._team, robot_id)
             # Get out of illegal positions immediately
@@ -83,7 +105,7 @@ class Coach(object):
 
     def halt(self):
         self.logger.info("HALT CALLED")
-        self._strategy.halt()
+        self._current_play = self._strategy.halt
 
     def stop(self):
         self.logger.info("STOP CALLED")
@@ -93,11 +115,11 @@ class Coach(object):
 
     def kickoff(self):
         self.logger.info("KICKOFF CALLED")
-        self._strategy.kickoff()
+        self._current_play = self._strategy.kickoff
 
     def defend_kickoff(self):
         self.logger.info("DEFEND KICKOFF CALLED")
-        self._strategy.move_randomly()
+        self._current_play = self._strategy.move_randomly
 
     def penalty(self):
         self.logger.info("PK CALLED")
@@ -110,7 +132,10 @@ class Coach(object):
 
     def defend_direct_free(self):
         self.logger.info("DEFEND FREE KICK CALLED")
-        self._strategy.form_wall([1, 2, 3])
+        # the ball stays put until the kick, so the wall is only worked out
+        # once
+        wall = self._strategy.wall_positions([1, 2, 3])
+        self._current_play = lambda: self._strategy.hold_positions(wall)
 
     def indirect_free(self):
         raise NotImplementedError
@@ -38,11 +38,11 @@ class Plays:
             TODO: Add coordinates for timeout
         """
 
-    def form_wall(self, ids, distance_from_ball: float = 500) -> None:
-        """Form a defensive wall. The robots in ids will form a wall between
-        the ball position and the goal at the specified distance, in a
-        direction perpendicular to the line between the ball and the center of
-        goal and centered on that line.
+    def wall_positions(self, ids, distance_from_ball: float = 500) -> dict:
+        """Positions for a defensive wall as {robot_id: pos}. The robots in
+        ids stand between the ball position and the goal at the specified
+        distance, in a direction perpendicular to the line between the ball
+        and the center of goal and centered on that line.
         """
         ball_pos = self.gs.get_ball_position()
         goal_top, goal_bottom = self.gs.get_defense_goal(self._team)
@@ -69,6 +69,14 @@ class Plays:
             self.gs.get_robot_position(self._team, x)[:2],
             offset_vector
         ))
-        for i in range(len(ids)):
+        return dict(zip(ids, wall_positions))
+
+    def form_wall(self, ids, distance_from_ball: float = 500) -> None:
+        """Form a defensive wall (see wall_positions)."""
+        self.hold_positions(self.wall_positions(ids, distance_from_ball))
+
+    def hold_positions(self, positions: dict) -> None:
+        """Move each robot in positions ({robot_id: pos}) to its position."""
+        for robot_id, pos in positions.items():
             # TODO: Use path finding
-            self.move_straight(ids[i], wall_positions[i])
+            self.move_straight(robot_id, pos)
@@ -1,6 +1,5 @@
 # pylint: disable=maybe-no-member
 import numpy as np
-from random import random
 
 
 class Roles:
@@ -15,9 +14,8 @@ class Roles:
         if self.is_done_moving(robot_id):
             pos = self.gs.get_robot_position(self._team, robot_id)
             stepsize = 1000
-            random_movement = np.array([(random() - 0.5) * stepsize,
-                                        (random() - 0.5) * stepsize,
-                                        0])
+            dx, dy = self._rng.random(2) - 0.5
+            random_movement = np.array([dx * stepsize, dy * stepsize, 0])
             self.move_straight(robot_id, pos + random_movement)
 
     def goalie(self, robot_id, is_opposite_goal=False):
@@ -3,6 +3,7 @@ import numpy as np
 
 # pylint: disable=import-error
 from coordinator import Provider
+from gamestate.broadphase import SweepAndPrune
 
 # import lower-level strategy logic that we've separated for readability
 try:
@@ -26,16 +27,23 @@ except (SystemError, ImportError, ModuleNotFoundError):
 class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
     """Control loop for playing the game. Calculate desired robot actions,
        and enters commands into gamestate to be sent by comms"""
-    def __init__(self, team, strategy_name):
+    def __init__(self, team, strategy_name, seed=None):
         super().__init__()
         assert(team in ['blue', 'yellow'])
         self._team = team
         self._strategy_name = strategy_name
+        # all random sampling (e.g. RRT) draws from here, so a seed makes
+        # paths + planner timings reproducible
+        self._rng = np.random.default_rng(seed)
         self._owned_fields = ['_blue_robot_commands', '_yellow_robot_commands']
 
         # state for reducing frequency of expensive calls
         # (this also helps reduce oscillation)
         self._last_pathfind_times = {}  # robot_id : timestamp
+        # keeps robots sorted by x across ticks for fast collision checks
+        self._broadphase = SweepAndPrune()
+        # kept across ticks so it only reacts to new referee commands
+        self._coach = None
 
     def pre_run(self):
         # print info + initial state for the mode that is running
@@ -68,6 +76,13 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
             self.logger.info("default strategy for playing a full game")
 
     def run(self):
+        # act on where everything will be when these commands go out over
+        # the radio (once comms has measured how long that takes)
+        latency = self.gs.get_command_latency(self._team)
+        capture_time = self.gs.get_latest_capture_time(self._team)
+        if latency is not None and capture_time is not None:
+            self.gs.advance_world(capture_time + latency)
+        self.gs.use_broadphase(self._broadphase)
         ref = self.gs.get_latest_refbox_message()
         if ref is not None:
             self.logger.debug(f"Stage: {ref.stage} Command: {ref.command}")
@@ -253,5 +268,6 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
 
     def full_game(self):
         # pylint: disable=undefined-variable
-        coach = Coach(self)  # noqa
-        coach.play()
+        if self._coach is None:
+            self._coach = Coach(self)  # noqa
+        self._coach.play()
@@ -0,0 +1,31 @@
+import logging
+import numpy as np
+from ..strategy import Strategy
+from simulator.simulator import Simulator
+
+
+team = "blue"
+strategy_name = ""
+
+
+def rrt_waypoints(seed):
+    simulator = Simulator("entry_video", seed)
+    simulator.pre_run()
+    strategy = Strategy(team, strategy_name, seed)
+    strategy.gs = simulator.gs
+    strategy.logger = logging.getLogger(__name__)
+    start_pos = strategy.gs.get_robot_position(team, 0)
+    assert strategy.RRT_path_find(start_pos, np.array([2500, -1000, 0]), 0)
+    return strategy.gs.get_robot_commands(team, 0).waypoints
+
+
+def test_rrt_path_find_is_reproducible():
+    """ Runs RRT_path_find twice with the same seed through traffic.
+    Passes if both runs produce exactly the same waypoints.
+    """
+    first = rrt_waypoints(7)
+    second = rrt_waypoints(7)
+    assert len(first) > 0
+    assert len(first) == len(second)
+    for wp1, wp2 in zip(first, second):
+        assert (wp1 == wp2).all()
@@ -1 +1,2 @@
 from .data_providers import SSLVisionDataProvider  # noqa
+from .replay import ReplayDataProvider  # noqa
@@ -0,0 +1,118 @@
+'''Keeps track of which cameras are sending, and how well'''
+
+# weight of the newest sample in the running frame interval/latency averages
+SMOOTHING = .1
+# cameras slower than this (frames per second) are left out of fusion
+MIN_FRAME_RATE = 10
+# cameras whose frames take longer than this (seconds) to reach us are too
+MAX_CAMERA_LATENCY = .15
+# frames needed before frame rate/latency are trusted enough to exclude
+MIN_FRAMES_FOR_STATS = 10
+# cameras that haven't sent anything for this long are forgotten
+CAMERA_REMOVE_TIME = 5
+
+
+class CameraStats(object):
+    """Running estimates for one camera, times are on our clock"""
+    __slots__ = ['camera_id', 'num_frames', 'dropped_frames',
+                 'last_frame_number', 'last_capture_time',
+                 'frame_interval', 'latency']
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.num_frames = 0
+        # frames missing from the sequence of frame numbers
+        self.dropped_frames = 0
+        self.last_frame_number = None
+        self.last_capture_time = None
+        # seconds between frames / from capture to receiving the packet
+        self.frame_interval = None
+        self.latency = None
+
+    @property
+    def frame_rate(self):
+        if not self.frame_interval:
+            return None
+        return 1 / self.frame_interval
+
+    def update(self, frame_number, capture_time, receive_time):
+        latency = receive_time - capture_time
+        if self.num_frames == 0:
+            self.latency = latency
+        else:
+            self.latency += SMOOTHING * (latency - self.latency)
+            frames = frame_number - self.last_frame_number
+            interval = capture_time - self.last_capture_time
+            if frames > 0 and interval > 0:
+                self.dropped_frames += frames - 1
+                interval /= frames
+                if self.frame_interval is None:
+                    self.frame_interval = interval
+                else:
+                    self.frame_interval += \
+                        SMOOTHING * (interval - self.frame_interval)
+        self.num_frames += 1
+        self.last_frame_number = frame_number
+        self.last_capture_time = capture_time
+
+
+class CameraRegistry(object):
+    """
+    Cameras are registered as their first frame arrives, so any number or
+    numbering of cameras works, and fusion only looks at healthy ones.
+    """
+    def __init__(self, max_detection_age, max_latency=MAX_CAMERA_LATENCY,
+                 min_frame_rate=MIN_FRAME_RATE):
+        self.max_detection_age = max_detection_age
+        self.max_latency = max_latency
+        self.min_frame_rate = min_frame_rate
+        self._cameras = dict()  # camera_id : CameraStats
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def __contains__(self, camera_id):
+        return camera_id in self._cameras
+
+    def __iter__(self):
+        return iter(list(self._cameras))
+
+    def get(self, camera_id):
+        return self._cameras.get(camera_id)
+
+    def update(self, camera_id, frame_number, capture_time, receive_time):
+        """record a frame, registering the camera if it is new"""
+        if camera_id not in self._cameras:
+            self._cameras[camera_id] = CameraStats(camera_id)
+        self._cameras[camera_id].update(
+            frame_number, capture_time, receive_time)
+
+    def remove_stale(self, capture_time):
+        """
+        forget cameras that haven't sent a frame in CAMERA_REMOVE_TIME
+        before capture_time, returns the removed camera ids
+        """
+        removed = [camera_id for camera_id, stats in self._cameras.items()
+                   if capture_time - stats.last_capture_time >
+                   CAMERA_REMOVE_TIME]
+        for camera_id in removed:
+            del self._cameras[camera_id]
+        return removed
+
+    def is_healthy(self, camera_id, newest_capture_time):
+        """
+        whether a camera's latest frame should be used, given the capture
+        time of the newest frame from any camera
+        """
+        stats = self._cameras.get(camera_id)
+        if stats is None:
+            return False
+        if newest_capture_time - stats.last_capture_time > \
+                self.max_detection_age:
+            return False
+        if stats.num_frames < MIN_FRAMES_FOR_STATS:
+            return True
+        if stats.latency > self.max_latency:
+            return False
+        frame_rate = stats.frame_rate
+        return frame_rate is None or frame_rate >= self.min_frame_rate
@@ -1,40 +1,127 @@
 
 '''A class to provide robot position data from the cameras'''
+import time
 import sslclient
 import threading
 import numpy as np
-from collections import Counter
-from typing import Tuple
+from collections import deque
 from coordinator import Provider
+from multicast import MulticastReceiver
+from recording.packet_log import PacketRecorder, SOURCE_VISION
+from latest_value import LatestValue
+from .cameras import CameraRegistry
+from .tracking import Tracker
+
+SSL_WrapperPacket = sslclient.messages_robocup_ssl_wrapper_pb2.SSL_WrapperPacket  # noqa
+
+# detections below this confidence are ignored
+CONFIDENCE_THRESHOLD = .5
+# camera frames captured this long before the newest frame are ignored
+MAX_DETECTION_AGE = .1
+# how long run() waits for a new frame before giving up for this loop
+NEW_FRAME_TIMEOUT = .05
+# number of recent packets used to estimate the vision machine's clock offset
+CLOCK_OFFSET_WINDOW = 100
+# how long the receiver thread waits for packets before checking if it
+# should stop
+RECEIVE_TIMEOUT = .1
+
+
+# one detected object of a camera frame, balls have team BALL, robot_id -1
+DETECTION_DTYPE = np.dtype([
+    ('camera_id', np.uint8),
+    ('team', np.uint8),
+    ('robot_id', np.int16),
+    ('x', np.float32),
+    ('y', np.float32),
+    ('orientation', np.float32),
+    ('confidence', np.float32),
+    # capture time converted to our clock (see handle_packet)
+    ('t_capture', np.float64),
+])
+TEAM_CODES = {'blue': 0, 'yellow': 1}
+BALL = 2
+
+
+def wrapper_camera_id(data):
+    """camera id of a decoded SSL_WrapperPacket, -1 if it has no detection"""
+    if data.HasField('detection'):
+        return data.detection.camera_id
+    return -1
+
+
+def packet_camera_id(payload):
+    """camera id of a raw SSL_WrapperPacket, -1 if it has no detection"""
+    return wrapper_camera_id(SSL_WrapperPacket.FromString(payload))
+
+
+def decode_detection(detection, clock_offset=0):
+    """
+    Convert an SSL_DetectionFrame into a DETECTION_DTYPE array, so fusing
+    cameras doesn't have to walk (slow) protobuf attributes every loop.
+    clock_offset is added to the capture time to convert it to our clock.
+    """
+    cid = detection.camera_id
+    t = detection.t_capture + clock_offset
+    rows = [(cid, BALL, -1, b.x, b.y, 0, b.confidence, t)
+            for b in detection.balls]
+    for team, robots in [(TEAM_CODES['blue'], detection.robots_blue),
+                         (TEAM_CODES['yellow'], detection.robots_yellow)]:
+        rows += [(cid, team, r.robot_id, r.x, r.y, r.orientation,
+                  r.confidence, t) for r in robots]
+    return np.array(rows, dtype=DETECTION_DTYPE)
 
 
 class SSLVisionDataProvider(Provider):
-    def __init__(self, HOST='224.5.23.2', PORT=10006):
+    def __init__(self, HOST='224.5.23.2', PORT=10006, record_path=None,
+                 max_detection_age=MAX_DETECTION_AGE):
         super().__init__()
         self.HOST = HOST
         self.PORT = PORT
+        # every camera that has sent frames, with frame rate/latency stats
+        # (only updated by the thread handling packets)
+        self.cameras = CameraRegistry(max_detection_age)
+        # if given, raw packets are appended to this log (see recording)
+        self._record_path = record_path
+        self._recorder = None
 
-        self._ssl_vision_client = None
+        self._receiver = None
+        self._is_receiving = False
         self._ssl_vision_thread = None
         # cache data from different cameras so we can merge them
-        # camera_id : latest raw data
-        sslclient_detection = sslclient.messages_robocup_ssl_detection_pb2.SSL_DetectionFrame  # noqa
-        self._raw_camera_data = {
-            0: sslclient_detection(),
-            1: sslclient_detection(),
-            2: sslclient_detection(),
-            3: sslclient_detection(),
-        }
+        # camera_id : (t_capture, detections) of its latest frame
+        # (cameras are added and removed as they come and go)
+        # (only touched by the thread handling packets)
+        self._camera_frames = dict()
+        # copies of _camera_frames are published here for run() to read
+        self._frames_slot = LatestValue(dict())
+        # fused detections of the fresh frames, cached per slot version
+        self._detections = np.zeros(0, dtype=DETECTION_DTYPE)
+        self._detections_version = 0
+        # slot version that was last pushed to the gamestate
+        self._run_version = 0
+        # camera_id : t_capture of the last frame pushed to the gamestate
+        self._pushed_capture_times = dict()
+        # recent (receive time - t_sent), for converting to our clock
+        self._clock_offsets = deque([], CLOCK_OFFSET_WINDOW)
+        # Kalman filters for velocities (only used from run())
+        self._tracker = Tracker()
         self._owned_fields = [
             '_ball_position',
             '_blue_robot_positions',
-            '_yellow_robot_positions'
+            '_yellow_robot_positions',
+            '_tracked_ball',
+            '_blue_robot_velocities',
+            '_yellow_robot_velocities',
         ]
 
     def pre_run(self):
         """Starts listen to SSL-vision and updating gamestate with new data"""
-        self._ssl_vision_client = sslclient.client()
-        self._ssl_vision_client.connect()
+        if self._record_path is not None:
+            self._recorder = PacketRecorder(self._record_path)
+        self._receiver = MulticastReceiver(self.HOST, self.PORT)
+        self._receiver.connect()
+        self._is_receiving = True
         self._ssl_vision_thread = threading.Thread(
             target=self.receive_data_loop
         )
@@ -43,98 +130,176 @@ class SSLVisionDataProvider(Provider):
         self._ssl_vision_thread.start()
 
     def post_run(self):
-        if self._ssl_vision_client:
+        if self._receiver:
+            self._is_receiving = False
             self._ssl_vision_thread.join()
             self._ssl_vision_thread = None
-            self._ssl_vision_client = None
+            self.logger.info('vision packets: {}'.format(
+                self._receiver.get_stats()))
+            self._receiver.disconnect()
+            self._receiver = None
+        if self._recorder:
+            self._recorder.close()
+            self._recorder = None
 
     # loop for reading messages from ssl vision, otherwise they pile up
     def receive_data_loop(self):
-        while self._ssl_vision_client:
-            data = self._ssl_vision_client.receive()
-            # print(data)
-            # get a detection packet from any camera, and store it
-            if data.HasField('detection'):
-                cid = data.detection.camera_id
-                self._raw_camera_data[cid] = data.detection
+        while self._is_receiving:
+            # if we fell behind, only the newest frame of each camera matters
+            # (but everything is recorded, exactly as it came off the network)
+            # each datagram is only decoded once, here
+            datagrams, latest = self._receiver.receive(
+                RECEIVE_TIMEOUT, wrapper_camera_id,
+                SSL_WrapperPacket.FromString)
+            if self._recorder:
+                for receive_time, payload, data in datagrams:
+                    self._recorder.record(payload, SOURCE_VISION,
+                                          wrapper_camera_id(data),
+                                          receive_time)
+            for receive_time, payload, data in latest:
+                self.handle_packet(payload, receive_time, data)
+
+    def get_receive_stats(self):
+        """packets received/dropped for being superseded, and backlog"""
+        if self._receiver is None:
+            return None
+        return self._receiver.get_stats()
+
+    def handle_packet(self, payload, receive_time=None, data=None):
+        """
+        decode a raw SSL_WrapperPacket and publish its detection frame,
+        returns the camera id of the detection (-1 if there was none).
+        data is the already decoded packet, if there is one.
+        """
+        if receive_time is None:
+            receive_time = time.time()
+        if data is None:
+            data = SSL_WrapperPacket.FromString(payload)
+        # print(data)
+        # get a detection packet from any camera, and store it
+        if data.HasField('detection'):
+            detection = data.detection
+            cid = detection.camera_id
+            # the vision machine's clock isn't ours - the packet that took
+            # least time on the network gives the best estimate of the offset
+            self._clock_offsets.append(receive_time - detection.t_sent)
+            clock_offset = min(self._clock_offsets)
+            t_capture = detection.t_capture + clock_offset
+            self.cameras.update(cid, detection.frame_number, t_capture,
+                                receive_time)
+            for removed_id in self.cameras.remove_stale(t_capture):
+                del self._camera_frames[removed_id]
+            self._camera_frames[cid] = (
+                t_capture, decode_detection(detection, clock_offset))
+            self._frames_slot.publish(dict(self._camera_frames))
+            return cid
+        return -1
 
     def run(self):
+        # nothing to do until a new frame arrives
+        if not self._frames_slot.wait(self._run_version, NEW_FRAME_TIMEOUT):
+            return
+        self._run_version, frames = self._frames_slot.get()
+        # only push what the new frames saw, stamped with their capture time
+        new_detections = []
+        for cid, (t_capture, detections) in self._healthy_frames(frames):
+            if t_capture > self._pushed_capture_times.get(cid, -np.inf):
+                self._pushed_capture_times[cid] = t_capture
+                new_detections.append(detections)
+        if not new_detections:
+            return
+        new_detections = np.concatenate(new_detections)
+        new_detections = new_detections[
+            new_detections['confidence'] >= CONFIDENCE_THRESHOLD]
         # update positions of all robots seen by data feed
         for team in ['blue', 'yellow']:
             robot_positions = self.get_robot_positions(team)
-            # print(robot_positions)
-            for robot_id, pos in robot_positions.items():
-                self.gs.update_robot_position(team, robot_id, pos)
+            seen = new_detections[new_detections['team'] == TEAM_CODES[team]]
+            capture_times = dict()
+            for robot_id, t_capture in zip(seen['robot_id'],
+                                           seen['t_capture']):
+                robot_id = int(robot_id)
+                capture_times[robot_id] = max(
+                    t_capture, capture_times.get(robot_id, t_capture))
+            for robot_id, t_capture in capture_times.items():
+                if robot_id in robot_positions:
+                    pos = robot_positions[robot_id]
+                    self.gs.update_robot_position(
+                        team, robot_id, pos, t_capture)
+                    robot = self._tracker.update_robot(
+                        team, robot_id, pos, t_capture)
+                    self.gs.update_robot_velocity(
+                        team, robot_id, robot.velocity, t_capture)
         # update position of the ball
-        ball_data = self._get_ball_position()
-        if ball_data is not None:
-            self.gs.update_ball_position(ball_data)
+        # (every candidate is tracked, in case of reflections or spare balls)
+        seen = new_detections[new_detections['team'] == BALL]
+        if len(seen):
+            best_ball = self._tracker.update_ball_candidates(
+                np.stack([seen['x'], seen['y']], axis=1),
+                seen['confidence'], seen['t_capture'])
+            if best_ball is not None:
+                ball_data, t_capture = best_ball
+                self.gs.update_ball_position(ball_data, t_capture)
+                ball = self._tracker.ball
+                self.gs.update_tracked_ball(
+                    t_capture, ball.position, ball.velocity)
 
-    def get_robot_positions(self, team='blue'):
-        robot_positions = {}
-        # track how many cameras see each robot, for averaging
-        num_cameras_seen = Counter()
-        for camera_id, raw_data in self._raw_camera_data.items():
-            if team == 'blue':
-                team_data = raw_data.robots_blue
+    def _healthy_frames(self, frames):
+        """(camera_id, frame) of the cameras that should be fused"""
+        if not frames:
+            return []
+        newest = max(t_capture for t_capture, _ in frames.values())
+        return [(cid, frame) for cid, frame in frames.items()
+                if self.cameras.is_healthy(cid, newest)]
+
+    def _latest_detections(self):
+        """
+        detections of the latest frame of each healthy camera (recomputed
+        only when a new frame has arrived)
+        """
+        version, frames = self._frames_slot.get()
+        if version != self._detections_version:
+            self._detections_version = version
+            frames = self._healthy_frames(frames)
+            if frames:
+                self._detections = np.concatenate(
+                    [detections for _, (_, detections) in frames])
             else:
-                assert(team == 'yellow')
-                team_data = raw_data.robots_yellow
-            for robot_data in team_data:
-                robot_id = robot_data.robot_id
-                num_cameras_seen[robot_id] += 1
-                # only update data if it has higher confidence
-                CONFIDENCE_THRESHOLD = .5
-                if robot_data.confidence >= CONFIDENCE_THRESHOLD:
-                    # average in the new data
-                    pos = np.array([robot_data.x,
-                                    robot_data.y,
-                                    robot_data.orientation])
-                    if robot_id not in robot_positions:
-                        robot_positions[robot_id] = pos
-                    else:
-                        times_seen = num_cameras_seen[robot_id]
-                        current_pos = robot_positions[robot_id]
-                        average_pos = np.array([
-                            (current_pos[0] * (times_seen - 1) + pos[0]) / times_seen,  # noqa
-                            (current_pos[1] * (times_seen - 1) + pos[1]) / times_seen,  # noqa
-                            # TODO: safely average orientation?
-                            self._circular_mean(
-                                (times_seen - 1, 1),
-                                (robot_data.orientation, pos[2])
-                            )
-                        ])
-                        robot_positions[robot_id] = average_pos
-        # if (team == 'blue'):
-        #    print(robot_positions[0])
-        return robot_positions
-
-    def _circular_mean(self, weights, angles):
-        "helper function for averaging angles by converting to points"
-        x = y = 0.
-        for angle, weight in zip(angles, weights):
-            x += np.cos(angle) * weight
-            y += np.sin(angle) * weight
-        if x == 0 and y == 0:
-            print('freak coincidence?')
-            return 0
-        mean = np.arctan2(y, x)
-        return mean
-
-    def _get_ball_position(self) -> Tuple[float, float]:
-        "Returns average ball readings of the cameras."
-        average_ball = None
-        times_seen = 0
-        # TODO: Do some adv. processing based on which camera has seen the ball
-        for camera_id, raw_data in self._raw_camera_data.items():
-            balls = raw_data.balls
-            CONFIDENCE_THRESHOLD = .5
-            if len(balls) > 0 and balls[0].confidence >= CONFIDENCE_THRESHOLD:
-                ball = balls[0]
-                times_seen += 1
-                if average_ball is None:
-                    average_ball = np.array([ball.x, ball.y])
-                else:
-                    pos = np.array([ball.x, ball.y])
-                    average_ball = (average_ball * (times_seen - 1) + pos) / times_seen  # noqa
-        return average_ball
+                self._detections = np.zeros(0, dtype=DETECTION_DTYPE)
+        return self._detections
+
+    def get_robot_positions(self, team='blue'):
+        """
+        robot_id : (x, y, w) merged from every camera that sees the robot,
+        weighted by the confidence of each detection
+        """
+        detections = self._latest_detections()
+        detections = detections[
+            (detections['team'] == TEAM_CODES[team]) &
+            (detections['confidence'] >= CONFIDENCE_THRESHOLD)]
+        if not len(detections):
+            return {}
+        robot_ids, groups = np.unique(detections['robot_id'],
+                                      return_inverse=True)
+        weights = detections['confidence'].astype(float)
+        total_weights = np.bincount(groups, weights)
+        x = np.bincount(groups, weights * detections['x']) / total_weights
+        y = np.bincount(groups, weights * detections['y']) / total_weights
+        # average orientations as unit vectors, so 179 + -179 degrees = 180
+        orientations = detections['orientation']
+        w = np.arctan2(np.bincount(groups, weights * np.sin(orientations)),
+                       np.bincount(groups, weights * np.cos(orientations)))
+        positions = np.stack([x, y, w], axis=1)
+        return {int(robot_id): pos
+                for robot_id, pos in zip(robot_ids, positions)}
+
+    def _get_ball_position(self):
+        """
+        Latest position of the ball candidate track most likely to be the
+        real ball, or None if no camera has seen a ball recently
+        """
+        candidates = self._tracker.ball_candidates
+        best = candidates.best_track()
+        if best is None:
+            return None
+        return candidates.measurements[best].copy()
@@ -0,0 +1,131 @@
+'''Replays recorded vision + refbox packets in place of the live providers'''
+import os
+import time
+from recording.packet_log import (PacketLog, log_path,
+                                  SOURCE_VISION, SOURCE_REFBOX)
+from .data_providers import SSLVisionDataProvider
+
+
+class ReplayDataProvider(SSLVisionDataProvider):
+    """
+    Feeds a recording (see recording.packet_log, or recording.pcap to
+    convert a capture) through the same decoding + camera fusion code as the
+    live SSLVisionDataProvider, and also plays back the refbox messages.
+
+    speed: 1 plays in real time, N plays N times faster, and 0 plays as fast
+        as possible - exactly one vision packet is handled per run(), so no
+        frame is skipped no matter how long strategy takes to think.
+    offset: seconds into the recording to start playing from
+    loop: start over once the end of the recording is reached
+    """
+    def __init__(self, prefix, speed=1, offset=0, loop=False):
+        super().__init__()
+        self._prefix = prefix
+        self._speed = speed
+        self._offset = offset
+        self._loop = loop
+        self._logs = []
+        # index of the next record to play from each log
+        self._cursors = []
+        self._replay_start_time = None
+        self._wall_start_time = None
+        self._is_finished = False
+        self._owned_fields = self._owned_fields + [
+            '_latest_refbox_message_string',
+            '_referee_events',
+            '_referee_command_sequence',
+        ]
+
+    def pre_run(self):
+        for source in [SOURCE_VISION, SOURCE_REFBOX]:
+            path = log_path(self._prefix, source)
+            if os.path.exists(path):
+                log = PacketLog(path)
+                if len(log):
+                    self._logs.append(log)
+                else:
+                    log.close()
+        if not self._logs:
+            raise ValueError('no recording found for {}'.format(self._prefix))
+        self.seek(self.start_time() + self._offset)
+
+    def post_run(self):
+        for log in self._logs:
+            log.close()
+        self._logs = []
+        self._cursors = []
+
+    def start_time(self):
+        return min(log.start_time() for log in self._logs)
+
+    def seek(self, timestamp):
+        """
+        continue playing from the first packets received at or after
+        timestamp (binary search on each log's index, no scanning)
+        """
+        self._cursors = [log.find(timestamp) for log in self._logs]
+        self._replay_start_time = timestamp
+        self._wall_start_time = time.time()
+        self._is_finished = False
+
+    def replay_time(self):
+        """timestamp in the recording that should be playing right now"""
+        elapsed = time.time() - self._wall_start_time
+        return self._replay_start_time + elapsed * self._speed
+
+    def _next_log(self):
+        """index of the log with the earliest unplayed record, or None"""
+        next_i = None
+        next_timestamp = None
+        for i, log in enumerate(self._logs):
+            cursor = self._cursors[i]
+            if cursor < len(log):
+                timestamp = log.timestamps[cursor]
+                if next_timestamp is None or timestamp < next_timestamp:
+                    next_i = i
+                    next_timestamp = timestamp
+        return next_i
+
+    def _play_next(self):
+        """handle the next record, returns its source or None at the end"""
+        i = self._next_log()
+        if i is None:
+            return None
+        timestamp, source, camera_id, payload = \
+            self._logs[i].read(self._cursors[i])
+        self._cursors[i] += 1
+        if source == SOURCE_VISION:
+            receive_time = None
+            if self._speed > 0:
+                # when this packet should have arrived, on our clock
+                receive_time = self._wall_start_time + \
+                    (timestamp - self._replay_start_time) / self._speed
+            self.handle_packet(payload, receive_time)
+        elif source == SOURCE_REFBOX:
+            self.gs.update_latest_refbox_message(bytes(payload))
+        return source
+
+    def run(self):
+        if self._is_finished:
+            return
+        has_vision = False
+        if self._speed > 0:
+            replay_time = self.replay_time()
+            i = self._next_log()
+            while i is not None and \
+                    self._logs[i].timestamps[self._cursors[i]] <= replay_time:
+                has_vision |= self._play_next() == SOURCE_VISION
+                i = self._next_log()
+        else:
+            source = self._play_next()
+            while source is not None and source != SOURCE_VISION:
+                source = self._play_next()
+            has_vision = source == SOURCE_VISION
+        if has_vision:
+            super().run()
+        if self._next_log() is None:
+            if self._loop:
+                self.seek(self.start_time())
+            else:
+                self.logger.info('replay of {} finished'.format(self._prefix))
+                self._is_finished = True
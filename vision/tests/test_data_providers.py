@@ -0,0 +1,161 @@
+import time
+import socket
+import pytest
+import numpy as np
+import sslclient
+from multicast import MulticastReceiver
+from ..data_providers import (SSLVisionDataProvider, packet_camera_id,
+                              wrapper_camera_id, SSL_WrapperPacket)
+
+SSL_WrapperPacket = sslclient.messages_robocup_ssl_wrapper_pb2.SSL_WrapperPacket  # noqa
+
+
+def camera_packet(camera_id, t_capture, robots=(), balls=(), frame_number=0):
+    """robots: (robot_id, x, y, orientation, confidence) for blue robots
+    balls: (x, y, confidence)
+    """
+    packet = SSL_WrapperPacket()
+    detection = packet.detection
+    detection.frame_number = frame_number
+    detection.t_capture = t_capture
+    detection.t_sent = t_capture
+    detection.camera_id = camera_id
+    for robot_id, x, y, orientation, confidence in robots:
+        robot = detection.robots_blue.add()
+        robot.robot_id = robot_id
+        robot.x, robot.y, robot.orientation = x, y, orientation
+        robot.confidence = confidence
+        robot.pixel_x = robot.pixel_y = 0
+    for x, y, confidence in balls:
+        ball = detection.balls.add()
+        ball.x, ball.y, ball.confidence = x, y, confidence
+        ball.pixel_x = ball.pixel_y = 0
+    return packet.SerializeToString()
+
+
+def test_cameras_merged_by_confidence():
+    """ Two cameras see robot 1 facing roughly backwards (+-pi).
+    Passes if x is confidence weighted and the orientation stays near pi
+    instead of averaging to 0.
+    """
+    vision = SSLVisionDataProvider()
+    vision.handle_packet(camera_packet(
+        0, 10, [(1, 0, 0, np.pi - .1, 1), (2, 5, 5, 0, .2)], [(10, 0, .9)]))
+    vision.handle_packet(camera_packet(
+        1, 10.01, [(1, 300, 0, -np.pi + .1, .5)], [(40, 0, .6)]))
+    vision.run()
+    positions = vision.get_robot_positions('blue')
+    assert list(positions) == [1]
+    assert np.isclose(positions[1][0], 100)
+    assert abs(positions[1][2]) > np.pi - .1
+    assert np.allclose(vision._get_ball_position(), [22, 0])
+    assert vision.get_robot_positions('yellow') == {}
+
+
+def test_stale_camera_ignored():
+    vision = SSLVisionDataProvider(max_detection_age=.1)
+    vision.handle_packet(camera_packet(0, 10, [(1, 0, 0, 0, 1)]), 1010)
+    vision.handle_packet(camera_packet(1, 12, [(3, 0, 0, 0, 1)]), 1012)
+    assert list(vision.get_robot_positions('blue')) == [3]
+
+
+def test_run_only_updates_on_new_frames():
+    """ Calls run() twice per received frame.
+    Passes if the ball history only grows once per frame.
+    """
+    vision = SSLVisionDataProvider()
+    for i in range(3):
+        vision.handle_packet(camera_packet(0, i * .01, balls=[(i, 0, 1)]))
+        vision.run()
+        vision.run()
+    assert len(vision.gs._ball_position) == 3
+    assert vision.gs.get_ball_position()[0] == 2
+
+
+def test_updates_stamped_with_capture_time():
+    """ Camera 0 sees robot 1, then camera 1 sees only robot 2 a frame later.
+    Passes if robot 1 gets no duplicate entry and each entry is stamped with
+    its own frame's capture time, shifted by the estimated clock offset.
+    """
+    vision = SSLVisionDataProvider()
+    vision.handle_packet(camera_packet(0, 10, [(1, 0, 0, 0, 1)]), 1000.005)
+    vision.run()
+    vision.handle_packet(camera_packet(1, 10.016, [(2, 0, 0, 0, 1)]),
+                         1000.021)
+    vision.run()
+    assert len(vision.gs._blue_robot_positions[1]) == 1
+    assert np.isclose(vision.gs._blue_robot_positions[1][0][0], 1000.005)
+    assert np.isclose(vision.gs._blue_robot_positions[2][0][0], 1000.016)
+
+
+def test_cameras_registered_dynamically():
+    """ Eight cameras send at 60 fps for a second, except camera 6 which
+    only sends at 5 fps and camera 7 whose packets arrive 300 ms late.
+    Passes if all are registered but only the robots seen by healthy
+    cameras are fused.
+    """
+    vision = SSLVisionDataProvider()
+    for frame in range(60):
+        t = frame / 60
+        for cid in range(8):
+            if cid == 6 and frame % 12:
+                continue
+            latency = .3 if cid == 7 else .005
+            vision.handle_packet(
+                camera_packet(cid, t, [(cid, 0, 0, 0, 1)], frame_number=frame),
+                1000 + t + latency)
+    assert sorted(vision.cameras) == list(range(8))
+    assert np.isclose(vision.cameras.get(0).frame_rate, 60)
+    assert vision.cameras.get(6).dropped_frames == 44
+    assert sorted(vision.get_robot_positions('blue')) == list(range(6))
+
+
+def test_ball_track_ignores_reflection():
+    """ The ball rolls along y = 0 seen by camera 0, while camera 1 keeps
+    reporting a confident reflection 1 m away from frame 10 on.
+    Passes if the gamestate ball stays on the real ball, with a sane speed.
+    """
+    vision = SSLVisionDataProvider()
+    for frame in range(40):
+        t = frame / 60
+        vision.handle_packet(camera_packet(
+            0, t, balls=[(1000 * t, 0, .8)], frame_number=frame), 1000 + t)
+        if frame >= 10:
+            vision.handle_packet(camera_packet(
+                1, t, balls=[(0, 1000, .9)], frame_number=frame), 1000 + t)
+        vision.run()
+        ball = vision.gs.get_ball_position()
+        assert np.allclose(ball, [1000 * t, 0], atol=20)
+    velocity = vision.gs._tracked_ball[2]
+    assert np.allclose(velocity, [1000, 0], atol=100)
+
+
+def test_receiver_keeps_newest_frame_per_camera():
+    """ Sends three frames from camera 0 and two from camera 1 over
+    multicast loopback before draining.
+    Passes if each frame is decoded once, only the newest frame of each
+    camera is kept, and the other three are counted as dropped.
+    """
+    receiver = MulticastReceiver('224.5.23.250', 10950)
+    try:
+        receiver.connect()
+    except OSError:
+        pytest.skip('no multicast available')
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    for frame, cid in enumerate([0, 1, 0, 1, 0]):
+        sender.sendto(camera_packet(cid, frame, frame_number=frame),
+                      ('224.5.23.250', 10950))
+    sender.close()
+    time.sleep(.05)
+    decoded = []
+
+    def parse(payload):
+        decoded.append(payload)
+        return SSL_WrapperPacket.FromString(payload)
+    datagrams, latest = receiver.receive(1, wrapper_camera_id, parse)
+    receiver.disconnect()
+    assert len(datagrams) == 5 and len(decoded) == 5
+    assert [packet_camera_id(payload) for _, payload, _ in latest] == [1, 0]
+    assert [data.detection.frame_number for _, _, data in latest] == [3, 4]
+    assert receiver.get_stats()['dropped'] == 3
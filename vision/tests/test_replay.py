@@ -0,0 +1,78 @@
+import logging
+import numpy as np
+import sslclient
+from recording.packet_log import PacketRecorder, log_path, \
+    SOURCE_VISION, SOURCE_REFBOX
+from refbox import SSL_Referee
+from ..replay import ReplayDataProvider
+
+SSL_WrapperPacket = sslclient.messages_robocup_ssl_wrapper_pb2.SSL_WrapperPacket  # noqa
+
+
+def vision_packet(camera_id, frame_number, x, t_capture):
+    packet = SSL_WrapperPacket()
+    detection = packet.detection
+    detection.frame_number = frame_number
+    detection.t_capture = detection.t_sent = t_capture
+    detection.camera_id = camera_id
+    robot = detection.robots_blue.add()
+    robot.robot_id = 3
+    robot.confidence = 1
+    robot.x, robot.y, robot.orientation = x, 0, 0
+    robot.pixel_x = robot.pixel_y = 0
+    return packet.SerializeToString()
+
+
+def write_recording(prefix):
+    vision = PacketRecorder(log_path(prefix, SOURCE_VISION))
+    refbox = PacketRecorder(log_path(prefix, SOURCE_REFBOX))
+    for i in range(10):
+        timestamp = 100 + i * .01
+        vision.record(vision_packet(0, i, i * 100, timestamp), SOURCE_VISION,
+                      0, timestamp)
+    message = SSL_Referee()
+    message.packet_timestamp = 0
+    message.stage = SSL_Referee.NORMAL_FIRST_HALF
+    message.command = SSL_Referee.HALT
+    message.command_counter = 1
+    message.command_timestamp = 0
+    for team in (message.yellow, message.blue):
+        team.name = ''
+        team.score = team.red_cards = team.yellow_cards = 0
+        team.timeouts = 4
+        team.timeout_time = 0
+        team.goalie = 0
+    refbox.record(message.SerializeToString(), SOURCE_REFBOX, -1, 100.055)
+    vision.close()
+    refbox.close()
+
+
+def test_as_fast_as_possible_plays_every_frame(tmp_path):
+    """ Replays a recording of one robot driving along x at speed 0.
+    Passes if every run() fuses the next frame, and the refbox message
+    shows up in between.
+    """
+    prefix = str(tmp_path / 'match')
+    write_recording(prefix)
+    replay = ReplayDataProvider(prefix, speed=0)
+    replay.logger = logging.getLogger('replay')
+    replay.pre_run()
+    xs = []
+    for i in range(10):
+        replay.run()
+        xs.append(replay.gs.get_robot_position('blue', 3)[0])
+        if i == 5:
+            refbox = replay.gs.get_latest_refbox_message()
+            assert refbox.command == SSL_Referee.HALT
+    assert np.allclose(xs, np.arange(10) * 100)
+    replay.post_run()
+
+
+def test_seek_uses_recording_timestamps(tmp_path):
+    prefix = str(tmp_path / 'match')
+    write_recording(prefix)
+    replay = ReplayDataProvider(prefix, speed=0, offset=.045)
+    replay.pre_run()
+    replay.run()
+    assert replay.gs.get_robot_position('blue', 3)[0] == 500
+    replay.post_run()
@@ -0,0 +1,34 @@
+import numpy as np
+from ..tracking import Tracker
+
+
+def test_ball_velocity_converges():
+    """ Feeds one second of noisy 60 fps measurements of a ball rolling at
+    2000 mm/s and slowing down by 500 mm/s^2.
+    Passes if the filtered velocity is within 100 mm/s of the truth.
+    """
+    rng = np.random.default_rng(0)
+    tracker = Tracker()
+    for frame in range(60):
+        t = frame / 60
+        pos = np.array([2000 * t - 250 * t ** 2, 0]) + rng.normal(0, 5, 2)
+        ball = tracker.update_ball(pos, t)
+    assert np.allclose(ball.velocity, [2000 - 500 * t, 0], atol=100)
+    assert np.allclose(ball.predict(t + .1)[0][0],
+                       2000 * (t + .1) - 250 * (t + .1) ** 2, atol=20)
+
+
+def test_robot_orientation_wraps():
+    """ A robot spins at 3 rad/s through +-pi while driving.
+    Passes if its angular velocity doesn't jump at the wrap around.
+    """
+    rng = np.random.default_rng(0)
+    tracker = Tracker()
+    for frame in range(60):
+        t = frame / 60
+        w = (3 * t + 2 * np.pi - 1) % (2 * np.pi) - np.pi
+        pos = np.array([500 * t, 0, w]) + rng.normal(0, [3, 3, .02])
+        robot = tracker.update_robot('blue', 1, pos, t)
+        if frame > 20:
+            assert abs(robot.velocity[2] - 3) < .5
+    assert np.allclose(robot.velocity[:2], [500, 0], atol=50)
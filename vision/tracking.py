@@ -0,0 +1,323 @@
+'''Kalman filters smoothing vision into positions, velocities + accelerations
+
+Each filter uses a constant acceleration model (state = position, velocity,
+acceleration per axis, driven by white noise jerk). Axes are independent
+and share one covariance, so x and y are filtered together in one step.
+'''
+import numpy as np
+
+# white jerk noise spectral densities ((mm/s^3)^2 s, (rad/s^3)^2 s) - how
+# quickly the filters believe acceleration can change
+BALL_PROCESS_NOISE = 1e7
+ROBOT_PROCESS_NOISE = 1e5
+ROBOT_ANGLE_PROCESS_NOISE = 10
+# variance of single vision measurements (mm^2, rad^2)
+BALL_MEASUREMENT_NOISE = 5 ** 2
+ROBOT_MEASUREMENT_NOISE = 3 ** 2
+ROBOT_ANGLE_MEASUREMENT_NOISE = .02 ** 2
+# initial uncertainty of velocity (mm/s) and acceleration (mm/s^2)
+INITIAL_VELOCITY_STD = 3000
+INITIAL_ACCELERATION_STD = 10000
+# tracks not updated for this long are forgotten
+TRACK_REMOVE_TIME = 5
+
+
+def wrap_angle(angle):
+    """into the range -pi to pi"""
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+class ConstantAccelerationFilter(object):
+    """
+    Filters one object over any number of axes.
+    state is (3, axes): rows are position, velocity, acceleration.
+    is_angle wraps positions and innovations to -pi to pi.
+    """
+    def __init__(self, pos, timestamp, process_noise, measurement_noise,
+                 is_angle=False):
+        pos = np.asarray(pos, dtype=float)
+        self.state = np.zeros((3,) + pos.shape)
+        self.state[0] = pos
+        self.covariance = np.diag([measurement_noise,
+                                   INITIAL_VELOCITY_STD ** 2,
+                                   INITIAL_ACCELERATION_STD ** 2])
+        self.timestamp = timestamp
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.is_angle = is_angle
+
+    @staticmethod
+    def transition(delta_time):
+        dt = delta_time
+        return np.array([[1, dt, dt ** 2 / 2],
+                         [0, 1, dt],
+                         [0, 0, 1]])
+
+    def predict(self, timestamp):
+        """(position, velocity, acceleration) extrapolated to timestamp"""
+        state = self.transition(timestamp - self.timestamp) @ self.state
+        if self.is_angle:
+            state[0] = wrap_angle(state[0])
+        return state
+
+    def update(self, pos, timestamp):
+        """
+        fold in a measurement, returns False if it was older than the last
+        one (and so was ignored)
+        """
+        dt = timestamp - self.timestamp
+        if dt < 0:
+            return False
+        # predict
+        F = self.transition(dt)
+        q = self.process_noise
+        Q = q * np.array([[dt ** 5 / 20, dt ** 4 / 8, dt ** 3 / 6],
+                          [dt ** 4 / 8, dt ** 3 / 3, dt ** 2 / 2],
+                          [dt ** 3 / 6, dt ** 2 / 2, dt]])
+        self.state = F @ self.state
+        self.covariance = F @ self.covariance @ F.T + Q
+        # update (only the position is measured)
+        innovation = np.asarray(pos, dtype=float) - self.state[0]
+        if self.is_angle:
+            innovation = wrap_angle(innovation)
+        gain = self.covariance[:, 0] / \
+            (self.covariance[0, 0] + self.measurement_noise)
+        self.state += np.multiply.outer(gain, innovation)
+        self.covariance -= np.outer(gain, self.covariance[0])
+        if self.is_angle:
+            self.state[0] = wrap_angle(self.state[0])
+        self.timestamp = timestamp
+        return True
+
+    @property
+    def position(self):
+        return self.state[0]
+
+    @property
+    def velocity(self):
+        return self.state[1]
+
+    @property
+    def acceleration(self):
+        return self.state[2]
+
+
+class RobotFilter(object):
+    """x, y and orientation of a robot - orientation needs its own filter"""
+    def __init__(self, pos, timestamp):
+        self.xy = ConstantAccelerationFilter(
+            pos[:2], timestamp, ROBOT_PROCESS_NOISE, ROBOT_MEASUREMENT_NOISE)
+        self.w = ConstantAccelerationFilter(
+            pos[2], timestamp, ROBOT_ANGLE_PROCESS_NOISE,
+            ROBOT_ANGLE_MEASUREMENT_NOISE, is_angle=True)
+
+    @property
+    def timestamp(self):
+        return self.xy.timestamp
+
+    def update(self, pos, timestamp):
+        return self.xy.update(pos[:2], timestamp) and \
+            self.w.update(pos[2], timestamp)
+
+    @property
+    def position(self):
+        return np.append(self.xy.position, self.w.position)
+
+    @property
+    def velocity(self):
+        return np.append(self.xy.velocity, self.w.velocity)
+
+
+class Tracker(object):
+    """Filters for the ball and every robot seen, keyed like the gamestate"""
+    def __init__(self):
+        self.ball = None
+        self.robots = dict()  # (team, robot_id) : RobotFilter
+        # picks which ball detections are the real ball
+        self.ball_candidates = BallCandidateTracker()
+        self._ball_track_id = None
+
+    def update_ball_candidates(self, positions, confidences, timestamps):
+        """
+        associate all ball detections with the candidate tracks, then filter
+        the best one. Returns (measured position, timestamp) of the best
+        track if these detections updated it, otherwise None.
+        """
+        candidates = self.ball_candidates
+        candidates.update(positions, confidences, timestamps)
+        best = candidates.best_track()
+        if best is None:
+            return None
+        timestamp = candidates.timestamps[best]
+        if candidates.track_ids[best] != self._ball_track_id:
+            # switched to another ball, its history says nothing about this
+            self._ball_track_id = candidates.track_ids[best]
+            self.ball = None
+        elif self.ball is not None and timestamp <= self.ball.timestamp:
+            return None
+        measured = candidates.measurements[best].copy()
+        self.update_ball(measured, timestamp)
+        return measured, timestamp
+
+    def update_ball(self, pos, timestamp):
+        if self.ball is None or \
+                timestamp - self.ball.timestamp > TRACK_REMOVE_TIME:
+            self.ball = ConstantAccelerationFilter(
+                pos, timestamp, BALL_PROCESS_NOISE, BALL_MEASUREMENT_NOISE)
+        else:
+            self.ball.update(pos, timestamp)
+        return self.ball
+
+    def update_robot(self, team, robot_id, pos, timestamp):
+        key = (team, robot_id)
+        robot = self.robots.get(key)
+        if robot is None or timestamp - robot.timestamp > TRACK_REMOVE_TIME:
+            robot = self.robots[key] = RobotFilter(pos, timestamp)
+        else:
+            robot.update(pos, timestamp)
+        return robot
+
+
+# most ball hypotheses kept at once (real ball, spare balls, reflections)
+MAX_BALL_TRACKS = 4
+# candidates further than this from a track's predicted position (mm) start
+# a new track instead of updating it
+BALL_GATE_DISTANCE = 250
+# blend of measurement vs prediction for track position and velocity
+BALL_TRACK_ALPHA = .7
+BALL_TRACK_BETA = .3
+# scores of all tracks shrink by this every update, so tracks that stop
+# being seen lose to ones that are
+BALL_TRACK_SCORE_DECAY = .9
+# tracks not seen for this long (s) are dropped
+BALL_TRACK_TIMEOUT = .5
+# another track has to score this many times higher than the current best
+# to take over, so the ball doesn't flicker between similar hypotheses
+BALL_TRACK_SWITCH_RATIO = 1.5
+
+
+class BallCandidateTracker(object):
+    """
+    Associates every ball detection from every camera with a small fixed
+    set of hypotheses (alpha-beta tracks), gating on each track's predicted
+    position. Arrays are indexed by track slot, so picking the best track
+    is constant time, and association is vectorized over all candidates.
+    """
+    def __init__(self, max_tracks=MAX_BALL_TRACKS):
+        self.positions = np.zeros((max_tracks, 2))
+        # latest combined measurement of each track (before smoothing)
+        self.measurements = np.zeros((max_tracks, 2))
+        self.velocities = np.zeros((max_tracks, 2))
+        self.timestamps = np.zeros(max_tracks)
+        self.scores = np.zeros(max_tracks)
+        self.is_active = np.zeros(max_tracks, dtype=bool)
+        # unique id for each track ever started (-1 = empty slot), so users
+        # can tell when the best track switched to another ball
+        self.track_ids = np.full(max_tracks, -1)
+        self._next_track_id = 0
+        # slot + id of the track picked last time
+        self._best = None
+        self._best_id = -1
+
+    def update(self, positions, confidences, timestamps):
+        """
+        fold in (M, 2) ball candidates with (M,) confidences + capture times
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        confidences = np.asarray(confidences, dtype=float)
+        timestamps = np.asarray(timestamps, dtype=float)
+        if len(timestamps):
+            newest = timestamps.max()
+            self.is_active &= newest - self.timestamps <= BALL_TRACK_TIMEOUT
+        self.scores *= BALL_TRACK_SCORE_DECAY
+        self.scores[~self.is_active] = 0
+        if not len(positions):
+            return
+        # (tracks, candidates) distance to each track's predicted position
+        elapsed = timestamps[np.newaxis] - self.timestamps[:, np.newaxis]
+        predicted = self.positions[:, np.newaxis] + \
+            self.velocities[:, np.newaxis] * elapsed[..., np.newaxis]
+        distances = np.linalg.norm(predicted - positions, axis=2)
+        distances[~self.is_active] = np.inf
+        nearest = np.argmin(distances, axis=0)
+        is_gated = distances[nearest, np.arange(len(positions))] <= \
+            BALL_GATE_DISTANCE
+        if is_gated.any():
+            self._update_tracks(nearest[is_gated], positions[is_gated],
+                                confidences[is_gated], timestamps[is_gated])
+        # most confident leftovers first, so they seed the new tracks
+        new_tracks = []
+        for i in np.argsort(-confidences[~is_gated], kind='stable'):
+            self._start_or_join_track(positions[~is_gated][i],
+                                      confidences[~is_gated][i],
+                                      timestamps[~is_gated][i], new_tracks)
+
+    def _update_tracks(self, tracks, positions, confidences, timestamps):
+        """alpha-beta update of each track with its candidates combined"""
+        num_tracks = len(self.scores)
+        updated = np.unique(tracks)
+        weights = np.bincount(tracks, confidences, num_tracks)
+        new_times = np.zeros(num_tracks)
+        np.maximum.at(new_times, tracks, timestamps)
+        # bring every candidate to the same time before averaging them
+        shifted = positions + self.velocities[tracks] * \
+            (new_times[tracks] - timestamps)[:, np.newaxis]
+        measured = np.stack(
+            [np.bincount(tracks, confidences * shifted[:, axis], num_tracks)
+             for axis in range(2)], axis=1)[updated] / \
+            weights[updated, np.newaxis]
+        dt = (new_times[updated] - self.timestamps[updated])[:, np.newaxis]
+        predicted = self.positions[updated] + self.velocities[updated] * dt
+        self.measurements[updated] = measured
+        residual = measured - predicted
+        self.positions[updated] = predicted + BALL_TRACK_ALPHA * residual
+        moved = dt[:, 0] > 0
+        velocities = self.velocities[updated]
+        velocities[moved] += BALL_TRACK_BETA * residual[moved] / dt[moved]
+        self.velocities[updated] = velocities
+        self.timestamps[updated] = new_times[updated]
+        self.scores[updated] += np.bincount(tracks, confidences,
+                                            num_tracks)[updated]
+
+    def _start_or_join_track(self, position, confidence, timestamp,
+                             new_tracks):
+        # the same new ball may be seen by several cameras at once
+        for track in new_tracks:
+            if np.linalg.norm(self.positions[track] - position) <= \
+                    BALL_GATE_DISTANCE:
+                weight = self.scores[track]
+                self.positions[track] = \
+                    (self.positions[track] * weight + position * confidence) \
+                    / (weight + confidence)
+                self.measurements[track] = self.positions[track]
+                self.timestamps[track] = max(self.timestamps[track], timestamp)
+                self.scores[track] += confidence
+                return
+        # take a free slot, otherwise replace the weakest hypothesis
+        scores = np.where(self.is_active, self.scores, -np.inf)
+        track = np.argmin(scores)
+        self.positions[track] = position
+        self.measurements[track] = position
+        self.velocities[track] = 0
+        self.timestamps[track] = timestamp
+        self.scores[track] = confidence
+        self.is_active[track] = True
+        self.track_ids[track] = self._next_track_id
+        self._next_track_id += 1
+        new_tracks.append(track)
+
+    def best_track(self):
+        """slot of the most likely real ball, or None if there are no tracks"""
+        if not self.is_active.any():
+            self._best = None
+            return None
+        best = int(np.argmax(np.where(self.is_active, self.scores, -np.inf)))
+        current = self._best
+        if current is not None and self.is_active[current] and \
+                self.track_ids[current] == self._best_id and \
+                self.scores[best] < \
+                self.scores[current] * BALL_TRACK_SWITCH_RATIO:
+            return current
+        self._best = best
+        self._best_id = self.track_ids[best]
+        return best